@@ -0,0 +1,78 @@
+"""
+Parse time and retained memory of full-market payloads: json.loads into dicts, the fast
+parser of decode='records' into dicts (orjson if installed), decode='records' records and,
+for trades, decode='columnar' numpy arrays.
+
+    python -m benchmarks.bench_decode [instruments] [trades]
+"""
+import json
+import sys
+import tracemalloc
+from time import perf_counter
+
+from cryptocom import columnar, records
+from cryptocom.api import CryptoComApi
+
+V2 = CryptoComApi.ApiVersion.V2
+
+
+def tickers_payload(count):
+    return json.dumps({'code': 0, 'method': 'public/get-ticker', 'result': {'data': [
+        {'i': f'COIN{i}_USDT', 'b': 100.0 + i, 'k': 100.5 + i, 'a': 100.25 + i, 'h': 110.0 + i, 'l': 90.0 + i,
+         'v': 1234.5 + i, 'c': 0.0123, 't': 1600000000000 + i} for i in range(count)]}})
+
+
+def trades_payload(count):
+    return json.dumps({'code': 0, 'method': 'public/get-trades', 'result': {'instrument_name': 'BTC_USDT', 'data': [
+        {'i': 'BTC_USDT', 'd': 1000000 + i, 's': 'BUY' if i % 2 else 'SELL', 'p': 10000.0 + i * 0.5,
+         'q': 0.001 * (i % 100 + 1), 't': 1600000000000 + i, 'dataTime': 1600000000000 + i} for i in range(count)]}})
+
+
+def raw(text, decoder):
+    return json.loads(text)['result']
+
+
+def fast(text, decoder):
+    return records.loads(text)['result']
+
+
+def decoded(text, decoder):
+    return decoder(records.loads(text)['result'], V2)
+
+
+def decoded_columnar(text, decoder):
+    return columnar.decode_trades(records.loads(text)['result'], V2)
+
+
+def measure(parse, text, decoder, repeat):
+    start = perf_counter()
+    for _ in range(repeat):
+        parse(text, decoder)
+    elapsed = (perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    kept = parse(text, decoder)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return elapsed, size
+
+
+def main(instruments=500, trades=10000, repeat=20):
+    print(f"json parser of records: {records.loads.__module__}")
+    for name, text, decoder in (
+            (f'tickers x{instruments}', tickers_payload(instruments), records.decode_tickers),
+            (f'trades x{trades}', trades_payload(trades), records.decode_trades)):
+        print(f"{name} ({len(text) / 1024:.1f}KB)")
+        base_size = None
+        parsers = [('json dicts', raw), ('fast dicts', fast), ('records', decoded)]
+        if decoder is records.decode_trades and columnar.np is not None:
+            parsers.append(('columnar', decoded_columnar))
+        for label, parse in parsers:
+            time, size = measure(parse, text, decoder, repeat)
+            base_size = base_size or size
+            print(f"  {label:>10}: {time * 1000:7.2f}ms {size / 1024:8.1f}KB ({size / base_size:.2f}x memory)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
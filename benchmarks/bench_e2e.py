@@ -0,0 +1,135 @@
+"""
+End-to-end throughput, latency and memory of CryptoComApi against the local MockExchange:
+public polling, order placement and history pagination, sequential and from a thread pool.
+The server runs in the same process, so the numbers include its share of the GIL and are
+meant for comparing runs on the same machine.
+
+    python -m benchmarks.bench_e2e [--calls N] [--threads N] [--latency SECONDS] [--baseline FILE]
+
+With --baseline the results are compared with the file, which is written if it does not exist,
+and the exit code is 1 if a scenario lost more than --tolerance of its calls/sec.
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from cryptocom.api import CryptoComApi
+from cryptocom.mockserver import MockExchange
+from cryptocom.ratelimit import RateLimiter
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def run(call, calls, threads):
+    """
+    @return: (calls/sec, sorted latencies in ms, peak traced memory in KB)
+    """
+    def timed(_):
+        start = perf_counter()
+        call()
+        return (perf_counter() - start) * 1000
+
+    def repeat(count):
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                return list(pool.map(timed, range(count)))
+        return [timed(i) for i in range(count)]
+
+    start = perf_counter()
+    samples = repeat(calls)
+    elapsed = perf_counter() - start
+
+    # tracing slows down every allocation, memory is measured on a separate, shorter run
+    tracemalloc.start()
+    repeat(max(threads, calls // 10))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return calls / elapsed, sorted(samples), peak / 1024
+
+
+def scenarios(api, exchange):
+    symbols = exchange.instruments
+    counter = iter(range(10 ** 9))
+
+    def poll_ticker():
+        api.ticker(symbols[next(counter) % len(symbols)])
+
+    def create_order():
+        n = next(counter)
+        api.create_order(symbols[n % len(symbols)], 'BUY', 'LIMIT', 1, 100, client_oid=f'bench-{n}')
+
+    def create_order_list():
+        api.create_orders([{'symbol': symbols[0], 'side': 'BUY', '_type': 'LIMIT', 'quantity': 1, 'price': 100}] * 10)
+
+    def paginate_history():
+        for _ in api.iter_all_orders(page_size=100):
+            pass
+
+    # name, call, calls per run relative to --calls
+    return [
+        ('tickers (all markets)', api.tickers, 1),
+        ('ticker', poll_ticker, 1),
+        ('order_book', lambda: api.order_book(symbols[0]), 1),
+        ('trades', lambda: api.trades(symbols[0]), 1),
+        ('create_order', create_order, 1),
+        ('create_orders x10', create_order_list, 0.2),
+        ('iter_all_orders x1000', paginate_history, 0.02),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help="server side latency per request in seconds")
+    parser.add_argument('--baseline', help="JSON file of a previous run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    with MockExchange(latency=args.latency, history=1000) as exchange:
+        # the client's rate limiter is not what is measured here
+        with CryptoComApi(exchange.key, exchange.secret, api_root=exchange.root(), rate_limiter=RateLimiter({}),
+                          pool_size=max(10, args.threads), return_results=True) as api:
+            api.tickers()
+            print(f"{'scenario':<24}{'calls/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'peak KB':>10}")
+            for name, call, share in scenarios(api, exchange):
+                calls = max(3, int(args.calls * share))
+                rate, samples, peak = run(call, calls, args.threads)
+                results[name] = {'calls_per_sec': rate, 'p50_ms': percentile(samples, 0.5),
+                                 'p90_ms': percentile(samples, 0.9), 'p99_ms': percentile(samples, 0.99),
+                                 'peak_kb': peak}
+                print(f"{name:<24}{rate:>10.1f}{results[name]['p50_ms']:>9.3f}{results[name]['p90_ms']:>9.3f}"
+                      f"{results[name]['p99_ms']:>9.3f}{peak:>10.1f}")
+
+    if not args.baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressed = False
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result['calls_per_sec'] / baseline[name]['calls_per_sec'] - 1
+        flag = ''
+        if change < -args.tolerance:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"{name:<24}{change * 100:>+9.1f}% calls/s{flag}")
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
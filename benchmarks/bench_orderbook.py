@@ -0,0 +1,54 @@
+"""
+Update throughput of the local order book for books with thousands of levels.
+
+    python -m benchmarks.bench_orderbook [levels] [updates]
+"""
+import random
+import sys
+from time import perf_counter
+
+from cryptocom.orderbook import OrderBook
+
+
+def make_updates(mid, levels, count, tick=0.01):
+    # most updates land close to the top of the book, a few anywhere in it
+    updates = []
+    for _ in range(count):
+        distance = int(random.expovariate(1 / 20)) if random.random() < 0.9 else random.randrange(levels)
+        size = 0 if random.random() < 0.3 else round(random.uniform(0.01, 5), 4)
+        if random.random() < 0.5:
+            updates.append(([(round(mid - tick * (distance + 1), 2), size)], []))
+        else:
+            updates.append(([], [(round(mid + tick * (distance + 1), 2), size)]))
+    return updates
+
+
+def main(levels=5000, count=200000):
+    random.seed(1)
+    mid, tick = 10000.0, 0.01
+    book = OrderBook('BTC_USDT')
+    book.apply_snapshot([(round(mid - tick * (i + 1), 2), 1.0) for i in range(levels)],
+                        [(round(mid + tick * (i + 1), 2), 1.0) for i in range(levels)])
+
+    start = perf_counter()
+    for _ in range(10):
+        book.apply_snapshot([(round(mid - tick * (i + 1), 2), 1.0) for i in range(levels)],
+                            [(round(mid + tick * (i + 1), 2), 1.0) for i in range(levels)])
+    snapshot = (perf_counter() - start) / 10
+
+    updates = make_updates(mid, levels, count, tick)
+    start = perf_counter()
+    for sequence, (bids, asks) in enumerate(updates):
+        book.apply_delta(bids, asks, sequence=sequence)
+        book.best_bid()
+        book.best_ask()
+    elapsed = perf_counter() - start
+
+    print(f"levels per side      {levels}")
+    print(f"snapshot             {snapshot * 1000:.2f}ms")
+    print(f"deltas/sec           {count / elapsed:,.0f} (with top of book read after each)")
+    print(f"levels after         {len(book.bids)} bids, {len(book.asks)} asks")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""
+Per-call latency of the pooled keep-alive session against a local mock server,
+compared with a new connection per call (module level requests.get).
+
+    python -m benchmarks.bench_session [calls]
+"""
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import median
+from time import perf_counter
+
+import requests
+
+from cryptocom.api import CryptoComApi
+from cryptocom.ratelimit import RateLimiter
+
+TICKER = json.dumps({
+    "code": 0, "method": "public/get-ticker",
+    "result": {"data": [{"i": "BTC_USDT", "b": 9744.25, "k": 9744.5, "a": 9744.3, "t": 1571971998000,
+                         "v": 1.5, "h": 9800.0, "l": 9700.0, "c": 12.5}]}
+}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(TICKER)))
+        self.end_headers()
+        self.wfile.write(TICKER)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = perf_counter()
+        fn()
+        samples.append((perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{name:<28} median {median(samples):.3f}ms  p99 {p99:.3f}ms")
+
+
+def main(calls=500):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    root = f"http://127.0.0.1:{server.server_port}/v2/"
+
+    try:
+        report("requests.get per call", timed(lambda: requests.get(root + "public/get-ticker").json(), calls))
+
+        # the rate limiter is not what is measured here
+        with CryptoComApi(api_root=root, rate_limiter=RateLimiter({})) as api:
+            report("CryptoComApi pooled session", timed(api.tickers, calls))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
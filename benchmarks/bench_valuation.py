@@ -0,0 +1,122 @@
+"""
+Portfolio valuation and execution cost estimates over hundreds of assets: per-coin Python
+lookups and level-by-level book walks against cryptocom.valuation's vectorized RateTable
+and vwap_for_size over stacked books. Both sides value from the same single tickers()
+response, the per-coin ticker() requests the loop replaces are not part of the timings.
+
+    python -m benchmarks.bench_valuation [assets] [book depth]
+"""
+import random
+import sys
+from time import perf_counter
+
+from cryptocom import columnar, valuation
+from cryptocom.api import CryptoComApi
+
+QUOTES = ('USDT', 'BTC', 'CRO')
+
+
+def market(assets):
+    """
+    @return: (tickers() result, balance() result, order_book() results) of a market of `assets` coins, each
+             traded against one of the quote currencies, so a third of them need a cross rate
+    """
+    rng = random.Random(0)
+    prices = {'USDT': 1.0, 'BTC': 10000.0, 'CRO': 0.1}
+    rows = [{'i': 'BTC_USDT', 'b': 9999.0, 'k': 10001.0, 'a': 10000.0, 'v': 1000.0},
+            {'i': 'CRO_USDT', 'b': 0.0999, 'k': 0.1001, 'a': 0.1, 'v': 1000.0}]
+    coins = []
+    for i in range(assets):
+        coin, quote = f'COIN{i}', QUOTES[i % len(QUOTES)]
+        price = rng.uniform(0.01, 100) / prices[quote]
+        rows.append({'i': f'{coin}_{quote}', 'b': price * 0.999, 'k': price * 1.001, 'a': price,
+                     'v': rng.uniform(1, 1000)})
+        coins.append(coin)
+    balance = {'accounts': [{'currency': c, 'balance': rng.uniform(0, 100)} for c in coins + ['USDT', 'BTC']]}
+    return {'data': rows}, balance, rows
+
+
+def books(rows, depth):
+    rng = random.Random(1)
+    return [{'instrument_name': row['i'], 'data': [{
+        'asks': [[row['k'] * (1 + 0.001 * n), rng.uniform(0.1, 2), 1] for n in range(depth)],
+        'bids': [[row['b'] * (1 - 0.001 * n), rng.uniform(0.1, 2), 1] for n in range(depth)]}]} for row in rows]
+
+
+def python_valuation(tickers, balance, target='USDT'):
+    # what a per-coin loop does: a USDT market, else through the quote currency of the coin's market
+    by_name = {row['i']: row for row in tickers['data']}
+    total = 0.0
+    for account in balance['accounts']:
+        coin, amount = account['currency'], account['balance']
+        if coin == target:
+            total += amount
+            continue
+        direct = by_name.get(f'{coin}_{target}')
+        if direct is not None:
+            total += amount * (direct['b'] + direct['k']) / 2
+            continue
+        for quote in QUOTES:
+            leg, cross = by_name.get(f'{coin}_{quote}'), by_name.get(f'{quote}_{target}')
+            if leg is not None and cross is not None:
+                total += amount * (leg['b'] + leg['k']) / 2 * (cross['b'] + cross['k']) / 2
+                break
+    return total
+
+
+def python_vwaps(order_books, size):
+    vwaps = []
+    for book in order_books:
+        left, cost = size, 0.0
+        for price, quantity, _ in book['data'][0]['asks']:
+            taken = min(left, quantity)
+            cost += taken * price
+            left -= taken
+            if left <= 0:
+                break
+        vwaps.append(cost / (size - left) if size > left else None)
+    return vwaps
+
+
+def timed(call, repeat):
+    start = perf_counter()
+    for _ in range(repeat):
+        result = call()
+    return (perf_counter() - start) / repeat * 1000, result
+
+
+def main(assets=500, depth=50, repeat=20):
+    tickers, balance, rows = market(assets)
+    order_books = books(rows, depth)
+    size = 5.0
+    print(f"{assets} assets, {len(order_books)} books of depth {depth}")
+
+    loop, expected = timed(lambda: python_valuation(tickers, balance), repeat)
+    vectorized, result = timed(lambda: valuation.valuation(tickers, balance), repeat)
+    assert abs(result.total - expected) < 1e-6 * expected, (result.total, expected)
+    print(f"  valuation      python {loop:8.2f}ms  vectorized {vectorized:8.2f}ms  ({loop / vectorized:.1f}x)")
+
+    table = valuation.RateTable(tickers)
+    cached, _ = timed(lambda: table.value(valuation.balances(balance)), repeat)
+    print(f"  revaluation    {'':>15}  cached table {cached:6.2f}ms")
+
+    loop, _ = timed(lambda: python_vwaps(order_books, size), repeat)
+    stack, stacked = timed(lambda: valuation.stack_books(order_books), repeat)
+    vectorized, _ = timed(lambda: valuation.vwap_for_size(*stacked, size), repeat)
+    print(f"  vwap for size  python {loop:8.2f}ms  vectorized {vectorized:8.2f}ms  ({loop / vectorized:.1f}x)")
+
+    # sizes up to the whole depth, where the python walk cannot stop early
+    sizes = [size * 2 ** n for n in range(8)]
+    loop, _ = timed(lambda: [python_vwaps(order_books, s) for s in sizes], repeat)
+    vectorized, _ = timed(lambda: [valuation.vwap_for_size(*stacked, s) for s in sizes], repeat)
+    print(f"  {len(sizes)} sizes        python {loop:8.2f}ms  vectorized {vectorized:8.2f}ms  "
+          f"({loop / vectorized:.1f}x)")
+
+    v2 = CryptoComApi.ApiVersion.V2
+    arrays = [columnar.decode_book(book, v2) for book in order_books]
+    from_arrays, _ = timed(lambda: valuation.stack_books(arrays), repeat)
+    print(f"  stacking       dict books {stack:6.2f}ms  decode='columnar' books {from_arrays:6.2f}ms")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+from .api import CryptoComApi, current_timestamp
+from .result import ApiError
+
+logger = logging.getLogger('cryptocom_api')
+
+# status of an order that was open and is gone from the exchange's open orders without a final status
+UNKNOWN = 'UNKNOWN'
+# order statuses after which an order does not change anymore, except an UNKNOWN order getting its final status
+CLOSED_STATUSES = frozenset(('FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', UNKNOWN))
+
+# callback events
+ORDER = 'order'
+FILL = 'fill'
+BALANCE = 'balance'
+
+Fill = namedtuple('Fill', 'trade_id order_id client_oid instrument_name side price quantity fee fee_currency '
+                          'timestamp')
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+class AccountState:
+    """
+    Local state of the orders and balances of a V2 account, seeded from open_orders() and
+    balance() and kept current by the user WebSocket channels:
+
+        state = AccountState(api)
+        state.add_callback(on_fill, FILL)
+        stream = UserStream(api)
+        stream.add_callback(state.on_stream_message)
+        async with stream:
+            await stream.subscribe(user_order_channel(), user_trade_channel(), user_balance_channel())
+            await state.sync_async()
+            await state.reconcile_every(60)
+
+    Orders are the V2 order dicts, an update older than the stored order (by update_time) is
+    ignored, so stream messages and REST snapshots can arrive in any order. Orders are found
+    by order_id or client_oid in O(1), open orders are indexed per instrument. Closed orders
+    are kept up to `max_closed`, the oldest are forgotten first.
+
+    Callbacks are called with the updated order dict (ORDER), a Fill (FILL), or the balance
+    dict of a currency (BALANCE), from the thread or task that applied the update.
+    """
+
+    def __init__(self, api=None, max_closed=10000, max_trade_ids=10000):
+        """
+        @param api: (optional) CryptoComApi or AsyncCryptoComApi of ApiVersion.V2, used by sync() / sync_async()
+        @param max_closed: closed orders kept for lookups
+        @param max_trade_ids: ids of the most recent fills kept to skip fills received twice
+        """
+        if api is not None:
+            if api.version != CryptoComApi.ApiVersion.V2:
+                raise ValueError("AccountState requires ApiVersion.V2, the user stream is a V2 API")
+        self.api = api
+        self._results_api = None
+        self.max_closed = max_closed
+        self.max_trade_ids = max_trade_ids
+
+        self.orders = {}
+        self.balances = {}
+        self._client_oids = {}
+        self._open = {}
+        self._closed = OrderedDict()
+        self._trade_ids = OrderedDict()
+        self._callbacks = {ORDER: [], FILL: [], BALANCE: []}
+        self._lock = threading.RLock()
+
+        self.updates = 0
+        self.stale = 0
+        self.fills = 0
+        self.corrections = 0
+        self.synced = None
+
+    def add_callback(self, callback, event=FILL):
+        """
+        @param event: ORDER, FILL or BALANCE
+        """
+        self._callbacks[event].append(callback)
+
+    def _client(self):
+        # the state is kept as V2 dicts, whatever the decode mode of the client, the copy is made
+        # on the first sync so an AsyncCryptoComApi can be passed outside of a running event loop
+        if self._results_api is None:
+            api = self.api.with_results()
+            api.decoders = None
+            self._results_api = api
+        return self._results_api
+
+    def _notify(self, event, value):
+        for callback in self._callbacks[event]:
+            try:
+                callback(value)
+            except Exception as e:
+                logger.error(f"Account {event} callback {callback!r} failed: {e!r}")
+
+    # lookups
+
+    def order(self, order_id):
+        return self.orders.get(str(order_id))
+
+    def order_by_client_oid(self, client_oid):
+        order_id = self._client_oids.get(client_oid)
+        return self.orders.get(order_id) if order_id is not None else None
+
+    def open_orders(self, instrument_name=None):
+        """
+        @return: list of the open order dicts, of one instrument or all
+        """
+        with self._lock:
+            if instrument_name is not None:
+                return list(self._open.get(instrument_name, {}).values())
+            return [order for orders in self._open.values() for order in orders.values()]
+
+    def balance(self, currency):
+        """
+        @return: {'currency', 'balance', 'available', 'order', 'stake'}, None if unknown
+        """
+        return self.balances.get(currency)
+
+    # updates
+
+    def _index(self, order):
+        order_id = order['order_id']
+        instrument = order.get('instrument_name')
+        if order.get('status') in CLOSED_STATUSES:
+            orders = self._open.get(instrument)
+            if orders is not None:
+                orders.pop(order_id, None)
+                if not orders:
+                    del self._open[instrument]
+            self._closed[order_id] = None
+            while len(self._closed) > self.max_closed:
+                old_id, _ = self._closed.popitem(last=False)
+                old = self.orders.pop(old_id, None)
+                if old is not None and old.get('client_oid'):
+                    self._client_oids.pop(old['client_oid'], None)
+        else:
+            self._open.setdefault(instrument, {})[order_id] = order
+
+    def on_order(self, order):
+        """
+        Applies an order update of the user.order channel or a REST order
+
+        @return: True if the order was updated, False if the update is older than the stored order
+        """
+        with self._lock:
+            order = self._apply_order(order)
+        if order is None:
+            return False
+        self._notify(ORDER, order)
+        return True
+
+    def _apply_order(self, order):
+        # with the lock held, returns the stored order, None for a stale update
+        order = dict(order)
+        order['order_id'] = order_id = str(order['order_id'])
+        current = self.orders.get(order_id)
+        if current is not None and (order.get('update_time') or 0) < (current.get('update_time') or 0):
+            self.stale += 1
+            return None
+        if current is not None and current.get('status') in CLOSED_STATUSES and \
+                order.get('status') not in CLOSED_STATUSES:
+            # a closed order is never reopened, this is an older update with the same time
+            self.stale += 1
+            return None
+        self.orders[order_id] = order
+        if order.get('client_oid'):
+            self._client_oids[order['client_oid']] = order_id
+        self._index(order)
+        self.updates += 1
+        return order
+
+    def on_trade(self, trade):
+        """
+        Applies a fill of the user.trade channel
+
+        @return: the Fill, None if it was already received
+        """
+        trade_id = str(trade.get('trade_id'))
+        with self._lock:
+            if trade_id in self._trade_ids:
+                return None
+            self._trade_ids[trade_id] = None
+            while len(self._trade_ids) > self.max_trade_ids:
+                self._trade_ids.popitem(last=False)
+            order_id = str(trade.get('order_id'))
+            order = self.orders.get(order_id)
+            fill = Fill(trade_id, order_id, order.get('client_oid') if order else None, trade.get('instrument_name'),
+                        trade.get('side'), _float(trade.get('traded_price')), _float(trade.get('traded_quantity')),
+                        _float(trade.get('fee')), trade.get('fee_currency'), trade.get('create_time'))
+            self.fills += 1
+        self._notify(FILL, fill)
+        return fill
+
+    def on_balance(self, balance):
+        """
+        Applies a balance of the user.balance channel or of balance()
+        """
+        balance = dict(balance)
+        with self._lock:
+            self.balances[balance['currency']] = balance
+        self._notify(BALANCE, balance)
+
+    def on_stream_message(self, message):
+        """
+        UserStream callback of the user.order, user.trade and user.balance channels
+        """
+        apply = {'user.order': self.on_order, 'user.trade': self.on_trade, 'user.balance': self.on_balance}.get(
+            message.channel)
+        if apply is None:
+            return
+        for data in message.data:
+            apply(data)
+
+    # REST reconciliation
+
+    def apply_snapshot(self, open_orders, balances, as_of):
+        """
+        Corrects the state with REST results: orders open locally that are not open anymore are
+        closed, open orders and balances missing or differing are replaced. Callbacks of the
+        corrections are called once the whole snapshot is applied, without holding the lock
+
+        @param open_orders: all open order dicts
+        @param balances: all balance dicts
+        @param as_of: timestamp in ms the requests were sent, later updates are kept
+        @return: order ids open locally that are missing from the snapshot, their final status is not known
+        """
+        events = []
+        with self._lock:
+            for order in open_orders:
+                current = self.orders.get(str(order['order_id']))
+                if current != order:
+                    order = self._apply_order(order)
+                    if order is not None:
+                        self.corrections += 1
+                        events.append((ORDER, order))
+            open_ids = {str(order['order_id']) for order in open_orders}
+            missing = [order for order in self.open_orders()
+                       if order['order_id'] not in open_ids and (order.get('update_time') or 0) < as_of]
+            for balance in balances:
+                if self.balances.get(balance['currency']) != balance:
+                    self.corrections += 1
+                    balance = dict(balance)
+                    self.balances[balance['currency']] = balance
+                    events.append((BALANCE, balance))
+            self.synced = as_of
+        for event, value in events:
+            self._notify(event, value)
+        return [order['order_id'] for order in missing]
+
+    def _close_missing(self, order_id, detail):
+        order = detail.get('order_info') if detail else None
+        if order is None:
+            order = dict(self.orders[order_id], status=UNKNOWN)
+        if self.on_order(order):
+            self.corrections += 1
+
+    def sync(self):
+        """
+        Seeds or reconciles the state with open_orders(), balance() and show_order() for the orders that are not
+        open anymore, with a CryptoComApi
+
+        @raise ApiError: if open orders or balances can not be fetched
+        """
+        api = self._client()
+        as_of = current_timestamp()
+        orders = list(api.iter_open_orders())
+        result = api.balance()
+        if not result.ok:
+            raise ApiError(result)
+        for order_id in self.apply_snapshot(orders, (result.result or {}).get('accounts') or [], as_of):
+            order = self.orders[order_id]
+            detail = api.show_order(order.get('instrument_name'), order_id)
+            self._close_missing(order_id, detail.result if detail.ok else None)
+
+    async def sync_async(self):
+        """
+        sync() with an AsyncCryptoComApi
+        """
+        api = self._client()
+        as_of = current_timestamp()
+        orders = [order async for order in api.iter_open_orders()]
+        result = await api.balance()
+        if not result.ok:
+            raise ApiError(result)
+        for order_id in self.apply_snapshot(orders, (result.result or {}).get('accounts') or [], as_of):
+            order = self.orders[order_id]
+            detail = await api.show_order(order.get('instrument_name'), order_id)
+            self._close_missing(order_id, detail.result if detail.ok else None)
+
+    async def reconcile_every(self, interval):
+        """
+        Runs sync_async() every `interval` seconds until cancelled, failed reconciliations are logged
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_async()
+            except Exception as e:
+                logger.warning(f"Account reconciliation failed: {e!r}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'orders': len(self.orders),
+                'open_orders': sum(len(orders) for orders in self._open.values()),
+                'balances': len(self.balances),
+                'updates': self.updates,
+                'stale': self.stale,
+                'fills': self.fills,
+                'corrections': self.corrections,
+                'synced': self.synced,
+            }
@@ -0,0 +1,266 @@
+import asyncio
+import functools
+import inspect
+from time import perf_counter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .api import CryptoComApi, logger, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from .cache import STALE, request_key
+from .paginate import DEFAULT_PAGE_SIZE, apaginate
+from .ratelimit import endpoint_group
+from .resilience import exception_result, retry_safe
+from .result import skipped
+
+
+def _awaitable(name):
+    # the sync implementation only builds path and params, the request itself goes
+    # through the overridden coroutine _request, so its result is awaited here
+    method = getattr(CryptoComApi, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    return wrapper
+
+
+class _SharedSession:
+    # the aiohttp session of a client and of its with_results() copies, created by their first request
+    __slots__ = ('session',)
+
+    def __init__(self):
+        self.session = None
+
+
+class AsyncCryptoComApi(CryptoComApi):
+    """
+    asyncio version of CryptoComApi, every API method is a coroutine:
+
+        async with AsyncCryptoComApi() as api:
+            tickers = await asyncio.gather(*(api.ticker(s) for s in symbols))
+    """
+
+    def __init__(self, key=None, secret=None, version=CryptoComApi.ApiVersion.V2, session=None,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, api_root=None,
+                 rate_limiter=None, block_on_rate_limit=True, return_results=False, cache=None,
+                 coalesce=False, decode=None, candles=None, metrics=None, resilience=None, recorder=None):
+        """
+        @param session: (optional) aiohttp.ClientSession to use, it is not closed by close()
+        @param pool_size: max number of keep-alive connections kept open to the API host
+        @param timeout: (connect, read) timeout in seconds, or a single number for both
+        @param api_root: (optional) override of the API root url, ex. for a local mock server
+        @param rate_limiter: (optional) RateLimiter shared with other clients, by default each client has its own
+        @param block_on_rate_limit: wait for the rate limiter, if False calls over the limit are skipped
+        @param return_results: every call returns an immutable ApiResult instead of using self.response / self.error
+        @param cache: (optional) True or a ResponseCache, caches results of public market endpoints
+        @param coalesce: True or a SingleFlight, identical public calls in flight share one request
+        @param decode: (optional) 'records' or 'columnar', see CryptoComApi
+        @param candles: (optional) True or a CandleBuilder for klines() on ApiVersion.V2, see CryptoComApi
+        @param metrics: (optional) True or a Metrics recording the requests sent
+        @param resilience: (optional) True or a Resilience, see CryptoComApi
+        @param recorder: (optional) cryptocom.recorder.Recorder of the market data received
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncCryptoComApi requires aiohttp: pip install cryptocom[async]")
+        self._pool_size = pool_size
+        self._shared = _SharedSession()
+        super().__init__(key, secret, version, session=session, pool_size=pool_size, timeout=timeout,
+                         api_root=api_root, rate_limiter=rate_limiter, block_on_rate_limit=block_on_rate_limit,
+                         return_results=return_results, cache=cache,
+                         coalesce=coalesce, decode=decode, candles=candles, metrics=metrics,
+                         resilience=resilience, recorder=recorder)
+
+    @property
+    def session(self):
+        return self._shared.session
+
+    @session.setter
+    def session(self, session):
+        self._shared.session = session
+
+    def _create_session(self, pool_size):
+        # aiohttp sessions have to be created inside of a running event loop, see _get_session()
+        return None
+
+    def _get_session(self):
+        if self.session is None:
+            if isinstance(self.timeout, (tuple, list)):
+                connect, read = self.timeout
+            else:
+                connect = read = self.timeout
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+            )
+        return self.session
+
+    async def close(self):
+        if self._own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def __enter__(self):
+        raise TypeError("AsyncCryptoComApi is closed by a coroutine, use `async with` instead of `with`")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        raise TypeError("AsyncCryptoComApi is closed by a coroutine, use `async with` instead of `with`")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _call(self, path, param=None, method='get', timeout=None):
+        request = self._prepare_request(path, param, method)
+        if request is None:
+            return skipped({'unsupported_method': method})
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.before_request(path, method, param)
+
+        if self.block_on_rate_limit:
+            group = endpoint_group(path, method)
+            waited = await self.rate_limiter.acquire_async(group)
+            if metrics is not None:
+                metrics.observe_wait(group, waited)
+        else:
+            result = self._rate_limited(path, method)
+            if result is not None:
+                return self._observe(path, method, result)
+
+        method, url, kwargs = request
+        if timeout:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+
+        start = perf_counter()
+        try:
+            async with self._get_session().request(method, url, **kwargs) as r:
+                body = await r.read()
+                text = await r.text()
+        except Exception as e:
+            self._observe(path, method, exception_result(e, perf_counter() - start))
+            raise
+        elapsed = perf_counter() - start
+        logger.debug(f"{path}, elapsed: {elapsed:.6f}s")
+
+        result = self._parse_response(r.status, text, elapsed)
+        if metrics is not None:
+            metrics.after_request(path, method, result, len(body))
+        return result
+
+    async def _send(self, path, param=None, method='get', sign=None):
+        if self.resilience is None:
+            return await self._call(path, sign(param) if sign else param, method)
+        return await self.resilience.call_async(
+            endpoint_group(path, method),
+            lambda timeout: self._call(path, sign(param) if sign else param, method, timeout),
+            retry=method == 'get' or retry_safe(path, param), hedge=method == 'get')
+
+    async def _fetch(self, path, param=None):
+        if self.single_flight is None:
+            return await self._send(path, param)
+        return await self.single_flight.do_async(request_key(path, param), lambda: self._send(path, param))
+
+    async def _cached_call(self, path, param=None):
+        key = self.cache.key(path, param)
+        result, state = self.cache.get(key)
+        if state == STALE and self.cache.start_refresh(key):
+            asyncio.ensure_future(self._refresh(key, path, param))
+        if result is not None:
+            return result
+
+        result = await self._fetch(path, param)
+        if result.ok:
+            self.cache.put(key, result)
+        return result
+
+    async def _refresh(self, key, path, param):
+        try:
+            result = await self._fetch(path, param)
+            if result.ok:
+                self.cache.put(key, result)
+        except Exception as e:
+            logger.warning(f"Cache refresh of '{path}' failed: {e!r}")
+        finally:
+            self.cache.end_refresh(key)
+
+    async def _request(self, path, param=None, method='get', decoder=None, sign=None):
+        if method == 'get':
+            if self.cache is not None and self.cache.cacheable(path):
+                result = await self._cached_call(path, param)
+            else:
+                result = await self._fetch(path, param)
+        else:
+            result = await self._send(path, param, method, sign)
+        return self._finish(self._decode(result, decoder, param))
+
+    async def _local_klines(self, symbol, period):
+        result = await self._fetch('public/get-trades', {'instrument_name': symbol})
+        return self._finish(self._add_candles(result, symbol, period))
+
+    async def _run_batches(self, batches, max_workers):
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def run(call):
+            async with semaphore:
+                try:
+                    result = call()
+                    if inspect.isawaitable(result):
+                        result = await result
+                except Exception as e:
+                    logger.warning(f"Batch of orders failed: {e!r}")
+                    return exception_result(e)
+                return result
+
+        results = await asyncio.gather(*(run(call) for call, _ in batches))
+        return self._split_batches(results, [size for _, size in batches])
+
+    symbols = _awaitable('symbols')
+    tickers = _awaitable('tickers')
+    ticker = _awaitable('ticker')
+    klines = _awaitable('klines')
+    trades = _awaitable('trades')
+    prices = _awaitable('prices')
+    order_book = _awaitable('order_book')
+
+    balance = _awaitable('balance')
+    create_order = _awaitable('create_order')
+    create_limit_order = _awaitable('create_limit_order')
+    create_market_order = _awaitable('create_market_order')
+    create_orders = _awaitable('create_orders')
+    show_order = _awaitable('show_order')
+    cancel_order = _awaitable('cancel_order')
+    cancel_orders = _awaitable('cancel_orders')
+    cancel_all_orders = _awaitable('cancel_all_orders')
+    open_orders = _awaitable('open_orders')
+    all_orders = _awaitable('all_orders')
+    all_executed_orders = _awaitable('all_executed_orders')
+
+    async def iter_open_orders(self, symbol=None, page_size=DEFAULT_PAGE_SIZE, prefetch=False, **kwargs):
+        api = self.with_results()
+        async for record in apaginate(lambda page: api.open_orders(symbol, page_size, page, **kwargs),
+                                      self._FIRST_PAGE[self.version], page_size, prefetch):
+            yield record
+
+    async def iter_all_orders(self, symbol=None, page_size=DEFAULT_PAGE_SIZE, start=None, end=None, prefetch=False,
+                              **kwargs):
+        api = self.with_results()
+        async for record in apaginate(lambda page: api.all_orders(symbol, page_size, page, start, end, **kwargs),
+                                      self._FIRST_PAGE[self.version], page_size, prefetch):
+            yield record
+
+    async def iter_all_executed_orders(self, symbol=None, page_size=DEFAULT_PAGE_SIZE, start=None, end=None,
+                                       sort=None, prefetch=False, **kwargs):
+        api = self.with_results()
+        async for record in apaginate(
+                lambda page: api.all_executed_orders(symbol, page_size, page, start, end, sort, **kwargs),
+                self._FIRST_PAGE[self.version], page_size, prefetch):
+            yield record
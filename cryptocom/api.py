@@ -1,14 +1,33 @@
+import copy
+import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import hmac
 import requests
-from time import sleep, time
+from requests.adapters import HTTPAdapter
+from time import perf_counter
 from datetime import datetime
 from enum import Enum
 
+from .cache import ResponseCache, STALE, request_key
+from . import columnar, records
+from .candles import CandleBuilder
+from .metrics import Metrics
+from .paginate import DEFAULT_PAGE_SIZE, paginate
+from .ratelimit import RateLimiter, endpoint_group
+from .resilience import Resilience, exception_result, retry_safe
+from .result import ApiResult, skipped
+from .singleflight import SingleFlight
+
 logger = logging.getLogger('cryptocom_api')
 
-RATE_LIMIT_PER_SECOND = 10
+DEFAULT_POOL_SIZE = 10
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+# max number of orders in one create-order-list / cancel-order-list call
+BATCH_ORDER_LIMIT = 10
 # LIMIT_ORDER = 1
 # MARKET_ORDER = 2
 # STOP_LOSS = 3
@@ -21,6 +40,31 @@ def current_timestamp():
     return int(datetime.timestamp(datetime.now()) * 1000)
 
 
+# nesting level of V2 params below which values are signed as plain str()
+MAX_PARAM_LEVEL = 3
+
+
+def _encode_params(obj, parts, level=0):
+    # V2 signature encoding of params: sorted keys each followed by its value, None as 'null',
+    # and the dicts in lists (ex. order_list) encoded recursively
+    if level >= MAX_PARAM_LEVEL:
+        parts.append(str(obj))
+        return
+    for key in sorted(obj):
+        value = obj[key]
+        parts.append(key)
+        if value is None:
+            parts.append('null')
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    _encode_params(item, parts, level + 1)
+                else:
+                    parts.append(str(item))
+        else:
+            parts.append(str(value))
+
+
 class CryptoComApi:
     class ApiVersion(Enum):
         V1 = "v1"
@@ -37,8 +81,6 @@ class CryptoComApi:
     __secret = ""
     __public_only = True
 
-    __last_api_call = 0
-
     version = ApiVersion.V1
 
     response_code = {
@@ -58,9 +100,52 @@ class CryptoComApi:
 
     error = None
 
-    def __init__(self, key=None, secret=None, version=ApiVersion.V2):
+    def __init__(self, key=None, secret=None, version=ApiVersion.V2, session=None,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, api_root=None,
+                 rate_limiter=None, block_on_rate_limit=True, return_results=False, cache=None,
+                 coalesce=False, decode=None, candles=None, metrics=None, resilience=None, recorder=None):
+        """
+        @param session: (optional) requests.Session to use, it is not closed by close()
+        @param pool_size: max number of keep-alive connections kept open to the API host
+        @param timeout: (connect, read) timeout in seconds, or a single number for both
+        @param api_root: (optional) override of the API root url, ex. for a local mock server
+        @param rate_limiter: (optional) RateLimiter shared with other clients, by default each client has its own
+        @param block_on_rate_limit: wait for the rate limiter, if False calls over the limit are skipped \
+                                    returning {} with self.error set to {'rate_limited': group}
+        @param return_results: every call returns an immutable ApiResult and self.response / self.error \
+                               are not used, so the client can be shared between threads
+        @param cache: (optional) True or a ResponseCache, caches results of public market endpoints, \
+                      cached results are shared between callers and must not be modified
+        @param coalesce: True or a SingleFlight, identical public calls made while one is in flight \
+                         wait for it and share its result, which must not be modified
+        @param decode: (optional) 'records': responses are parsed with orjson if installed, and tickers, \
+                       trades, order books and orders are returned as the typed records of cryptocom.records
+                       'columnar': trades, klines and order books are returned as the numpy arrays of cryptocom.columnar
+        @param candles: (optional) True or a CandleBuilder, on ApiVersion.V2 klines() returns candles built \
+                        locally from the trades of every call
+        @param metrics: (optional) True or a Metrics, shared by any number of clients, records counts, latency, \
+                        bytes received, rate limiter wait and signing time of the requests sent
+        @param resilience: (optional) True or a Resilience, retries, deadlines, hedged public calls and \
+                           circuit breakers, create_order() is only retried with a client_oid
+        @param recorder: (optional) cryptocom.recorder.Recorder, appends the tickers, trades and order books \
+                         received to its binary logs for replay
+        """
         self.version = CryptoComApi.ApiVersion(version)
-        self.API_ROOT = self._API_VERSION_ROOT_PATH[self.version]
+        self.API_ROOT = api_root or self._API_VERSION_ROOT_PATH[self.version]
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.block_on_rate_limit = block_on_rate_limit
+        self.return_results = return_results
+        self.cache = ResponseCache() if cache is True else cache
+        self.single_flight = SingleFlight() if coalesce is True else coalesce or None
+        self.decoders, self._loads = self._decode_mode(decode)
+        self.candles = CandleBuilder() if candles is True else candles
+        self.metrics = Metrics() if metrics is True else metrics
+        self.resilience = Resilience() if resilience is True else resilience
+        self.recorder = recorder
+
+        self._own_session = session is None
+        self.session = session if session is not None else self._create_session(pool_size)
 
         logger.debug(f"API version {version} initialized, root path is: {self.API_ROOT}")
 
@@ -68,6 +153,53 @@ class CryptoComApi:
             self.__key = key
             self.__secret = secret
             self.__public_only = False
+        self.__hmac = hmac.new(bytes(str(self.__secret), 'utf-8'), digestmod=hashlib.sha256)
+
+    @staticmethod
+    def _decode_mode(decode):
+        """
+        @return: (decoders by payload kind, JSON loads function) of the decode mode
+        """
+        if decode is None:
+            return None, json.loads
+        if decode == 'records':
+            return records.DECODERS, records.loads
+        if decode == 'columnar':
+            if columnar.np is None:
+                raise ImportError("decode='columnar' requires numpy: pip install cryptocom[numpy]")
+            return columnar.DECODERS, records.loads
+        raise ValueError(f"Unknown decode mode: {decode}")
+
+    @staticmethod
+    def _create_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """
+        Closes pooled connections of the session owned by this client
+        """
+        if self._own_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def with_results(self):
+        """
+        @return: a copy of this client that returns ApiResult objects, sharing its session and rate limiter
+        """
+        client = copy.copy(self)
+        client.return_results = True
+        client.response = None
+        client.error = None
+        return client
 
     def get_code(self):
         return self.response and self.response[self.response_code[self.version]]
@@ -79,107 +211,268 @@ class CryptoComApi:
         return self.response and self.response[self.response_result[self.version]]
 
     def _sign(self, params, method=None, id=None, nonce=None):
-        to_sign = ""
-        for key in sorted(params.keys()):
-            to_sign += key + str(params[key])
-
         if self.version == CryptoComApi.ApiVersion.V1:
-            to_sign += str(self.__secret)
-            return hashlib.sha256(to_sign.encode()).hexdigest()
+            parts = []
+            for key in sorted(params):
+                parts.append(key)
+                parts.append(str(params[key]))
+            parts.append(str(self.__secret))
+            return hashlib.sha256("".join(parts).encode()).hexdigest()
         if self.version == CryptoComApi.ApiVersion.V2:
-            to_sign = method + \
-                      (str(id) if id else "") + \
-                      self.__key + \
-                      to_sign + \
-                      str(nonce)
-            return hmac.new(
-                bytes(str(self.__secret), 'utf-8'),
-                msg=bytes(to_sign, 'utf-8'),
-                digestmod=hashlib.sha256
-            ).hexdigest()
-
-    def _request(self, path, param=None, method='get'):
-        ms_from_last_api_call = current_timestamp() - self.__last_api_call
-        if ms_from_last_api_call < 1000/RATE_LIMIT_PER_SECOND:
-            delay_for_ms = 1000/RATE_LIMIT_PER_SECOND - min(1000/RATE_LIMIT_PER_SECOND, ms_from_last_api_call)
-            logger.debug(f"API call '{path}' rate limiter activated, delaying for {delay_for_ms}ms")
-            sleep(delay_for_ms / 1000)
-
-        self.__last_api_call = current_timestamp()
-
-        self.error = None
-
-        if method == 'post':
-            if self.version == CryptoComApi.ApiVersion.V1:
-                r = requests.post(self.API_ROOT + path, data=param)
-            else:
-                r = requests.post(self.API_ROOT + path, json=param, headers={"Content-Type": "application/json"})
-        elif method == 'delete':
+            parts = [method, str(id) if id else "", self.__key]
+            _encode_params(params, parts)
+            parts.append(str(nonce))
+            # copying the keyed prototype skips hashing the key on every call
+            mac = self.__hmac.copy()
+            mac.update("".join(parts).encode())
+            return mac.hexdigest()
+
+    def _prepare_request(self, path, param=None, method='get'):
+        """
+        @return: (method, url, kwargs) of the HTTP request, None for unsupported methods
+        """
+        if method in ('post', 'delete'):
             if self.version == CryptoComApi.ApiVersion.V1:
-                r = requests.delete(self.API_ROOT + path, data=param)
+                kwargs = {'data': param}
             else:
-                r = requests.delete(self.API_ROOT + path, json=param, headers={"Content-Type": "application/json"})
+                kwargs = {'json': param, 'headers': {"Content-Type": "application/json"}}
         elif method == 'get':
-            r = requests.get(self.API_ROOT + path, params=param)
+            kwargs = {'params': param}
         else:
-            return {}
+            return None
+        return method, self.API_ROOT + path, kwargs
 
-        try:
-            if r.elapsed:
-                logger.debug(f"{path}, elapsed: {r.elapsed}")
-        finally:
-            pass
+    def _parse_response(self, status_code, text, elapsed):
+        """
+        Builds the ApiResult of a response, does not touch any client state
+        """
+        if status_code != 200:
+            logger.warning(f"Response {status_code} NOK: {text}")
+            error = {'http_code': status_code}
+            try:
+                error.update(self._loads(text))
+            except:
+                pass
+            return ApiResult(None, None, None, status_code, elapsed, error, None)
 
         try:
-            if r.status_code != 200:
-                logger.warning(f"Response {r.status_code} NOK: {r.text}")
-                self.error = {'http_code': r.status_code}
-                try:
-                    self.error.update(r.json())
-                except:
-                    pass
-                return {}
-
-            self.response = r.json()
-
-            if int(self.get_code()) != 0:
+            response = self._loads(text)
+            code = response[self.response_code[self.version]]
+            message = response.get(self.response_message[self.version])
+
+            if int(code) != 0:
                 # error occurred
-                logger.warning(f'Error code: {self.get_code()}')
-                logger.warning(f'Error msg: {self.get_message()}')
-                self.error = self.response
-                return {}
-            return self.get_result()
+                logger.warning(f'Error code: {code}')
+                logger.warning(f'Error msg: {message}')
+                return ApiResult(None, code, message, status_code, elapsed, response, response)
+            return ApiResult(response[self.response_result[self.version]], code, message, status_code, elapsed,
+                             None, response)
         except Exception as e:
-            logger.error(f"{e}\r\nResponse text: {r.text}")
-            self.error = {'exception': r.text}
+            logger.error(f"{e}\r\nResponse text: {text}")
+            return ApiResult(None, None, None, status_code, elapsed, {'exception': text}, None)
+
+    def _finish(self, result):
+        """
+        Returns the ApiResult as is if return_results is set, otherwise stores it into
+        self.response / self.error and returns only the result part ({} on errors)
+        """
+        if self.return_results:
+            return result
+
+        if result.response is not None:
+            self.response = result.response
+        self.error = result.error
+        if result.error is not None:
             return {}
+        return result.result
+
+    def _skip(self, error):
+        """
+        Returns without sending the call, ex. private call of a public only client
+        """
+        if self.return_results:
+            return skipped(error)
+        return {}
+
+    def _rate_limited(self, path, method):
+        """
+        Takes a token for the endpoint group of the call without waiting for it
+
+        @return: skipped ApiResult if the call is over the limit, None otherwise
+        """
+        group = endpoint_group(path, method)
+        if self.rate_limiter.try_acquire(group):
+            return None
+        logger.warning(f"API call '{path}' skipped, '{group}' rate limit reached")
+        return skipped({'rate_limited': group})
+
+    def _call(self, path, param=None, method='get', timeout=None):
+        """
+        Sends one request through the rate limiter and returns its ApiResult, does not touch any client state
+
+        @param timeout: (optional) overrides the client's timeout
+        """
+        request = self._prepare_request(path, param, method)
+        if request is None:
+            return skipped({'unsupported_method': method})
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.before_request(path, method, param)
+
+        if self.block_on_rate_limit:
+            group = endpoint_group(path, method)
+            waited = self.rate_limiter.acquire(group)
+            if metrics is not None:
+                metrics.observe_wait(group, waited)
+        else:
+            result = self._rate_limited(path, method)
+            if result is not None:
+                return self._observe(path, method, result)
+
+        method, url, kwargs = request
+
+        start = perf_counter()
+        try:
+            r = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            text = r.text
+        except Exception as e:
+            self._observe(path, method, exception_result(e, perf_counter() - start))
+            raise
+        elapsed = perf_counter() - start
+        logger.debug(f"{path}, elapsed: {elapsed:.6f}s")
+
+        result = self._parse_response(r.status_code, text, elapsed)
+        if metrics is not None:
+            metrics.after_request(path, method, result, len(r.content))
+        return result
+
+    def _observe(self, path, method, result):
+        """
+        Records a request that got no response in the metrics, if any, and returns its result
+        """
+        if self.metrics is not None:
+            self.metrics.after_request(path, method, result)
+        return result
+
+    def _send(self, path, param=None, method='get', sign=None):
+        """
+        Sends the call through the resilience layer, if any
+
+        @param sign: (optional) returns the signed request of the params, called for every attempt
+        """
+        if self.resilience is None:
+            return self._call(path, sign(param) if sign else param, method)
+        return self.resilience.call(
+            endpoint_group(path, method),
+            lambda timeout: self._call(path, sign(param) if sign else param, method, timeout),
+            retry=method == 'get' or retry_safe(path, param), hedge=method == 'get')
+
+    def _fetch(self, path, param=None):
+        """
+        Public GET call, identical calls already in flight are coalesced if single_flight is set
+        """
+        if self.single_flight is None:
+            return self._send(path, param)
+        return self.single_flight.do(request_key(path, param), lambda: self._send(path, param))
+
+    def _cached_call(self, path, param=None):
+        key = self.cache.key(path, param)
+        result, state = self.cache.get(key)
+        if state == STALE and self.cache.start_refresh(key):
+            threading.Thread(target=self._refresh, args=(key, path, param), daemon=True).start()
+        if result is not None:
+            return result
+
+        result = self._fetch(path, param)
+        if result.ok:
+            self.cache.put(key, result)
+        return result
+
+    def _refresh(self, key, path, param):
+        try:
+            result = self._fetch(path, param)
+            if result.ok:
+                self.cache.put(key, result)
+        except Exception as e:
+            logger.warning(f"Cache refresh of '{path}' failed: {e!r}")
+        finally:
+            self.cache.end_refresh(key)
+
+    def _decode(self, result, decoder, param=None):
+        """
+        Converts the result with the decoder of this kind of payload, if the decode mode has one,
+        after handing it to the recorder
+        """
+        if self.recorder is not None and decoder is not None and result.ok and result.result:
+            try:
+                self.recorder.on_result(decoder, result.result, self.version, param)
+            except Exception as e:
+                logger.warning(f"Recording of '{decoder}' failed: {e!r}")
+        if decoder is None or self.decoders is None or not result.ok or not result.result:
+            return result
+        decode = self.decoders.get(decoder)
+        if decode is None:
+            return result
+        return result._replace(result=decode(result.result, self.version, param))
+
+    def _request(self, path, param=None, method='get', decoder=None, sign=None):
+        """
+        @param decoder: kind of the payload, ex. 'tickers', for the decoders of the decode mode
+        @param sign: (optional) signs private calls, see _send()
+        """
+        if method == 'get':
+            if self.cache is not None and self.cache.cacheable(path):
+                result = self._cached_call(path, param)
+            else:
+                result = self._fetch(path, param)
+        else:
+            result = self._send(path, param, method, sign)
+        return self._finish(self._decode(result, decoder, param))
 
-    def _post(self, path, params=None):
+    def _post(self, path, params=None, decoder=None):
         if self.__public_only:
-            return {}
+            return self._skip({'public_only': path})
         if params is None:
             params = {}
+        return self._request(path, params, method='post', decoder=decoder,
+                             sign=lambda params: self._signed_request(path, params))
 
+    def _signed_request(self, path, params):
+        """
+        @return: the request body of a private call, with a fresh timestamp / nonce and signature
+        """
+        start = perf_counter()
         if self.version == CryptoComApi.ApiVersion.V1:
-            params['api_key'] = self.__key
-            params['time'] = current_timestamp()
-            params['sign'] = self._sign(params)
+            request = dict(params)
+            request['api_key'] = self.__key
+            request['time'] = current_timestamp()
+            request['sign'] = self._sign(request)
 
         if self.version == CryptoComApi.ApiVersion.V2:
             # nonce = int(time() * 1000)
             id = 1
             nonce = current_timestamp()
             sig = self._sign(params, method=path, id=id, nonce=nonce)
-            param = {
+            request = {
                 'params': params,
                 'sig': sig,
                 'api_key': self.__key,
                 'method': path,
                 'nonce': nonce,
                 'id': id}
-            return self._request(path, param, method='post')
 
-        return self._request(path, params, method='post')
+        if self.metrics is not None:
+            self.metrics.observe_sign(perf_counter() - start)
+        return request
+
+    def stream_auth_request(self):
+        """
+        @return: the signed public/auth request of the V2 user WebSocket, see cryptocom.stream.UserStream
+        """
+        if self.version != CryptoComApi.ApiVersion.V2 or self.__public_only:
+            raise ValueError("The user stream requires ApiVersion.V2 and a key and secret")
+        return self._signed_request('public/auth', {})
 
     ### Market Group ###
     # List all available market symbols
@@ -192,11 +485,7 @@ class CryptoComApi:
 
     # Get tickers in all available markets
     def tickers(self, param=None, **kwargs):
-        path = {
-            CryptoComApi.ApiVersion.V1: "ticker",
-            CryptoComApi.ApiVersion.V2: "public/get-ticker",
-        }
-        return self._request(path[self.version], param=param)
+        return self._tickers(param, decoder='tickers')
 
     # Get ticker for a particular market
     def ticker(self, symbol, **kwargs):
@@ -204,13 +493,40 @@ class CryptoComApi:
             CryptoComApi.ApiVersion.V1: {'symbol': symbol},
             CryptoComApi.ApiVersion.V2: {'instrument_name': symbol},
         }
-        return self.tickers(param[self.version])
+        return self._tickers(param[self.version], decoder='ticker')
+
+    def _tickers(self, param, decoder):
+        path = {
+            CryptoComApi.ApiVersion.V1: "ticker",
+            CryptoComApi.ApiVersion.V2: "public/get-ticker",
+        }
+        return self._request(path[self.version], param=param, decoder=decoder)
 
     # Get k-line data over a specified period
     def klines(self, symbol, period, **kwargs):
         if self.version != CryptoComApi.ApiVersion.V1:
-            return {}
-        return self._request('klines', param={'symbol': symbol, 'period': period})
+            if self.candles is None:
+                return self._skip({'unsupported': 'klines'})
+            return self._local_klines(symbol, period)
+        return self._request('klines', param={'symbol': symbol, 'period': period}, decoder='klines')
+
+    def _local_klines(self, symbol, period):
+        return self._finish(self._add_candles(self._fetch('public/get-trades', {'instrument_name': symbol}),
+                                              symbol, period))
+
+    def _add_candles(self, result, symbol, period):
+        """
+        Feeds the trades result to the candle builder, returns it with the candles as the V2 candlestick result,
+        decoded like klines() of the decode mode
+        """
+        if not result.ok:
+            return result
+        self.candles.on_trades(result.result, symbol)
+        try:
+            klines = result._replace(result=self.candles.klines(symbol, period))
+        except ValueError:
+            return skipped({'unsupported': f'klines {period}'})
+        return self._decode(klines, 'klines', {'instrument_name': symbol, 'period': period})
 
     # Get last 200 trades in a specified market
     def trades(self, symbol, **kwargs):
@@ -222,12 +538,12 @@ class CryptoComApi:
             CryptoComApi.ApiVersion.V1: {'symbol': symbol},
             CryptoComApi.ApiVersion.V2: {'instrument_name': symbol},
         }
-        return self._request(path[self.version], param[self.version])
+        return self._request(path[self.version], param[self.version], decoder='trades')
 
     # Get latest execution price for all markets
     def prices(self, **kwargs):
         if self.version != CryptoComApi.ApiVersion.V1:
-            return {}
+            return self._skip({'unsupported': 'prices'})
         return self._request('ticker/price')
 
     # Get the order book for a particular market, type: step0, step1, step2 (step0 is the highest accuracy)
@@ -240,7 +556,7 @@ class CryptoComApi:
             CryptoComApi.ApiVersion.V1: {'symbol': symbol, 'type': _type},
             CryptoComApi.ApiVersion.V2: {'instrument_name': symbol, 'depth': _type},
         }
-        return self._request(path[self.version], param[self.version])
+        return self._request(path[self.version], param[self.version], decoder='book')
 
     #####################################
     # User Group #
@@ -304,6 +620,12 @@ class CryptoComApi:
             CryptoComApi.ApiVersion.V1: "order",
             CryptoComApi.ApiVersion.V2: "private/create-order",
         }
+        return self._post(path[self.version],
+                          params=self._order_params(symbol, side, _type, quantity, price, fee_coin, notional,
+                                                    client_oid, **kwargs))
+
+    def _order_params(self, symbol, side, _type, quantity=None, price=None, fee_coin=None, notional=None,
+                      client_oid=None, **kwargs):
         param = {
             CryptoComApi.ApiVersion.V1: {
                 'symbol': symbol, 'side': side,
@@ -347,7 +669,7 @@ class CryptoComApi:
             if 'time_in_force' in kwargs:
                 param[self.version]['time_in_force'] = kwargs['time_in_force']
 
-        return self._post(path[self.version], params=param[self.version])
+        return param[self.version]
 
     def create_limit_order(self, symbol, side, amount, price, fee_coin=None, client_oid=None, **kwargs):
         return self.create_order(symbol, side, 'LIMIT', amount, price, fee_coin=fee_coin, client_oid=client_oid, **kwargs)
@@ -355,6 +677,27 @@ class CryptoComApi:
     def create_market_order(self, symbol, side, total, fee_coin=None, client_oid=None, **kwargs):
         return self.create_order(symbol, side, 'MARKET', total, None, fee_coin=fee_coin, client_oid=client_oid, **kwargs)
 
+    def create_orders(self, orders, max_workers=BATCH_ORDER_LIMIT):
+        """
+        Creates a list of orders, on ApiVersion.V2 with private/create-order-list calls of up to
+        BATCH_ORDER_LIMIT orders, on ApiVersion.V1 with concurrent create_order() calls
+
+        @param orders: list of dicts of create_order() arguments, ex. \
+                       {'symbol': 'BTC_USDT', 'side': 'BUY', '_type': 'LIMIT', 'quantity': 0.01, 'price': 9000}
+        @param max_workers: max number of concurrent calls
+        @return: list of ApiResult, one per order in input order, \
+                 result is {"order_id": ..., "client_oid": ...} for created orders
+        """
+        api = self.with_results()
+        if self.version == CryptoComApi.ApiVersion.V1:
+            batches = [(lambda order=order: api.create_order(**order), 1) for order in orders]
+        else:
+            batches = [(lambda chunk=chunk: api._post("private/create-order-list", params={
+                'contingency_type': 'LIST',
+                'order_list': [self._order_params(**order) for order in chunk]}), len(chunk))
+                for chunk in self._chunks(orders)]
+        return self._run_batches(batches, max_workers)
+
     def show_order(self, symbol, order_id, **kwargs):
         """
         Get order detail
@@ -419,7 +762,7 @@ class CryptoComApi:
             CryptoComApi.ApiVersion.V1: {'symbol': symbol, 'order_id': order_id},
             CryptoComApi.ApiVersion.V2: {'order_id': order_id}
         }
-        return self._post(path[self.version], params=param[self.version])
+        return self._post(path[self.version], params=param[self.version], decoder='order')
 
     def cancel_order(self, symbol, order_id, **kwargs):
         """
@@ -439,6 +782,26 @@ class CryptoComApi:
         }
         return self._post(path[self.version], params=param[self.version])
 
+    def cancel_orders(self, orders, max_workers=BATCH_ORDER_LIMIT):
+        """
+        Cancels a list of orders, on ApiVersion.V2 with private/cancel-order-list calls of up to
+        BATCH_ORDER_LIMIT orders, on ApiVersion.V1 with concurrent cancel_order() calls
+
+        @param orders: list of dicts of cancel_order() arguments, ex. {'symbol': 'BTC_USDT', 'order_id': '1234'}
+        @param max_workers: max number of concurrent calls
+        @return: list of ApiResult, one per order in input order
+        """
+        api = self.with_results()
+        if self.version == CryptoComApi.ApiVersion.V1:
+            batches = [(lambda order=order: api.cancel_order(**order), 1) for order in orders]
+        else:
+            batches = [(lambda chunk=chunk: api._post("private/cancel-order-list", params={
+                'contingency_type': 'LIST',
+                'order_list': [{'instrument_name': order['symbol'], 'order_id': order['order_id']}
+                               for order in chunk]}), len(chunk))
+                for chunk in self._chunks(orders)]
+        return self._run_batches(batches, max_workers)
+
     def cancel_all_orders(self, symbol, **kwargs):
         """
         Cancel all orders in a particular market
@@ -456,6 +819,51 @@ class CryptoComApi:
         }
         return self._post(path[self.version], params=param[self.version])
 
+    @staticmethod
+    def _chunks(orders):
+        return [orders[i:i + BATCH_ORDER_LIMIT] for i in range(0, len(orders), BATCH_ORDER_LIMIT)]
+
+    def _run_batches(self, batches, max_workers):
+        """
+        @param batches: list of (call, number of orders), call returns the ApiResult of the batch
+        @return: ApiResult per order
+        """
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+            results = list(pool.map(self._run_batch, batches))
+        return self._split_batches(results, [size for _, size in batches])
+
+    @staticmethod
+    def _run_batch(batch):
+        # an exception fails the orders of its own call only, the other calls were sent and keep their results
+        call, _ = batch
+        try:
+            return call()
+        except Exception as e:
+            logger.warning(f"Batch of orders failed: {e!r}")
+            return exception_result(e)
+
+    @staticmethod
+    def _split_batches(results, sizes):
+        """
+        Splits list call results into one ApiResult per order, by the index of its result_list items
+        """
+        split = []
+        for result, size in zip(results, sizes):
+            if not result.ok or size == 1 and 'result_list' not in (result.result or {}):
+                split.extend([result] * size)
+                continue
+            items = {item.get('index'): item for item in result.result.get('result_list', [])}
+            for index in range(size):
+                item = items.get(index)
+                if item is None:
+                    split.append(result._replace(result=None, error={'missing_index': index}))
+                elif int(item.get('code', 0)) != 0:
+                    split.append(result._replace(result=None, code=item['code'], message=item.get('message'),
+                                                 error=item))
+                else:
+                    split.append(result._replace(result=item, code=0, message=item.get('message')))
+        return split
+
     def open_orders(self, symbol=None, page_size=None, page_number=None, **kwargs):
         """
         List all open orders in a particular market
@@ -479,7 +887,7 @@ class CryptoComApi:
             param[CryptoComApi.ApiVersion.V2]['page_size'] = page_size
         if page_number:
             param[self.version]['page'] = page_number
-        return self._post(path[self.version], params=param[self.version])
+        return self._post(path[self.version], params=param[self.version], decoder='orders')
 
     def all_orders(self, symbol=None, page_size=None, page_number=None, start=None, end=None, **kwargs):
         """
@@ -512,7 +920,7 @@ class CryptoComApi:
         if end:
             param[CryptoComApi.ApiVersion.V1]['endDate'] = end
             param[CryptoComApi.ApiVersion.V2]['end_ts'] = end
-        return self._post(path[self.version], params=param[self.version])
+        return self._post(path[self.version], params=param[self.version], decoder='orders')
 
     def all_executed_orders(self, symbol=None, page_size=None, page_number=None, start=None, end=None, sort=None, **kwargs):
         """
@@ -549,3 +957,45 @@ class CryptoComApi:
         if sort:
             param[CryptoComApi.ApiVersion.V1]['sort'] = sort
         return self._post(path[self.version], params=param[self.version])
+
+    #####################################
+    # Paginated history #
+    _FIRST_PAGE = {
+        ApiVersion.V1: 1,
+        ApiVersion.V2: 0,
+    }
+
+    def iter_open_orders(self, symbol=None, page_size=DEFAULT_PAGE_SIZE, prefetch=False, **kwargs):
+        """
+        Yields open orders one by one across all pages, see open_orders()
+
+        @param prefetch: fetch the next page in the background while the current one is consumed
+        @raise ApiError: if a page can not be fetched
+        """
+        api = self.with_results()
+        return paginate(lambda page: api.open_orders(symbol, page_size, page, **kwargs),
+                        self._FIRST_PAGE[self.version], page_size, prefetch)
+
+    def iter_all_orders(self, symbol=None, page_size=DEFAULT_PAGE_SIZE, start=None, end=None, prefetch=False,
+                        **kwargs):
+        """
+        Yields orders one by one across all pages, see all_orders()
+
+        @param prefetch: fetch the next page in the background while the current one is consumed
+        @raise ApiError: if a page can not be fetched
+        """
+        api = self.with_results()
+        return paginate(lambda page: api.all_orders(symbol, page_size, page, start, end, **kwargs),
+                        self._FIRST_PAGE[self.version], page_size, prefetch)
+
+    def iter_all_executed_orders(self, symbol=None, page_size=DEFAULT_PAGE_SIZE, start=None, end=None, sort=None,
+                                 prefetch=False, **kwargs):
+        """
+        Yields executed orders one by one across all pages, see all_executed_orders()
+
+        @param prefetch: fetch the next page in the background while the current one is consumed
+        @raise ApiError: if a page can not be fetched
+        """
+        api = self.with_results()
+        return paginate(lambda page: api.all_executed_orders(symbol, page_size, page, start, end, sort, **kwargs),
+                        self._FIRST_PAGE[self.version], page_size, prefetch)
@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .api import CryptoComApi, current_timestamp
+from .paginate import DEFAULT_PAGE_SIZE, page_records, paginate
+from .result import ApiError
+
+logger = logging.getLogger('cryptocom_api')
+
+HOUR = 3600 * 1000
+DAY = 24 * HOUR
+# history fetched when no start is given, the last 30 days before the end
+DEFAULT_WINDOW = 30 * DAY
+
+# id field of the records per history method
+ID_FIELDS = {
+    'all_executed_orders': 'trade_id',
+    'all_orders': 'order_id',
+}
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _subtract(start, end, done):
+    """
+    @return: parts of [start, end) not covered by the sorted, merged `done` ranges
+    """
+    remaining = []
+    for done_start, done_end in done:
+        if done_start > start:
+            remaining.append((start, min(done_start, end)))
+        start = max(start, done_end)
+        if start >= end:
+            break
+    if start < end:
+        remaining.append((start, end))
+    return remaining
+
+
+class Backfill:
+    """
+    Fetches the V2 trade (all_executed_orders) or order (all_orders) history of a time range
+    concurrently: the range is split into shards of at most `shard` ms fetched by a pool of
+    workers through the client's rate limiter. A shard that returns a full page is split in
+    two until `min_shard`, below that it is paged through. Records are passed to the sink in
+    batches per shard as shards complete, so not in time order.
+
+        with open('fills.jsonl', 'a') as f:
+            Backfill(api, 'all_executed_orders', start_ts, end_ts, sink=lambda records: f.writelines(
+                json.dumps(r) + '\\n' for r in records), checkpoint='fills.checkpoint').run()
+
+    With a checkpoint file, completed ranges are recorded after every shard and an interrupted
+    backfill started again with the same arguments only fetches what is missing.
+    """
+
+    def __init__(self, api, method='all_executed_orders', start=None, end=None, symbol=None, sink=None,
+                 checkpoint=None, shard=DAY, min_shard=60 * 1000, workers=4, page_size=DEFAULT_PAGE_SIZE,
+                 overlap=1000):
+        """
+        @param api: CryptoComApi using ApiVersion.V2
+        @param method: 'all_executed_orders' or 'all_orders'
+        @param start, end: time range in ms, end defaults to now and start to DEFAULT_WINDOW before the end
+        @param sink: called with the list of new records of every completed shard
+        @param checkpoint: (optional) path of the checkpoint file
+        @param shard: max shard width in ms, the exchange allows at most one day
+        @param overlap: records within this many ms of a shard edge are deduplicated by id
+        """
+        if api.version != CryptoComApi.ApiVersion.V2:
+            raise ValueError("Backfill requires ApiVersion.V2, V1 history is not filtered by timestamps")
+        if method not in ID_FIELDS:
+            raise ValueError(f"Unsupported history method: {method}")
+
+        self.api = api.with_results()
+        # records are deduplicated by their payload fields
+        self.api.decoders = None
+        self.method = method
+        self.id_field = ID_FIELDS[method]
+        self.end = end if end is not None else current_timestamp()
+        self.start = start if start is not None else self.end - DEFAULT_WINDOW
+        self.symbol = symbol
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.shard = min(shard, DAY)
+        self.min_shard = min_shard
+        self.workers = workers
+        self.page_size = page_size
+        self.overlap = overlap
+
+        self.done = []
+        self._edge_ids = set()
+
+        self.records = 0
+        self.duplicates = 0
+        self.shards = 0
+        self.splits = 0
+
+    def _load_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if (state['method'], state['symbol']) != (self.method, self.symbol):
+            raise ValueError(f"Checkpoint {self.checkpoint} is of a different backfill: {state['method']} "
+                             f"{state['symbol']}")
+        self.done = _merge(state['done'])
+        self._edge_ids = set(state.get('edge_ids', []))
+
+    def _save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        state = {'method': self.method, 'symbol': self.symbol, 'done': self.done, 'edge_ids': sorted(self._edge_ids)}
+        tmp = self.checkpoint + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    def shards_to_fetch(self):
+        remaining = _subtract(self.start, self.end, self.done)
+        return [(s, min(s + self.shard, e)) for r_start, e in remaining for s in range(r_start, e, self.shard)]
+
+    def _query(self, start, end, page_size=None, page_number=None):
+        # end_ts is inclusive, shards are [start, end)
+        fetch = getattr(self.api, self.method)
+        return fetch(self.symbol, page_size or self.page_size, page_number, start, end - 1)
+
+    def _fetch(self, start, end):
+        """
+        @return: (records, None) or (None, [sub shards]) when the shard has to be split
+        """
+        result = self._query(start, end)
+        if not result.ok:
+            raise ApiError(result)
+        records = page_records(result.result)
+        if len(records) < self.page_size:
+            return records, None
+        if end - start > self.min_shard:
+            middle = start + (end - start) // 2
+            return None, [(start, middle), (middle, end)]
+        # the smallest shard still has more than one page
+        return list(paginate(lambda page: self._query(start, end, page_number=page), 0, self.page_size)), None
+
+    def _dedupe(self, start, end, records):
+        new = []
+        for record in records:
+            id = record.get(self.id_field)
+            ts = record.get('create_time')
+            if ts is None or ts - start < self.overlap or end - ts <= self.overlap:
+                if id in self._edge_ids:
+                    self.duplicates += 1
+                    continue
+                self._edge_ids.add(id)
+            new.append(record)
+        return new
+
+    def run(self):
+        """
+        Fetches all missing shards, returns the number of records passed to the sink
+        """
+        self._load_checkpoint()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self._fetch, s, e): (s, e) for s, e in self.shards_to_fetch()}
+            while pending:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                error = None
+                for future in completed:
+                    start, end = pending.pop(future)
+                    try:
+                        records, split = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    if split:
+                        self.splits += 1
+                        logger.debug(f"Backfill {self.method} shard {start}-{end} full, splitting")
+                        pending.update({pool.submit(self._fetch, s, e): (s, e) for s, e in split})
+                        continue
+
+                    records = self._dedupe(start, end, records)
+                    if records and self.sink is not None:
+                        self.sink(records)
+                    self.records += len(records)
+                    self.shards += 1
+                    self.done = _merge(self.done + [[start, end]])
+                    self._save_checkpoint()
+
+                if error is not None:
+                    # completed shards are checkpointed, the rest is fetched when the backfill is run again
+                    for future in pending:
+                        future.cancel()
+                    raise error
+        return self.records
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+# seconds a response stays fresh, per endpoint path of both API versions
+DEFAULT_TTLS = {
+    # ApiVersion.V1
+    'symbols': 3600,
+    'ticker': 0.5,
+    'ticker/price': 0.5,
+    'trades': 0.5,
+    'depth': 0.25,
+    'klines': 5,
+    # ApiVersion.V2
+    'public/get-instruments': 3600,
+    'public/get-ticker': 0.5,
+    'public/get-trades': 0.5,
+    'public/get-book': 0.25,
+}
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+def request_key(path, param=None):
+    return path, tuple(sorted(param.items())) if param else ()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of public GET results with a TTL per endpoint path.
+    After the TTL an entry is still served for `stale_ttl` seconds while it is refreshed
+    in the background (stale-while-revalidate), then it is only fetched again on demand.
+    Paths without a TTL are never cached.
+    """
+
+    def __init__(self, ttls=None, max_entries=1024, stale_ttl=1.0):
+        """
+        @param ttls: {path: seconds}, updates DEFAULT_TTLS, a TTL of 0 or None disables caching of the path
+        @param max_entries: least recently used entries are evicted above this size
+        @param stale_ttl: seconds an expired entry can still be served while it is refreshed
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    key = staticmethod(request_key)
+
+    def cacheable(self, path):
+        return bool(self.ttls.get(path))
+
+    def get(self, key):
+        """
+        @return: (result, FRESH or STALE), or (None, None) on a miss
+        """
+        ttl = self.ttls.get(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, stored = entry
+                age = monotonic() - stored
+                if age < ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result, FRESH
+                if age < ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    return result, STALE
+                del self._entries[key]
+            self.misses += 1
+            return None, None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (result, monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def start_refresh(self, key):
+        """
+        @return: True if the caller should refresh the entry, False if it is already being refreshed
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'refreshes': self.refreshes,
+        }
@@ -0,0 +1,249 @@
+import logging
+from array import array
+
+logger = logging.getLogger('cryptocom_api')
+
+MINUTE = 60 * 1000
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# candle periods in ms, by the V2 public/get-candlestick timeframe name
+PERIODS = {
+    '1m': MINUTE, '5m': 5 * MINUTE, '15m': 15 * MINUTE, '30m': 30 * MINUTE,
+    '1h': HOUR, '4h': 4 * HOUR, '6h': 6 * HOUR, '12h': 12 * HOUR,
+    '1D': DAY, '7D': 7 * DAY, '14D': 14 * DAY,
+}
+
+
+def period_ms(period):
+    """
+    @param period: timeframe name, ex. '5m', or minutes like the V1 klines() `period`
+    """
+    if isinstance(period, int):
+        return period * MINUTE
+    if period in PERIODS:
+        return PERIODS[period]
+    if isinstance(period, str) and period.isdigit():
+        return int(period) * MINUTE
+    raise ValueError(f"Unknown candle period: {period}")
+
+
+class CandleSeries:
+    """
+    Closed candles of one instrument and period in a ring buffer of at most `history` candles,
+    plus the open candle. Candles are stored flat in arrays, 48 bytes per closed candle, and
+    adding a trade is O(1). Intervals without trades have no candle.
+    """
+    __slots__ = ('period', 'history', '_times', '_values', '_next',
+                 'open_time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, period, history):
+        self.period = period
+        self.history = history
+        self._times = array('q')
+        self._values = array('d')
+        # index of the oldest candle, once the ring is full
+        self._next = 0
+        self.open_time = None
+        self.open = self.high = self.low = self.close = self.volume = None
+
+    def __len__(self):
+        return len(self._times) + (self.open_time is not None)
+
+    def _push(self, candle):
+        if len(self._times) < self.history:
+            self._times.append(candle[0])
+            self._values.extend(candle[1:])
+            return
+        i = self._next
+        self._times[i] = candle[0]
+        self._values[i * 5:i * 5 + 5] = array('d', candle[1:])
+        self._next = (i + 1) % self.history
+
+    def add(self, timestamp, price, quantity):
+        start = timestamp - timestamp % self.period
+        if start == self.open_time:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += quantity
+            return
+        if self.open_time is not None:
+            if start < self.open_time:
+                # older than the open candle, the builder only feeds trades in time order
+                return
+            self._push(self.candle())
+        self.open_time = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = quantity
+
+    def candle(self):
+        """
+        @return: the open candle (start time, open, high, low, close, volume), None before the first trade
+        """
+        if self.open_time is None:
+            return None
+        return self.open_time, self.open, self.high, self.low, self.close, self.volume
+
+    def candles(self, include_open=True):
+        """
+        @return: list of (start time, open, high, low, close, volume), oldest first
+        """
+        count = len(self._times)
+        order = [(self._next + i) % count for i in range(count)] if count else []
+        values = self._values
+        candles = [(self._times[i],) + tuple(values[i * 5:i * 5 + 5]) for i in order]
+        if include_open and self.open_time is not None:
+            candles.append(self.candle())
+        return candles
+
+
+def _aggregate(candles, period):
+    merged = []
+    for time, open_, high, low, close, volume in candles:
+        start = time - time % period
+        if merged and merged[-1][0] == start:
+            last = merged[-1]
+            merged[-1] = (start, last[1], max(last[2], high), min(last[3], low), close, last[5] + volume)
+        else:
+            merged.append((start, open_, high, low, close, volume))
+    return merged
+
+
+class _Instrument:
+    __slots__ = ('series', 'last_time', 'last_ids')
+
+    def __init__(self, series):
+        self.series = series
+        # newest trade time seen and the ids of the trades at that time, for deduplication
+        self.last_time = None
+        self.last_ids = set()
+
+
+class CandleBuilder:
+    """
+    OHLCV candles built locally from trades, ex. for klines on ApiVersion.V2, which has no
+    klines endpoint. Trades come from trades() polls (on_trades / poll) or from the MarketStream
+    'trade' channel (on_stream_message). Overlapping trades() responses are deduplicated: per
+    instrument only the newest trade time and the ids seen at that time are kept, so trades must
+    be fed in time order, which both sources do and on_trades ensures per response.
+
+        builder = CandleBuilder(api, periods=('1m', '1h'))
+        while True:
+            builder.poll('BTC_USDT')
+            candles = builder.candles('BTC_USDT', '1m')
+    """
+
+    def __init__(self, api=None, periods=('1m',), history=500):
+        """
+        @param api: (optional) CryptoComApi used by poll()
+        @param periods: timeframes built from the trades, candles of other periods are aggregated from these
+        @param history: closed candles kept per instrument and period
+        """
+        self.api = api
+        self.periods = {period_ms(period): period for period in periods}
+        self.history = history
+        self.instruments = {}
+        self.trades = 0
+        self.duplicates = 0
+
+    def __contains__(self, instrument_name):
+        return instrument_name in self.instruments
+
+    def _instrument(self, instrument_name):
+        instrument = self.instruments.get(instrument_name)
+        if instrument is None:
+            instrument = self.instruments[instrument_name] = _Instrument(
+                [CandleSeries(period, self.history) for period in self.periods])
+        return instrument
+
+    def add_trade(self, instrument_name, trade_id, timestamp, price, quantity):
+        """
+        @return: False if the trade is a duplicate or older than the newest trade of the instrument
+        """
+        instrument = self._instrument(instrument_name)
+        if instrument.last_time is not None and timestamp <= instrument.last_time:
+            if timestamp < instrument.last_time or trade_id in instrument.last_ids:
+                self.duplicates += 1
+                return False
+        else:
+            instrument.last_time = timestamp
+            instrument.last_ids.clear()
+        instrument.last_ids.add(trade_id)
+
+        price, quantity = float(price), float(quantity)
+        for series in instrument.series:
+            series.add(timestamp, price, quantity)
+        self.trades += 1
+        return True
+
+    def on_trades(self, result, instrument_name=None):
+        """
+        Adds the trades of a V2 trades() result: the response dict or a list of cryptocom.records.Trade
+
+        @return: number of new trades
+        """
+        if isinstance(result, dict):
+            instrument_name = result.get('instrument_name') or instrument_name
+            rows = [(row.get('i') or instrument_name, str(row['d']), row['t'], row['p'], row['q'])
+                    for row in result.get('data') or []]
+        else:
+            rows = [(trade.instrument_name or instrument_name, trade.trade_id, trade.timestamp, trade.price,
+                     trade.quantity) for trade in result or []]
+        # responses are newest first
+        rows.sort(key=lambda row: (row[2], row[1]))
+        return sum(self.add_trade(*row) for row in rows)
+
+    def on_stream_message(self, message):
+        """
+        MarketStream callback for the 'trade' channel
+        """
+        self.on_trades({'instrument_name': message.instrument_name, 'data': message.data})
+
+    def poll(self, instrument_name):
+        """
+        Adds the new trades of a trades() call of the api client
+
+        @return: number of new trades, None if the call failed
+        """
+        result = self.api.trades(instrument_name)
+        if hasattr(result, 'ok'):
+            # client in return_results mode
+            result = result.result if result.ok else None
+        if not result:
+            logger.warning(f"{instrument_name} trades not available")
+            return None
+        return self.on_trades(result, instrument_name)
+
+    def candles(self, instrument_name, period='1m', include_open=True):
+        """
+        @param period: timeframe name or minutes, a multiple of one of the built periods
+        @return: list of (start time, open, high, low, close, volume), oldest first
+        """
+        ms = period_ms(period)
+        instrument = self.instruments.get(instrument_name)
+        if instrument is None:
+            if not any(ms % built == 0 for built in self.periods):
+                raise ValueError(f"Candle period {period} is not a multiple of the built periods")
+            return []
+        base = max((series for series in instrument.series if ms % series.period == 0),
+                   key=lambda series: series.period, default=None)
+        if base is None:
+            raise ValueError(f"Candle period {period} is not a multiple of the built periods")
+        candles = base.candles(include_open)
+        if base.period == ms:
+            return candles
+        return _aggregate(candles, ms)
+
+    def klines(self, instrument_name, period='1m'):
+        """
+        @return: the candles as a V2 public/get-candlestick result
+        """
+        return {
+            'instrument_name': instrument_name,
+            'interval': period,
+            'data': [{'t': t, 'o': o, 'h': h, 'l': l, 'c': c, 'v': v}
+                     for t, o, h, l, c, v in self.candles(instrument_name, period)],
+        }
@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# structured dtypes of CryptoComApi(decode='columnar'), timestamps in ms
+# side of a trade: 1 buy, -1 sell (the taker side)
+TRADE_DTYPE = [('timestamp', 'i8'), ('price', 'f8'), ('quantity', 'f8'), ('side', 'i1')]
+KLINE_DTYPE = [('timestamp', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'), ('volume', 'f8')]
+LEVEL_DTYPE = [('price', 'f8'), ('quantity', 'f8')]
+DEPTH_DTYPE = [('price', 'f8'), ('quantity', 'f8'), ('notional', 'f8')]
+
+# bids and asks are LEVEL_DTYPE arrays from the best level on
+ColumnarBook = namedtuple('ColumnarBook', 'instrument_name bids asks timestamp')
+
+# side values of a buy trade, V1 / V2
+BUY = frozenset(('buy', 'BUY'))
+# payload field of timestamp, price, quantity and side of a trade, per API version
+TRADE_FIELDS = {
+    'v1': ('ctime', 'price', 'amount', 'type'),
+    'v2': ('t', 'p', 'q', 's'),
+}
+
+
+def _symbol(param):
+    return param and (param.get('instrument_name') or param.get('symbol'))
+
+
+def _column(rows, field, dtype):
+    return np.array([row[field] for row in rows], dtype=dtype)
+
+
+def decode_trades(result, version, param=None):
+    """
+    trades() -> TRADE_DTYPE array, in the order of the response
+    """
+    rows = result if isinstance(result, list) else result.get('data') or []
+    ts, price, quantity, side = TRADE_FIELDS[version.value]
+    trades = np.empty(len(rows), dtype=TRADE_DTYPE)
+    if rows:
+        trades['timestamp'] = _column(rows, ts, 'i8')
+        trades['price'] = _column(rows, price, 'f8')
+        trades['quantity'] = _column(rows, quantity, 'f8')
+        trades['side'] = [1 if row[side] in BUY else -1 for row in rows]
+    return trades
+
+
+def decode_klines(result, version, param=None):
+    """
+    klines() -> KLINE_DTYPE array, rows of the V1 response are [time in s, open, high, low, close, volume],
+    the V2 klines built by candles=True are candlestick dicts with the time in ms
+    """
+    if isinstance(result, dict):
+        return np.array([(row['t'], row['o'], row['h'], row['l'], row['c'], row['v'])
+                         for row in result.get('data') or []], dtype=KLINE_DTYPE)
+    klines = np.array([tuple(row[:6]) for row in result or []], dtype=KLINE_DTYPE)
+    klines['timestamp'] *= 1000
+    return klines
+
+
+def _levels(levels):
+    return np.array([(level[0], level[1]) for level in levels or []], dtype=LEVEL_DTYPE)
+
+
+def decode_book(result, version, param=None):
+    """
+    order_book() -> ColumnarBook
+    """
+    if version.value == 'v1':
+        book = result.get('tick') or {}
+        return ColumnarBook(_symbol(param), _levels(book.get('bids')), _levels(book.get('asks')), book.get('time'))
+    book = (result.get('data') or [{}])[0]
+    return ColumnarBook(result.get('instrument_name') or _symbol(param), _levels(book.get('bids')),
+                        _levels(book.get('asks')), book.get('t'))
+
+
+DECODERS = {
+    'trades': decode_trades,
+    'klines': decode_klines,
+    'book': decode_book,
+}
+
+
+def vwap(trades):
+    """
+    @param trades: TRADE_DTYPE or LEVEL_DTYPE array
+    @return: volume weighted average price, nan without volume
+    """
+    volume = trades['quantity'].sum()
+    if not volume:
+        return float('nan')
+    return float(np.dot(trades['price'], trades['quantity']) / volume)
+
+
+def resample(data, interval):
+    """
+    OHLCV bars of `interval` ms from trades, or coarser bars from klines. Only intervals with data
+    are returned, the timestamp of a bar is the start of its interval.
+
+    @param data: TRADE_DTYPE or KLINE_DTYPE array
+    @return: KLINE_DTYPE array sorted by timestamp
+    """
+    data = data[np.argsort(data['timestamp'], kind='stable')]
+    if 'open' in data.dtype.names:
+        open_, high, low, close, volume = data['open'], data['high'], data['low'], data['close'], data['volume']
+    else:
+        open_ = high = low = close = data['price']
+        volume = data['quantity']
+
+    if not len(data):
+        return np.empty(0, dtype=KLINE_DTYPE)
+    buckets = data['timestamp'] // interval * interval
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(data)] - 1
+
+    bars = np.empty(len(starts), dtype=KLINE_DTYPE)
+    bars['timestamp'] = buckets[starts]
+    bars['open'] = open_[starts]
+    bars['high'] = np.maximum.reduceat(high, starts)
+    bars['low'] = np.minimum.reduceat(low, starts)
+    bars['close'] = close[ends]
+    bars['volume'] = np.add.reduceat(volume, starts)
+    return bars
+
+
+def cumulative_depth(levels):
+    """
+    @param levels: LEVEL_DTYPE array of one side of a book, from the best level on
+    @return: DEPTH_DTYPE array, the quantity and notional available up to and including every price
+    """
+    depth = np.empty(len(levels), dtype=DEPTH_DTYPE)
+    depth['price'] = levels['price']
+    depth['quantity'] = np.cumsum(levels['quantity'])
+    depth['notional'] = np.cumsum(levels['price'] * levels['quantity'])
+    return depth
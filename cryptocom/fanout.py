@@ -0,0 +1,199 @@
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import monotonic
+
+from .api import current_timestamp
+from .ratelimit import PUBLIC
+from .resilience import exception_result
+
+logger = logging.getLogger('cryptocom_api')
+
+DEFAULT_ENDPOINTS = ('order_book', 'trades')
+
+# result: the payload, None if the call failed with error
+# latency: seconds from the call being started, rate limiter wait included, to its result
+# completed: seconds from the start of the snapshot to the result
+SnapshotItem = namedtuple('SnapshotItem', 'instrument_name endpoint result error latency completed')
+
+# items: {instrument_name: {endpoint: SnapshotItem}}, started: timestamp in ms, elapsed: seconds
+Snapshot = namedtuple('Snapshot', 'items started elapsed errors')
+
+
+def instrument_names(symbols):
+    """
+    @return: the instrument names of a symbols() result, V1 or V2
+    """
+    if isinstance(symbols, dict):
+        return [i['instrument_name'] for i in symbols.get('instruments') or []]
+    return [s['symbol'] for s in symbols or []]
+
+
+class Fanout:
+    """
+    Fetches public endpoints of many instruments concurrently, as fast as the client's rate
+    limiter allows, which is shared with every other user of the limiter:
+
+        fanout = Fanout(api, ('order_book', 'trades'))
+        for item in fanout.iter():
+            ...
+        snapshot = fanout.snapshot()
+        snapshot.items['BTC_USDT']['order_book'].result
+
+    Items are yielded as they complete, a failed call is an item with its error, it does not
+    stop the others. run() repeats snapshots at a target cadence and reports the rounds that
+    took longer than the interval.
+    """
+
+    def __init__(self, api, endpoints=DEFAULT_ENDPOINTS, instruments=None, workers=8):
+        """
+        @param api: CryptoComApi, calls are made through a with_results() copy that blocks on the rate limiter
+        @param endpoints: public method names called with the instrument name, ex. 'order_book', or a dict \
+                          {method name: dict of extra arguments}, ex. {'klines': {'period': '1m'}}
+        @param instruments: (optional) instrument names, by default all of symbols(), fetched once
+        @param workers: max concurrent calls
+        """
+        self.api = api.with_results()
+        self.api.block_on_rate_limit = True
+        self.endpoints = endpoints if isinstance(endpoints, dict) else {name: {} for name in endpoints}
+        for name in self.endpoints:
+            if not callable(getattr(self.api, name, None)):
+                raise ValueError(f"Unknown endpoint: {name}")
+        self._instruments = list(instruments) if instruments is not None else None
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._stop = threading.Event()
+
+        self.rounds = 0
+        self.overruns = 0
+        self.last_elapsed = None
+
+    @property
+    def instruments(self):
+        if self._instruments is None:
+            result = self.api.symbols()
+            if not result.ok:
+                raise ValueError(f"symbols() failed: {result.error}")
+            self._instruments = instrument_names(result.result)
+        return self._instruments
+
+    def close(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def min_interval(self, instruments=None):
+        """
+        @return: seconds the rate limiter needs for the calls of one snapshot, 0.0 without a public limit
+        """
+        bucket = self.api.rate_limiter.buckets.get(PUBLIC)
+        if bucket is None:
+            return 0.0
+        calls = len(instruments if instruments is not None else self.instruments) * len(self.endpoints)
+        return max(0.0, calls - bucket.capacity) / bucket.rate
+
+    def _call(self, instrument_name, endpoint, started):
+        start = monotonic()
+        try:
+            result = getattr(self.api, endpoint)(instrument_name, **self.endpoints[endpoint])
+        except Exception as e:
+            result = exception_result(e)
+        end = monotonic()
+        return SnapshotItem(instrument_name, endpoint, result.result, result.error, end - start, end - started)
+
+    def iter(self, instruments=None):
+        """
+        Yields a SnapshotItem per instrument and endpoint, in completion order
+        """
+        instruments = instruments if instruments is not None else self.instruments
+        started = monotonic()
+        futures = [self._pool.submit(self._call, instrument_name, endpoint, started)
+                   for instrument_name in instruments for endpoint in self.endpoints]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # the consumer stopped early
+            for future in futures:
+                future.cancel()
+
+    def snapshot(self, instruments=None, callback=None):
+        """
+        @param callback: (optional) called with every SnapshotItem as it completes
+        @return: Snapshot of all items
+        """
+        started, start = current_timestamp(), monotonic()
+        items = {}
+        errors = 0
+        for item in self.iter(instruments):
+            items.setdefault(item.instrument_name, {})[item.endpoint] = item
+            if item.error is not None:
+                errors += 1
+            if callback is not None:
+                callback(item)
+        return Snapshot(items, started, monotonic() - start, errors)
+
+    def run(self, interval, on_snapshot, instruments=None, rounds=None, on_overrun=None):
+        """
+        Takes a snapshot every `interval` seconds until stop() or `rounds` snapshots. A round that takes
+        longer than the interval is an overrun: it is logged and passed to on_overrun, and the next
+        round starts right away.
+
+        @param on_snapshot: called with every Snapshot
+        @param on_overrun: (optional) called with the Snapshot that overran
+        @return: number of overruns of this run
+        """
+        instruments = instruments if instruments is not None else self.instruments
+        needed = self.min_interval(instruments)
+        if needed > interval:
+            logger.warning(f"Fanout of {len(instruments)} instruments needs at least {needed:.2f}s per round "
+                           f"with the rate limit, more than the interval of {interval:.2f}s")
+        self._stop.clear()
+        overruns = self.overruns
+        next_start = monotonic()
+        done = 0
+        while not self._stop.is_set() and (rounds is None or done < rounds):
+            snapshot = self.snapshot(instruments)
+            done += 1
+            self.rounds += 1
+            self.last_elapsed = snapshot.elapsed
+            on_snapshot(snapshot)
+            next_start += interval
+            now = monotonic()
+            if now > next_start:
+                self.overruns += 1
+                logger.warning(f"Fanout round {self.rounds} took {snapshot.elapsed:.2f}s, over the interval "
+                               f"of {interval:.2f}s")
+                if on_overrun is not None:
+                    on_overrun(snapshot)
+                next_start = now
+            elif rounds is None or done < rounds:
+                self._stop.wait(next_start - now)
+        return self.overruns - overruns
+
+    def start(self, interval, on_snapshot, **kwargs):
+        """
+        run() in a daemon thread, stopped by stop()
+        """
+        thread = threading.Thread(target=self.run, args=(interval, on_snapshot), kwargs=kwargs, daemon=True,
+                                  name='cryptocom-fanout')
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            'instruments': len(self._instruments) if self._instruments is not None else None,
+            'endpoints': list(self.endpoints),
+            'rounds': self.rounds,
+            'overruns': self.overruns,
+            'last_elapsed': self.last_elapsed,
+        }
@@ -0,0 +1,239 @@
+import logging
+import threading
+from bisect import bisect_left
+
+logger = logging.getLogger('cryptocom_api')
+
+# upper bounds in seconds of the latency and rate limiter wait histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# upper bounds in seconds of the signing time histogram
+SIGN_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001)
+
+OK = 'ok'
+EXCEPTION = 'exception'
+
+
+def outcome(result):
+    """
+    @return: outcome label of an ApiResult: 'ok', 'http_<status>', 'api_<code>', 'exception' or 'skipped_<reason>'
+    """
+    if result.error is None:
+        return OK
+    if result.http_status is None:
+        if EXCEPTION in result.error:
+            return EXCEPTION
+        return 'skipped_' + next(iter(result.error), '')
+    if result.http_status != 200:
+        return f'http_{result.http_status}'
+    if result.code is not None:
+        return f'api_{result.code}'
+    # response that could not be parsed
+    return EXCEPTION
+
+
+class Histogram:
+    """
+    Counts of observed values per bucket, `buckets` are the sorted upper bounds, values above
+    the last one are counted in an implicit +Inf bucket
+    """
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """
+        @return: [(upper bound, count of values <= bound)], the last bound is float('inf')
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """
+        Estimates the q-quantile by linear interpolation within its bucket, None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    # +Inf bucket, the last finite bound is the best estimate
+                    return self.buckets[-1] if self.buckets else self.sum / self.count
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+            lower = self.buckets[i] if i < len(self.buckets) else lower
+        return lower
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{str(value)}"' for name, value in labels.items())
+
+
+class Metrics:
+    """
+    Request metrics of one or more clients, per endpoint path, HTTP method and outcome:
+    request counts, latency, bytes received, rate limiter wait per endpoint group and
+    signing time. Thread-safe, one instance can be shared like a RateLimiter:
+
+        metrics = Metrics()
+        api = CryptoComApi(key, secret, metrics=metrics)
+        ...
+        print(metrics.prometheus())
+
+    Hooks run around every request sent: before(path, method, params) ahead of the rate
+    limiter and after(path, method, result, elapsed) with its ApiResult, also for requests
+    skipped by the rate limiter or failed with an exception, which is then raised.
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, sign_buckets=SIGN_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.bytes_received = {}
+        self.rate_limit_wait = {}
+        self.signing = Histogram(sign_buckets)
+        self.before_hooks = []
+        self.after_hooks = []
+
+    def add_hook(self, before=None, after=None):
+        if before is not None:
+            self.before_hooks.append(before)
+        if after is not None:
+            self.after_hooks.append(after)
+
+    def _histogram(self, histograms, key):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.latency_buckets)
+        return histogram
+
+    def before_request(self, path, method, params):
+        for hook in self.before_hooks:
+            try:
+                hook(path, method, params)
+            except Exception as e:
+                logger.warning(f"Metrics before hook {hook!r} failed: {e!r}")
+
+    def after_request(self, path, method, result, size=0):
+        """
+        @param result: ApiResult of the request
+        @param size: bytes received
+        """
+        key = (path, method)
+        with self._lock:
+            counts = self.requests.setdefault(key, {})
+            label = outcome(result)
+            counts[label] = counts.get(label, 0) + 1
+            if result.http_status is not None:
+                self._histogram(self.latency, key).observe(result.elapsed)
+                self.bytes_received[path] = self.bytes_received.get(path, 0) + size
+        for hook in self.after_hooks:
+            try:
+                hook(path, method, result, result.elapsed)
+            except Exception as e:
+                logger.warning(f"Metrics after hook {hook!r} failed: {e!r}")
+
+    def observe_wait(self, group, seconds):
+        with self._lock:
+            self._histogram(self.rate_limit_wait, group).observe(seconds)
+
+    def observe_sign(self, seconds):
+        with self._lock:
+            self.signing.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.latency = {}
+            self.bytes_received = {}
+            self.rate_limit_wait = {}
+            self.signing = Histogram(self.signing.buckets)
+
+    def snapshot(self):
+        """
+        @return: dict of all metrics, requests and latency are keyed by path, then by method
+        """
+        with self._lock:
+            requests, latency = {}, {}
+            for (path, method), counts in self.requests.items():
+                requests.setdefault(path, {})[method] = dict(counts)
+            for (path, method), histogram in self.latency.items():
+                latency.setdefault(path, {})[method] = histogram.snapshot()
+            return {
+                'requests': requests,
+                'latency': latency,
+                'bytes_received': dict(self.bytes_received),
+                'rate_limit_wait': {group: h.snapshot() for group, h in self.rate_limit_wait.items()},
+                'signing': self.signing.snapshot(),
+            }
+
+    @staticmethod
+    def _histogram_lines(name, histogram, **labels):
+        lines = []
+        for bound, count in histogram.cumulative():
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{_labels(**labels, le=le)}}} {count}')
+        suffix = f'{{{_labels(**labels)}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {histogram.sum!r}')
+        lines.append(f'{name}_count{suffix} {histogram.count}')
+        return lines
+
+    def prometheus(self, prefix='cryptocom'):
+        """
+        @return: the metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            lines = [f'# HELP {prefix}_requests_total API requests sent, by endpoint, method and outcome',
+                     f'# TYPE {prefix}_requests_total counter']
+            for (path, method), counts in sorted(self.requests.items()):
+                for label, count in sorted(counts.items()):
+                    lines.append(f'{prefix}_requests_total{{{_labels(path=path, method=method, outcome=label)}}} '
+                                 f'{count}')
+
+            lines += [f'# HELP {prefix}_request_duration_seconds API request latency',
+                      f'# TYPE {prefix}_request_duration_seconds histogram']
+            for (path, method), histogram in sorted(self.latency.items()):
+                lines += self._histogram_lines(f'{prefix}_request_duration_seconds', histogram, path=path,
+                                               method=method)
+
+            lines += [f'# HELP {prefix}_received_bytes_total Response bytes received, by endpoint',
+                      f'# TYPE {prefix}_received_bytes_total counter']
+            for path, size in sorted(self.bytes_received.items()):
+                lines.append(f'{prefix}_received_bytes_total{{{_labels(path=path)}}} {size}')
+
+            lines += [f'# HELP {prefix}_rate_limit_wait_seconds Time waited for the rate limiter, by endpoint group',
+                      f'# TYPE {prefix}_rate_limit_wait_seconds histogram']
+            for group, histogram in sorted(self.rate_limit_wait.items()):
+                lines += self._histogram_lines(f'{prefix}_rate_limit_wait_seconds', histogram, group=group)
+
+            lines += [f'# HELP {prefix}_sign_duration_seconds Time spent signing private requests',
+                      f'# TYPE {prefix}_sign_duration_seconds histogram']
+            lines += self._histogram_lines(f'{prefix}_sign_duration_seconds', self.signing)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,525 @@
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from urllib.parse import parse_qsl, urlsplit
+
+from .api import current_timestamp
+from .ratelimit import RateLimiter, endpoint_group
+
+logger = logging.getLogger('cryptocom_api')
+
+DEFAULT_INSTRUMENTS = ('BTC_USDT', 'ETH_USDT', 'CRO_USDT', 'ETH_BTC', 'CRO_BTC')
+
+# V2 response codes
+SYS_ERROR = 10001
+TOO_MANY_REQUESTS = 10006
+METHOD_NOT_FOUND = 10008
+UNAUTHORIZED = 40101
+
+
+def v2_params_str(obj, level=0):
+    # the signature payload as documented by the exchange, kept independent of the client's implementation:
+    # the dicts in lists are encoded recursively, any other value, a dict too, as its str()
+    if level >= 3:
+        return str(obj)
+    result = ""
+    for key in sorted(obj):
+        result += key
+        value = obj[key]
+        if value is None:
+            result += 'null'
+        elif isinstance(value, list):
+            for item in value:
+                result += v2_params_str(item, level + 1) if isinstance(item, dict) else str(item)
+        else:
+            result += str(value)
+    return result
+
+
+class _Reply(Exception):
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.exchange.handle(self, 'get')
+
+    def do_POST(self):
+        self.server.exchange.handle(self, 'post')
+
+    def log_message(self, *args):
+        pass
+
+
+class MockExchange:
+    """
+    In-process HTTP server implementing the V1 and V2 endpoints used by CryptoComApi, with
+    generated market data and an order store, for tests and benchmarks:
+
+        with MockExchange(latency=0.01, error_rate=0.05) as exchange:
+            api = CryptoComApi(exchange.key, exchange.secret, api_root=exchange.root())
+
+    Private calls are rejected unless signed with key / secret. Requests can be delayed by
+    `latency` seconds, fail with a 500 SYS_ERROR at `error_rate`, or be answered 429
+    TOO_MANY_REQUESTS over the server side `rate_limits`. fail_next() queues failures for
+    the next requests.
+    """
+
+    def __init__(self, key='mock-key', secret='mock-secret', instruments=DEFAULT_INSTRUMENTS, latency=0.0,
+                 error_rate=0.0, rate_limits=None, history=1000, history_span=24 * 3600 * 1000, trades=200,
+                 book_depth=150, seed=0):
+        """
+        @param latency: seconds added to every response, or a (min, max) range
+        @param error_rate: fraction of requests answered with HTTP 500 SYS_ERROR
+        @param rate_limits: (optional) {endpoint group: (requests per second, burst)} enforced by the server
+        @param history: number of generated history orders, one trade each, within `history_span` ms before now
+        @param trades: trades returned per public trades call
+        """
+        self.key = key
+        self.secret = secret
+        self.instruments = list(instruments)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limiter = RateLimiter(rate_limits) if rate_limits else None
+        self.trade_count = trades
+        self.book_depth = book_depth
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._failures = []
+
+        self.requests = {}
+        self.rejected = {}
+
+        self.prices = {name: round(self._random.uniform(1, 50000), 2) for name in self.instruments}
+        self._next_id = 1
+        self._trade_id = 1
+        self.orders = {}
+        self.history = []
+        self.trades = []
+        self._generate_history(history, history_span)
+
+        self.server = None
+        self._thread = None
+
+    # server
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.exchange = self
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def port(self):
+        return self.server.server_port
+
+    def root(self, version='v2'):
+        """
+        @param version: 'v1' or 'v2', or a CryptoComApi.ApiVersion
+        """
+        return f"http://127.0.0.1:{self.port}/{getattr(version, 'value', version)}/"
+
+    def fail_next(self, count=1, status=503, code=SYS_ERROR):
+        """
+        Answers the next `count` requests with the HTTP status and response code
+        """
+        with self._lock:
+            self._failures.extend([(status, code)] * count)
+
+    def stats(self):
+        with self._lock:
+            return {'requests': dict(self.requests), 'rejected': dict(self.rejected), 'orders': len(self.orders)}
+
+    # request handling
+
+    def handle(self, request, method):
+        url = urlsplit(request.path)
+        version, _, path = url.path.lstrip('/').partition('/')
+        if method == 'get':
+            params = dict(parse_qsl(url.query))
+        else:
+            body = request.rfile.read(int(request.headers.get('Content-Length') or 0)).decode()
+            params = json.loads(body or '{}') if version == 'v2' else dict(parse_qsl(body))
+
+        try:
+            self._delay()
+            with self._lock:
+                self.requests[path] = self.requests.get(path, 0) + 1
+            self._check_failures(path, method)
+            handler = getattr(self, f'_{version}_{path.replace("/", "_").replace("-", "_")}', None)
+            if handler is None:
+                raise _Reply(404, {'code': METHOD_NOT_FOUND, 'message': 'METHOD_NOT_FOUND'})
+            if method == 'post':
+                params = self._verify(version, path, params)
+            status, body = 200, self._envelope(version, path, params, handler(params))
+        except _Reply as reply:
+            with self._lock:
+                self.rejected[reply.status] = self.rejected.get(reply.status, 0) + 1
+            status, body = reply.status, reply.body
+        except Exception as e:
+            logger.exception(f"Mock exchange failed on {path}")
+            status, body = 500, {'code': SYS_ERROR, 'message': repr(e)}
+
+        data = json.dumps(body).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _delay(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            with self._lock:
+                latency = self._random.uniform(*latency)
+        if latency:
+            sleep(latency)
+
+    def _check_failures(self, path, method):
+        with self._lock:
+            failure = self._failures.pop(0) if self._failures else None
+            if failure is None and self.error_rate and self._random.random() < self.error_rate:
+                failure = (500, SYS_ERROR)
+        if failure is not None:
+            status, code = failure
+            raise _Reply(status, {'code': code, 'message': 'SYS_ERROR'})
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire(endpoint_group(path, method)):
+            raise _Reply(429, {'code': TOO_MANY_REQUESTS, 'message': 'TOO_MANY_REQUESTS'})
+
+    def _verify(self, version, path, body):
+        """
+        @return: the params of a correctly signed private call
+        """
+        if version == 'v1':
+            params = {k: v for k, v in body.items() if k != 'sign'}
+            payload = "".join(key + str(params[key]) for key in sorted(params)) + self.secret
+            valid = body.get('api_key') == self.key and \
+                hashlib.sha256(payload.encode()).hexdigest() == body.get('sign')
+            return params if valid else self._unauthorized()
+
+        params = body.get('params') or {}
+        payload = body.get('method', '') + str(body.get('id', '')) + str(body.get('api_key', '')) + \
+            v2_params_str(params) + str(body.get('nonce', ''))
+        sig = hmac.new(self.secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        if body.get('api_key') != self.key or body.get('method') != path or not hmac.compare_digest(
+                sig, str(body.get('sig'))):
+            self._unauthorized()
+        return params
+
+    @staticmethod
+    def _unauthorized():
+        raise _Reply(401, {'code': UNAUTHORIZED, 'message': 'UNAUTHORIZED'})
+
+    @staticmethod
+    def _envelope(version, path, params, result):
+        if version == 'v1':
+            return {'code': '0', 'msg': 'suc', 'data': result}
+        return {'id': 1, 'method': path, 'code': 0, 'result': result}
+
+    # market data
+
+    def _generate_history(self, count, span):
+        now = current_timestamp()
+        for i in range(count):
+            name = self._random.choice(self.instruments)
+            create_time = now - span + int(span * i / max(count, 1))
+            order = self._new_order(name, self._random.choice(('BUY', 'SELL')), 'LIMIT',
+                                    self._price(name), round(self._random.uniform(0.01, 5), 4), None, create_time)
+            order['status'] = 'FILLED'
+            order['cumulative_quantity'] = order['quantity']
+            order['avg_price'] = order['price']
+            self.history.append(order)
+            self.trades.append(self._trade(order))
+
+    def _price(self, name):
+        return round(self.prices[name] * self._random.uniform(0.99, 1.01), 2)
+
+    def _ticker(self, name):
+        price = self.prices[name]
+        return {'i': name, 'b': round(price * 0.9999, 2), 'k': round(price * 1.0001, 2), 'a': price,
+                'h': round(price * 1.02, 2), 'l': round(price * 0.98, 2), 'v': 1234.5, 'c': 0.0123,
+                't': current_timestamp()}
+
+    def _public_trades(self, name):
+        now = current_timestamp()
+        with self._lock:
+            first = self._trade_id
+            self._trade_id += self.trade_count
+        # newest first, like the exchange
+        return [{'i': name, 'd': first + n, 's': 'BUY' if n % 2 else 'SELL', 'p': self.prices[name],
+                 'q': round(0.001 * (n % 100 + 1), 4), 't': now - self.trade_count + n, 'dataTime': now}
+                for n in range(self.trade_count - 1, -1, -1)]
+
+    def _book(self, name, depth):
+        price, tick = self.prices[name], max(self.prices[name] * 0.0001, 0.01)
+        bids = [[round(price - tick * (i + 1), 2), round(0.5 + i % 7, 4), 1 + i % 3] for i in range(depth)]
+        asks = [[round(price + tick * (i + 1), 2), round(0.5 + i % 5, 4), 1 + i % 3] for i in range(depth)]
+        return bids, asks
+
+    # order store
+
+    def _new_order(self, name, side, type, price, quantity, client_oid, create_time=None):
+        with self._lock:
+            order_id = str(self._next_id)
+            self._next_id += 1
+        create_time = create_time or current_timestamp()
+        return {'order_id': order_id, 'client_oid': client_oid or '', 'instrument_name': name, 'side': side,
+                'type': type, 'status': 'ACTIVE', 'price': price, 'quantity': quantity,
+                'cumulative_quantity': 0, 'cumulative_value': 0, 'avg_price': 0, 'fee_currency': name.split('_')[0],
+                'time_in_force': 'GOOD_TILL_CANCEL', 'create_time': create_time, 'update_time': create_time}
+
+    def _trade(self, order):
+        return {'trade_id': 't' + order['order_id'], 'order_id': order['order_id'], 'client_oid': order['client_oid'],
+                'instrument_name': order['instrument_name'], 'side': order['side'], 'traded_price': order['price'],
+                'traded_quantity': order['quantity'], 'fee': 0.0, 'fee_currency': order['fee_currency'],
+                'create_time': order['create_time'], 'liquidity_indicator': 'TAKER'}
+
+    def _place(self, params):
+        name = params.get('instrument_name')
+        if name not in self.prices:
+            return None, {'code': 30003, 'message': 'SYMBOL_NOT_FOUND'}
+        price = float(params['price']) if params.get('price') is not None else self.prices[name]
+        quantity = float(params.get('quantity') or params.get('notional') or 0)
+        order = self._new_order(name, params.get('side'), params.get('type'), price, quantity,
+                                params.get('client_oid'))
+        with self._lock:
+            self.orders[order['order_id']] = order
+        return order, None
+
+    def _cancel(self, order_id):
+        with self._lock:
+            order = self.orders.get(str(order_id))
+            if order is None or order['status'] != 'ACTIVE':
+                return False
+            order['status'] = 'CANCELED'
+            order['update_time'] = current_timestamp()
+            return True
+
+    def _find(self, order_id):
+        with self._lock:
+            order = self.orders.get(str(order_id))
+        if order is None:
+            order = next((o for o in self.history if o['order_id'] == str(order_id)), None)
+        return order
+
+    @staticmethod
+    def _page(records, params, size_key='page_size', page_key='page', first_page=0, default_size=20):
+        size = int(params.get(size_key) or default_size)
+        page = int(params.get(page_key) or first_page) - first_page
+        return records[page * size:(page + 1) * size]
+
+    @staticmethod
+    def _filter(records, params, symbol_key='instrument_name', start_key='start_ts', end_key='end_ts'):
+        symbol, start, end = params.get(symbol_key), params.get(start_key), params.get(end_key)
+        start = int(start) if start is not None else None
+        end = int(end) if end is not None else None
+        selected = [r for r in records
+                    if (not symbol or r['instrument_name'] == symbol)
+                    and (start is None or r['create_time'] >= start)
+                    and (end is None or r['create_time'] <= end)]
+        # newest first
+        return selected[::-1]
+
+    def _active(self, name=None):
+        with self._lock:
+            return [o for o in self.orders.values() if o['status'] == 'ACTIVE' and (
+                not name or o['instrument_name'] == name)]
+
+    # V2 endpoints
+
+    def _v2_public_get_instruments(self, params):
+        return {'instruments': [{'instrument_name': name, 'quote_currency': name.split('_')[1],
+                                 'base_currency': name.split('_')[0], 'price_decimals': 2,
+                                 'quantity_decimals': 4} for name in self.instruments]}
+
+    def _v2_public_get_ticker(self, params):
+        name = params.get('instrument_name')
+        if name:
+            return {'data': [self._ticker(name)] if name in self.prices else []}
+        return {'data': [self._ticker(name) for name in self.instruments]}
+
+    def _v2_public_get_book(self, params):
+        name = params.get('instrument_name')
+        depth = params.get('depth')
+        depth = min(int(depth), self.book_depth) if depth and depth.isdigit() else self.book_depth
+        bids, asks = self._book(name, depth) if name in self.prices else ([], [])
+        return {'instrument_name': name, 'depth': depth,
+                'data': [{'bids': bids, 'asks': asks, 't': current_timestamp()}]}
+
+    def _v2_public_get_trades(self, params):
+        name = params.get('instrument_name')
+        return {'instrument_name': name, 'data': self._public_trades(name) if name in self.prices else []}
+
+    def _v2_private_get_account_summary(self, params):
+        return {'accounts': [{'currency': 'USDT', 'balance': 10000.0, 'available': 9000.0, 'order': 1000.0,
+                              'stake': 0}]}
+
+    def _v2_private_create_order(self, params):
+        order, error = self._place(params)
+        if error is not None:
+            raise _Reply(200, error)
+        return {'order_id': order['order_id'], 'client_oid': order['client_oid']}
+
+    def _v2_private_create_order_list(self, params):
+        result_list = []
+        for index, order_params in enumerate(params.get('order_list') or []):
+            order, error = self._place(order_params)
+            if error is not None:
+                result_list.append(dict(error, index=index))
+            else:
+                result_list.append({'index': index, 'code': 0, 'order_id': order['order_id'],
+                                    'client_oid': order['client_oid']})
+        return {'result_list': result_list}
+
+    def _v2_private_cancel_order(self, params):
+        if not self._cancel(params.get('order_id')):
+            raise _Reply(200, {'code': 316, 'message': 'INVALID_ORDERID'})
+        return None
+
+    def _v2_private_cancel_order_list(self, params):
+        return {'result_list': [{'index': index, 'code': 0 if self._cancel(order.get('order_id')) else 316}
+                                for index, order in enumerate(params.get('order_list') or [])]}
+
+    def _v2_private_cancel_all_orders(self, params):
+        for order in self._active(params.get('instrument_name')):
+            self._cancel(order['order_id'])
+        return None
+
+    def _v2_private_get_order_detail(self, params):
+        order = self._find(params.get('order_id'))
+        if order is None:
+            raise _Reply(200, {'code': 316, 'message': 'INVALID_ORDERID'})
+        trades = [self._trade(order)] if order['status'] == 'FILLED' else []
+        return {'trade_list': trades, 'order_info': order}
+
+    def _v2_private_get_open_orders(self, params):
+        orders = self._filter(self._active(), params)
+        return {'count': len(orders), 'order_list': self._page(orders, params)}
+
+    def _v2_private_get_order_history(self, params):
+        return {'order_list': self._page(self._filter(self.history, params), params)}
+
+    def _v2_private_get_trades(self, params):
+        return {'trade_list': self._page(self._filter(self.trades, params), params)}
+
+    # V1 endpoints, V1 symbols are the V2 instrument names in lower case without the underscore
+
+    def _instrument_of(self, symbol):
+        return next((name for name in self.instruments if name.replace('_', '').lower() == symbol), None)
+
+    def _v1_symbols(self, params):
+        return [{'symbol': name.replace('_', '').lower(), 'count_coin': name.split('_')[1],
+                 'base_coin': name.split('_')[0], 'amount_precision': 4, 'price_precision': 2}
+                for name in self.instruments]
+
+    def _ticker_v1(self, name):
+        ticker = self._ticker(name)
+        return {'symbol': name.replace('_', '').lower(), 'buy': str(ticker['b']), 'sell': str(ticker['k']),
+                'last': str(ticker['a']), 'high': str(ticker['h']), 'low': str(ticker['l']),
+                'vol': str(ticker['v']), 'rose': str(ticker['c']), 'time': ticker['t']}
+
+    def _v1_ticker(self, params):
+        if params.get('symbol'):
+            name = self._instrument_of(params['symbol'])
+            return self._ticker_v1(name) if name else {}
+        return {'date': current_timestamp(), 'ticker': [self._ticker_v1(name) for name in self.instruments]}
+
+    def _v1_trades(self, params):
+        name = self._instrument_of(params.get('symbol'))
+        return [{'id': t['d'], 'type': t['s'].lower(), 'price': str(t['p']), 'amount': str(t['q']), 'ctime': t['t']}
+                for t in (self._public_trades(name) if name else [])]
+
+    def _v1_depth(self, params):
+        name = self._instrument_of(params.get('symbol'))
+        bids, asks = self._book(name, self.book_depth) if name else ([], [])
+        return {'tick': {'bids': [[str(p), str(q)] for p, q, _ in bids], 'asks': [[str(p), str(q)] for p, q, _ in asks],
+                         'time': current_timestamp()}}
+
+    def _v1_klines(self, params):
+        name = self._instrument_of(params.get('symbol'))
+        period = int(params.get('period') or 1) * 60
+        now = current_timestamp() // 1000 // period * period
+        price = self.prices.get(name, 0)
+        return [[now - period * i, price, price * 1.01, price * 0.99, price, 10.0] for i in range(200, 0, -1)]
+
+    def _v1_ticker_price(self, params):
+        return {name.replace('_', '').lower(): self.prices[name] for name in self.instruments}
+
+    def _v1_account(self, params):
+        return {'total_asset': '10000', 'coin_list': [{'coin': 'usdt', 'normal': '9000', 'locked': '1000'}]}
+
+    def _order_v1(self, order):
+        return {'id': int(order['order_id']), 'symbol': order['instrument_name'].replace('_', '').lower(),
+                'side': order['side'], 'type': 2 if order['type'] == 'MARKET' else 1,
+                'status': {'ACTIVE': 1, 'FILLED': 2, 'CANCELED': 4}.get(order['status'], 1),
+                'price': str(order['price']), 'volume': str(order['quantity']),
+                'deal_volume': str(order['cumulative_quantity']), 'avg_price': str(order['avg_price']),
+                'created_at': order['create_time']}
+
+    def _v1_order(self, params):
+        order, error = self._place({'instrument_name': self._instrument_of(params.get('symbol')),
+                                    'side': params.get('side'), 'type': 'MARKET' if params.get('type') == '2' else
+                                    'LIMIT', 'price': params.get('price'), 'quantity': params.get('volume')})
+        if error is not None:
+            raise _Reply(200, {'code': '2', 'msg': error['message']})
+        return {'order_id': int(order['order_id'])}
+
+    def _v1_showOrder(self, params):
+        order = self._find(params.get('order_id'))
+        if order is None:
+            raise _Reply(200, {'code': '22', 'msg': 'order not exist'})
+        return {'order_info': self._order_v1(order), 'trade_list': []}
+
+    def _v1_orders_cancel(self, params):
+        if not self._cancel(params.get('order_id')):
+            raise _Reply(200, {'code': '22', 'msg': 'order not exist'})
+        return None
+
+    def _v1_cancelAllOrders(self, params):
+        for order in self._active(self._instrument_of(params.get('symbol'))):
+            self._cancel(order['order_id'])
+        return None
+
+    def _history_filter(self, params):
+        return {'instrument_name': self._instrument_of(params.get('symbol')), 'start_ts': None, 'end_ts': None}
+
+    def _v1_openOrders(self, params):
+        orders = self._filter(self._active(), self._history_filter(params))
+        return {'count': len(orders), 'resultList': [self._order_v1(o) for o in self._page(
+            orders, params, 'pageSize', 'page', first_page=1)]}
+
+    def _v1_allOrders(self, params):
+        orders = self._filter(self.history, self._history_filter(params))
+        return {'count': len(orders), 'orderList': [self._order_v1(o) for o in self._page(
+            orders, params, 'pageSize', 'page', first_page=1)]}
+
+    def _v1_myTrades(self, params):
+        trades = self._filter(self.trades, self._history_filter(params))
+        return {'count': len(trades), 'resultList': [
+            {'id': t['trade_id'], 'symbol': t['instrument_name'].replace('_', '').lower(), 'side': t['side'],
+             'price': str(t['traded_price']), 'volume': str(t['traded_quantity']), 'fee': '0',
+             'ctime': t['create_time']} for t in self._page(trades, params, 'pageSize', 'page', first_page=1)]}
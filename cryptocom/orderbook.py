@@ -0,0 +1,274 @@
+import logging
+from bisect import bisect_left
+
+logger = logging.getLogger('cryptocom_api')
+
+
+class BookSide:
+    """
+    Price levels of one side of the book in two sorted parallel lists (keys and sizes).
+    Keys are ordered so that the best level is the last one: prices for bids, negated prices
+    for asks. Top of book is O(1), a level is found in O(log n) and updates close to the top
+    of the book, which are the most frequent, only shift a few list items.
+    """
+    __slots__ = ('ask', '_keys', '_sizes')
+
+    def __init__(self, ask):
+        self.ask = ask
+        self._keys = []
+        self._sizes = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _key(self, price):
+        return -price if self.ask else price
+
+    def replace(self, levels):
+        """
+        @param levels: iterable of (price, size), in any order
+        """
+        pairs = sorted((self._key(float(price)), float(size)) for price, size in levels if float(size) > 0)
+        self._keys = [k for k, _ in pairs]
+        self._sizes = [s for _, s in pairs]
+
+    def update(self, price, size):
+        """
+        Sets the size of a price level, size 0 removes the level
+        """
+        key = self._key(float(price))
+        size = float(size)
+        i = bisect_left(self._keys, key)
+        found = i < len(self._keys) and self._keys[i] == key
+        if size > 0:
+            if found:
+                self._sizes[i] = size
+            else:
+                self._keys.insert(i, key)
+                self._sizes.insert(i, size)
+        elif found:
+            del self._keys[i]
+            del self._sizes[i]
+
+    def truncate(self, depth):
+        """
+        Keeps only the best `depth` levels
+        """
+        if len(self._keys) > depth:
+            del self._keys[:-depth]
+            del self._sizes[:-depth]
+
+    def best(self):
+        """
+        @return: (price, size) of the best level, None for an empty side
+        """
+        if not self._keys:
+            return None
+        return self._key(self._keys[-1]), self._sizes[-1]
+
+    def size_at(self, price):
+        key = self._key(float(price))
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._sizes[i]
+        return 0.0
+
+    def levels(self, depth=None):
+        """
+        @return: list of (price, size) from the best level on
+        """
+        start = 0 if depth is None else max(0, len(self._keys) - depth)
+        return [(self._key(k), s) for k, s in zip(reversed(self._keys[start:]), reversed(self._sizes[start:]))]
+
+
+class OrderBook:
+    """
+    Locally maintained order book of one instrument
+
+        book = OrderBook('BTC_USDT')
+        bids, asks, timestamp = parse_book(api.order_book('BTC_USDT'))
+        book.apply_snapshot(bids, asks, timestamp=timestamp)
+        book.apply_delta(bids=[(9700.5, 0)], asks=[(9701.0, 1.2)], sequence=2, prev_sequence=1)
+        book.best_bid(), book.best_ask(), book.spread()
+
+    A delta that does not continue the sequence of the previous one, or leaves the book
+    crossed, sets needs_resync and is not applied, the book has to be seeded from a new snapshot.
+    """
+
+    def __init__(self, instrument_name, max_depth=None):
+        self.instrument_name = instrument_name
+        self.max_depth = max_depth
+        self.bids = BookSide(ask=False)
+        self.asks = BookSide(ask=True)
+        self.sequence = None
+        self.timestamp = None
+        self.needs_resync = True
+
+    def apply_snapshot(self, bids, asks, sequence=None, timestamp=None):
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self._truncate()
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.needs_resync = self.crossed()
+
+    def apply_delta(self, bids=(), asks=(), sequence=None, prev_sequence=None, timestamp=None):
+        """
+        @param bids, asks: iterables of (price, size) changes, size 0 removes a level
+        @param sequence: sequence number of this delta
+        @param prev_sequence: sequence number of the delta it follows, checked against the last applied one
+        @return: True if applied, False if skipped or rejected, a rejected delta leaves the book unchanged
+        """
+        if self.needs_resync:
+            return False
+        if sequence is not None and self.sequence is not None:
+            if sequence <= self.sequence:
+                # already applied
+                return False
+            if prev_sequence is not None and prev_sequence != self.sequence:
+                logger.warning(f"{self.instrument_name} book sequence gap: {self.sequence} -> {prev_sequence}")
+                self.needs_resync = True
+                return False
+
+        # previous sizes of the changed levels, restored if the delta crosses the book
+        undo = []
+        for side, changes in ((self.bids, bids), (self.asks, asks)):
+            for price, size in changes:
+                undo.append((side, price, side.size_at(price)))
+                side.update(price, size)
+
+        if self.crossed():
+            logger.warning(f"{self.instrument_name} book crossed: {self.best_bid()} >= {self.best_ask()}")
+            for side, price, size in reversed(undo):
+                side.update(price, size)
+            self.needs_resync = True
+            return False
+
+        self._truncate()
+        if sequence is not None:
+            self.sequence = sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+        return True
+
+    def _truncate(self):
+        if self.max_depth:
+            self.bids.truncate(self.max_depth)
+            self.asks.truncate(self.max_depth)
+
+    def crossed(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        return bid is not None and ask is not None and bid[0] >= ask[0]
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def spread(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def mid(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (ask[0] + bid[0]) / 2
+
+
+def parse_book(result):
+    """
+    Levels of an order_book() result of either API version
+
+    @return: (bids, asks, timestamp), bids and asks as lists of (price, size)
+    """
+    if 'tick' in result:
+        # ApiVersion.V1
+        book = result['tick']
+        timestamp = book.get('time')
+    else:
+        # ApiVersion.V2
+        book = result['data'][0] if result.get('data') else {}
+        timestamp = book.get('t')
+    bids = [(level[0], level[1]) for level in book.get('bids') or []]
+    asks = [(level[0], level[1]) for level in book.get('asks') or []]
+    return bids, asks, timestamp
+
+
+class OrderBooks:
+    """
+    Order books keyed by instrument, seeded from order_book() snapshots of the api client
+    and kept up to date from successive snapshots or streamed book messages
+    """
+
+    def __init__(self, api=None, max_depth=None, depth=None):
+        """
+        @param api: CryptoComApi used to (re)seed books from order_book() snapshots
+        @param max_depth: (optional) levels kept per side
+        @param depth: (optional) depth requested for snapshots, the order_book() `_type` argument
+        """
+        self.api = api
+        self.max_depth = max_depth
+        self.depth = depth
+        self.books = {}
+        self.resyncs = 0
+
+    def __getitem__(self, instrument_name):
+        return self.books[instrument_name]
+
+    def __contains__(self, instrument_name):
+        return instrument_name in self.books
+
+    def book(self, instrument_name):
+        book = self.books.get(instrument_name)
+        if book is None:
+            book = self.books[instrument_name] = OrderBook(instrument_name, self.max_depth)
+        return book
+
+    def sync(self, instrument_name):
+        """
+        Seeds the book from a fresh order_book() snapshot
+        """
+        if self.depth is None:
+            result = self.api.order_book(instrument_name)
+        else:
+            result = self.api.order_book(instrument_name, self.depth)
+        if hasattr(result, 'ok'):
+            # client in return_results mode
+            result = result.result if result.ok else None
+        if not result:
+            logger.warning(f"{instrument_name} book snapshot not available")
+            return self.book(instrument_name)
+        return self.on_snapshot(instrument_name, result)
+
+    def on_snapshot(self, instrument_name, result):
+        bids, asks, timestamp = parse_book(result)
+        book = self.book(instrument_name)
+        book.apply_snapshot(bids, asks, timestamp=timestamp)
+        return book
+
+    def on_delta(self, instrument_name, bids=(), asks=(), sequence=None, prev_sequence=None, timestamp=None):
+        """
+        Applies a delta, resyncing the book from a snapshot if it is inconsistent
+        """
+        book = self.book(instrument_name)
+        if book.apply_delta(bids, asks, sequence, prev_sequence, timestamp):
+            return True
+        if book.needs_resync and self.api is not None:
+            self.resyncs += 1
+            self.sync(instrument_name)
+        return False
+
+    def on_stream_message(self, message):
+        """
+        MarketStream callback for the 'book' channel, every message is a full snapshot of the subscribed depth
+        """
+        for data in message.data:
+            book = self.book(message.instrument_name)
+            book.apply_snapshot(
+                [(level[0], level[1]) for level in data.get('bids', [])],
+                [(level[0], level[1]) for level in data.get('asks', [])],
+                timestamp=data.get('t'))
@@ -0,0 +1,85 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .result import ApiError
+
+DEFAULT_PAGE_SIZE = 200
+
+# keys of the record list in paged results
+# ApiVersion.V1: openOrders, myTrades -> resultList, allOrders -> orderList
+# ApiVersion.V2: get-open-orders, get-order-history -> order_list, get-trades -> trade_list
+RECORD_LIST_KEYS = ('order_list', 'trade_list', 'resultList', 'orderList')
+
+
+def page_records(result):
+    if not result:
+        return []
+    if isinstance(result, list):
+        # already decoded into records
+        return result
+    for key in RECORD_LIST_KEYS:
+        records = result.get(key)
+        if records is not None:
+            return records
+    return []
+
+
+def _records(result):
+    if not result.ok:
+        raise ApiError(result)
+    return page_records(result.result)
+
+
+def paginate(fetch, first_page, page_size, prefetch=False):
+    """
+    Yields records across pages until a page is not full, at most two pages are held in memory
+
+    @param fetch: fetch(page_number) -> ApiResult of the page
+    @param prefetch: fetch the next page in a background thread while the current one is consumed
+    @raise ApiError: if a page can not be fetched
+    """
+    page = first_page
+    if not prefetch:
+        while True:
+            records = _records(fetch(page))
+            yield from records
+            if len(records) < page_size:
+                return
+            page += 1
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        records = _records(fetch(page))
+        while True:
+            more = len(records) == page_size
+            if more:
+                page += 1
+                next_page = pool.submit(fetch, page)
+            yield from records
+            if not more:
+                return
+            records = _records(next_page.result())
+
+
+async def apaginate(fetch, first_page, page_size, prefetch=False):
+    """
+    Async version of paginate(), fetch(page_number) returns an awaitable of the ApiResult,
+    with prefetch the next page is fetched in a task
+    """
+    page = first_page
+    records = _records(await fetch(page))
+    while True:
+        more = len(records) == page_size
+        next_page = None
+        if more:
+            page += 1
+            next_page = asyncio.ensure_future(fetch(page)) if prefetch else None
+        try:
+            for record in records:
+                yield record
+        except GeneratorExit:
+            if next_page is not None:
+                next_page.cancel()
+            raise
+        if not more:
+            return
+        records = _records(await (next_page if next_page is not None else fetch(page)))
@@ -0,0 +1,303 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+from collections import OrderedDict
+from itertools import count
+
+from .api import BATCH_ORDER_LIMIT, CryptoComApi
+from .ratelimit import ORDER, PRIVATE, PUBLIC, RateLimiter
+from .result import ApiResult
+
+logger = logging.getLogger('cryptocom_api')
+
+# account selection policies
+LEAST_LOADED = 'least_loaded'
+ROUND_ROBIN = 'round_robin'
+
+PUBLIC_METHODS = frozenset(('symbols', 'tickers', 'ticker', 'klines', 'trades', 'prices', 'order_book'))
+ORDER_METHODS = frozenset(('create_order', 'create_limit_order', 'create_market_order', 'create_orders',
+                           'cancel_order', 'cancel_orders', 'cancel_all_orders'))
+CREATE_METHODS = frozenset(('create_order', 'create_limit_order', 'create_market_order', 'create_orders'))
+# client methods about the state of one client, not API calls
+LOCAL_METHODS = frozenset(('close', 'with_results', 'get_code', 'get_message', 'get_result', 'stream_auth_request'))
+
+
+def method_group(name):
+    """
+    @return: rate limiter group of the calls of a client method
+    """
+    if name in PUBLIC_METHODS:
+        return PUBLIC
+    if name in ORDER_METHODS:
+        return ORDER
+    return PRIVATE
+
+
+@functools.lru_cache(maxsize=None)
+def _order_id_signature(name):
+    """
+    @return: signature of the client method `name` if it takes an order_id, None otherwise
+    """
+    try:
+        signature = inspect.signature(getattr(CryptoComApi, name))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return signature if 'order_id' in signature.parameters else None
+
+
+def _order_ids(result):
+    """
+    @return: ids of the orders created by a call, from its result in any of the client's modes
+    """
+    if isinstance(result, ApiResult):
+        result = result.result
+    if isinstance(result, list):
+        return [order_id for item in result for order_id in _order_ids(item)]
+    if not isinstance(result, dict):
+        order_id = getattr(result, 'order_id', None)
+        return [str(order_id)] if order_id is not None else []
+    if result.get('order_id') is not None:
+        return [str(result['order_id'])]
+    return [str(r['order_id']) for r in result.get('result_list') or [] if r.get('order_id') is not None]
+
+
+class PoolClient:
+    """
+    Client of one account of a ClientPool with its load counters
+    """
+
+    def __init__(self, account, api):
+        self.account = account
+        self.api = api
+        self.calls = 0
+        self.in_flight = 0
+
+    def headroom(self):
+        return self.api.rate_limiter.headroom()
+
+
+class ClientPool:
+    """
+    Clients of several accounts or sub-accounts, each with its own key, connection pool and
+    rate limiter, so private throughput grows with the number of keys:
+
+        pool = ClientPool({'main': (key1, secret1), 'sub': (key2, secret2)})
+        pool.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, account='sub')
+        pool.open_orders('BTC_USDT')                # the account with the most headroom
+        pool.cancel_order('BTC_USDT', order_id)     # the account that created the order
+
+    Every client method can be called on the pool. Calls with an `account` go to that account,
+    calls about an order created through the pool (order_id) go to the account that created
+    it, others to the account picked by the policy: LEAST_LOADED, the most rate limiter
+    headroom in the group of the call and then the fewest calls in flight, or ROUND_ROBIN.
+    cancel_orders() sends the orders of each account in one call to that account, and
+    cancel_all_orders() without an `account` cancels on every account.
+    """
+
+    def __init__(self, credentials, policy=LEAST_LOADED, limits=None, client_class=CryptoComApi,
+                 max_tracked_orders=100000, **client_kwargs):
+        """
+        @param credentials: {account: (key, secret)} or a list of (key, secret), accounts are then numbered from 0
+        @param limits: (optional) limits of the RateLimiter of each key, see RateLimiter
+        @param client_class: CryptoComApi or AsyncCryptoComApi
+        @param max_tracked_orders: orders whose account is remembered, the oldest are forgotten first
+        @param client_kwargs: arguments of every client, ex. version or metrics=Metrics() shared by all of them
+        """
+        if policy not in (LEAST_LOADED, ROUND_ROBIN):
+            raise ValueError(f"Unknown policy: {policy}")
+        if not isinstance(credentials, dict):
+            credentials = dict(enumerate(credentials))
+        if not credentials:
+            raise ValueError("ClientPool requires at least one key")
+        if 'rate_limiter' in client_kwargs:
+            raise ValueError("Each key of a ClientPool has its own rate limiter, set `limits` instead")
+
+        self.policy = policy
+        self.clients = OrderedDict(
+            (account, PoolClient(account, client_class(key, secret, rate_limiter=RateLimiter(limits),
+                                                        **client_kwargs)))
+            for account, (key, secret) in credentials.items())
+        self.max_tracked_orders = max_tracked_orders
+        self._owners = OrderedDict()
+        self._next = count()
+        self._lock = threading.Lock()
+
+    @property
+    def accounts(self):
+        return list(self.clients)
+
+    def client(self, account):
+        """
+        @return: the client of an account
+        """
+        return self.clients[account].api
+
+    def close(self):
+        for client in self.clients.values():
+            client.api.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def owner(self, order_id):
+        """
+        @return: the account that created the order through the pool, None if not known
+        """
+        return self._owners.get(str(order_id))
+
+    def _remember(self, account, result):
+        order_ids = _order_ids(result)
+        if not order_ids:
+            return
+        with self._lock:
+            for order_id in order_ids:
+                self._owners[order_id] = account
+            while len(self._owners) > self.max_tracked_orders:
+                self._owners.popitem(last=False)
+
+    def _order_account(self, name, args, kwargs):
+        """
+        @return: the account owning the order a call is about, None if the call is not about a known order
+        """
+        signature = _order_id_signature(name)
+        if signature is None:
+            return None
+        try:
+            order_id = signature.bind(None, *args, **kwargs).arguments.get('order_id')
+        except TypeError:
+            return None
+        return self.owner(order_id) if order_id is not None else None
+
+    def pick(self, group=PRIVATE):
+        """
+        @return: the PoolClient the policy picks for a call of the rate limiter group
+        """
+        clients = list(self.clients.values())
+        if self.policy == ROUND_ROBIN or len(clients) == 1:
+            return clients[next(self._next) % len(clients)]
+        with self._lock:
+            return max(clients, key=lambda c: (c.api.rate_limiter.headroom().get(group, 1.0), -c.in_flight))
+
+    def _route(self, name, args, kwargs):
+        account = kwargs.pop('account', None)
+        if account is None:
+            account = self._order_account(name, args, kwargs)
+        if account is not None:
+            return self.clients[account]
+        return self.pick(method_group(name))
+
+    def call(self, name, *args, account=None, **kwargs):
+        """
+        Calls the client method `name` of an account, or of the account picked by the routing rules
+        """
+        if account is not None:
+            kwargs['account'] = account
+        client = self._route(name, args, kwargs)
+        method = getattr(client.api, name)
+        with self._lock:
+            client.calls += 1
+            client.in_flight += 1
+        try:
+            result = method(*args, **kwargs)
+        except BaseException:
+            self._done(client)
+            raise
+        if inspect.isawaitable(result):
+            return self._await(client, name, result)
+        self._done(client)
+        if name in CREATE_METHODS:
+            self._remember(client.account, result)
+        return result
+
+    async def _await(self, client, name, awaitable):
+        try:
+            result = await awaitable
+        finally:
+            self._done(client)
+        if name in CREATE_METHODS:
+            self._remember(client.account, result)
+        return result
+
+    def _done(self, client):
+        with self._lock:
+            client.in_flight -= 1
+
+    def _call_accounts(self, name, calls, merge):
+        """
+        Calls the client method `name` of several accounts, concurrently with async clients
+
+        @param calls: {account: (args, kwargs)}
+        @param merge: function of the {account: result} of all calls, its return value is returned
+        """
+        results = OrderedDict((account, self.call(name, *args, account=account, **kwargs))
+                              for account, (args, kwargs) in calls.items())
+        if any(inspect.isawaitable(result) for result in results.values()):
+            return self._gather(results, merge)
+        return merge(results)
+
+    @staticmethod
+    async def _gather(results, merge):
+        values = await asyncio.gather(*results.values())
+        return merge(OrderedDict(zip(results, values)))
+
+    def cancel_orders(self, orders, max_workers=BATCH_ORDER_LIMIT, account=None):
+        """
+        Cancels a list of orders with one cancel_orders() call per account owning some of them
+
+        @param orders: list of dicts of cancel_order() arguments, ex. {'symbol': 'BTC_USDT', 'order_id': '1234'}
+        @param account: (optional) account of all the orders, by default the account that created each order, \
+                        orders not created through the pool go to the account picked by the policy
+        @return: list of ApiResult, one per order in input order
+        """
+        groups = OrderedDict()
+        picked = account
+        for index, order in enumerate(orders):
+            owner = account if account is not None else self.owner(order.get('order_id'))
+            if owner is None:
+                if picked is None:
+                    picked = self.pick(ORDER).account
+                owner = picked
+            groups.setdefault(owner, []).append(index)
+
+        def merge(results):
+            merged = [None] * len(orders)
+            for owner, indexes in groups.items():
+                for index, result in zip(indexes, results[owner]):
+                    merged[index] = result
+            return merged
+        return self._call_accounts('cancel_orders', OrderedDict(
+            (owner, (([orders[index] for index in indexes],), {'max_workers': max_workers}))
+            for owner, indexes in groups.items()), merge)
+
+    def cancel_all_orders(self, symbol, account=None, **kwargs):
+        """
+        Cancels all orders in a market of one account, or of every account of the pool
+
+        @param account: (optional) the account, by default every account
+        @return: the result of the account, or {account: result} of every account
+        """
+        if account is not None:
+            return self.call('cancel_all_orders', symbol, account=account, **kwargs)
+        return self._call_accounts('cancel_all_orders', OrderedDict(
+            (account, ((symbol,), kwargs)) for account in self.clients), dict)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in LOCAL_METHODS or not callable(getattr(CryptoComApi, name, None)):
+            raise AttributeError(name)
+
+        def routed(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        routed.__name__ = name
+        return routed
+
+    def stats(self):
+        """
+        @return: {account: {'calls', 'in_flight', 'headroom': {group: share of the burst available}}}
+        """
+        return {account: {'calls': client.calls, 'in_flight': client.in_flight, 'headroom': client.headroom()}
+                for account, client in self.clients.items()}
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+from time import monotonic, sleep
+
+logger = logging.getLogger('cryptocom_api')
+
+# endpoint groups with separate rate budgets
+PUBLIC = 'public'
+PRIVATE = 'private'
+ORDER = 'order'
+
+# (requests per second, burst) per endpoint group, as documented for the V2 API:
+# market data 100/s, order placement and cancellation 15/100ms, other private calls 3/100ms
+DEFAULT_LIMITS = {
+    PUBLIC: (100, 100),
+    PRIVATE: (30, 3),
+    ORDER: (150, 15),
+}
+
+ORDER_PATHS = {
+    # ApiVersion.V1
+    'order', 'orders/cancel', 'cancelAllOrders',
+    # ApiVersion.V2
+    'private/create-order', 'private/cancel-order', 'private/cancel-all-orders',
+    'private/create-order-list', 'private/cancel-order-list',
+}
+
+
+def endpoint_group(path, method='get'):
+    if path in ORDER_PATHS:
+        return ORDER
+    if method == 'get':
+        return PUBLIC
+    return PRIVATE
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, refilled continuously at `rate` tokens per second up to `capacity`
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """
+        Takes the tokens right away, going into debt when the bucket is empty
+
+        @return: seconds the caller has to wait before the reserved tokens are actually available
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def try_acquire(self, tokens=1):
+        """
+        @return: True if the tokens were taken, False (and nothing taken) if not enough are available
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def available(self):
+        """
+        @return: tokens available now, negative while reserved tokens are waited for
+        """
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RateLimiter:
+    """
+    Token bucket per endpoint group, one instance can be shared by any number of clients and threads:
+
+        limiter = RateLimiter()
+        apis = [CryptoComApi(key, secret, rate_limiter=limiter) for key, secret in credentials]
+
+    Groups without a configured limit are not rate limited, RateLimiter({}) disables limiting.
+    """
+
+    def __init__(self, limits=None):
+        """
+        @param limits: {group: (requests per second, burst)}, defaults to DEFAULT_LIMITS
+        """
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        self.buckets = {group: TokenBucket(rate, burst) for group, (rate, burst) in limits.items()}
+
+    def reserve(self, group, tokens=1):
+        bucket = self.buckets.get(group)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve(tokens)
+
+    def try_acquire(self, group, tokens=1):
+        bucket = self.buckets.get(group)
+        return bucket is None or bucket.try_acquire(tokens)
+
+    def headroom(self):
+        """
+        @return: {group: share of the burst available now}, 1.0 for an idle group, negative while callers wait
+        """
+        return {group: bucket.available() / bucket.capacity for group, bucket in self.buckets.items()}
+
+    def acquire(self, group, tokens=1):
+        """
+        Blocks until the tokens are available
+
+        @return: seconds waited
+        """
+        delay = self.reserve(group, tokens)
+        if delay > 0:
+            logger.debug(f"Rate limiter '{group}' activated, delaying for {delay * 1000:.1f}ms")
+            sleep(delay)
+        return delay
+
+    async def acquire_async(self, group, tokens=1):
+        """
+        Awaitable version of acquire()
+
+        @return: seconds waited
+        """
+        delay = self.reserve(group, tokens)
+        if delay > 0:
+            logger.debug(f"Rate limiter '{group}' activated, delaying for {delay * 1000:.1f}ms")
+            await asyncio.sleep(delay)
+        return delay
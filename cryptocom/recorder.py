@@ -0,0 +1,437 @@
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import records
+from .api import current_timestamp
+
+logger = logging.getLogger('cryptocom_api')
+
+# one file per instrument and kind: <instrument>.<kind>.bin, a header and fixed-width little-endian records
+# sorted by timestamp, so the file is its own time index
+TICKER = 'ticker'
+TRADE = 'trade'
+BOOK = 'book'
+KINDS = (TICKER, TRADE, BOOK)
+
+MAGIC = b'CCRB'
+FORMAT_VERSION = 1
+# magic, format version, kind, book depth, record size
+HEADER = struct.Struct('<4sHHII')
+_KIND_CODES = {TICKER: 1, TRADE: 2, BOOK: 3}
+_CODE_KINDS = {code: kind for kind, code in _KIND_CODES.items()}
+
+# timestamp, bid, ask, last, high, low, volume, change
+TICKER_RECORD = struct.Struct('<q7d')
+# timestamp, trade id, price, quantity, side (1 buy, -1 sell), ids that are not int64 are stored as a hash of them
+TRADE_RECORD = struct.Struct('<qqddb7x')
+DEFAULT_BOOK_DEPTH = 10
+
+# payload kinds of CryptoComApi._request recorded, and the kind of file they go to
+RECORDED = {'tickers': TICKER, 'ticker': TICKER, 'trades': TRADE, 'book': BOOK}
+
+
+def book_record(depth):
+    # timestamp, then depth x (price, quantity) bids and asks from the best level on, missing levels are nan
+    return struct.Struct(f'<q{4 * depth}d')
+
+
+def record_dtype(kind, depth=DEFAULT_BOOK_DEPTH):
+    """
+    @return: numpy dtype of the records of a kind, for zero-copy views of the files
+    """
+    if kind == TICKER:
+        return np.dtype([('timestamp', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('high', '<f8'),
+                         ('low', '<f8'), ('volume', '<f8'), ('change', '<f8')])
+    if kind == TRADE:
+        return np.dtype({'names': ['timestamp', 'trade_id', 'price', 'quantity', 'side'],
+                         'formats': ['<i8', '<i8', '<f8', '<f8', 'i1'],
+                         'offsets': [0, 8, 16, 24, 32], 'itemsize': TRADE_RECORD.size})
+    return np.dtype([('timestamp', '<i8'), ('bids', '<f8', (depth, 2)), ('asks', '<f8', (depth, 2))])
+
+
+def _number(value):
+    return float('nan') if value is None else float(value)
+
+
+def _trade_id(value):
+    """
+    @return: the int64 stored for a trade id, the id itself if it is an integer, else a stable hash of its str()
+    """
+    try:
+        id = int(value)
+        if -2 ** 63 <= id < 2 ** 63 and str(id) == str(value):
+            return id
+    except (TypeError, ValueError):
+        pass
+    return struct.unpack('<q', hashlib.blake2b(str(value).encode(), digest_size=8).digest())[0]
+
+
+def _levels(levels, depth):
+    flat = []
+    for level in levels[:depth]:
+        flat += (level.price, level.quantity)
+    return flat + [float('nan')] * (2 * depth - len(flat))
+
+
+class _Log:
+    """
+    Append-only record file of one instrument and kind
+    """
+
+    def __init__(self, path, kind, depth):
+        self.kind = kind
+        self.depth = depth
+        self.struct = {TICKER: TICKER_RECORD, TRADE: TRADE_RECORD}.get(kind) or book_record(depth)
+        self.last_time = None
+        # ids of the trades at last_time, to skip trades of overlapping responses
+        self.last_ids = set()
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER.size
+        self.file = open(path, 'ab+')
+        if exists:
+            self.file.seek(0)
+            magic, _, code, depth, size = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC or _CODE_KINDS.get(code) != kind or size != self.struct.size:
+                raise ValueError(f"{path} is not a {kind} log of book depth {self.depth}")
+            self._read_last(self.file.seek(0, os.SEEK_END))
+        else:
+            self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, _KIND_CODES[kind], depth, self.struct.size))
+
+    def _read_last(self, end):
+        # last timestamp of the log, and the ids of the trades at it
+        while end >= HEADER.size + self.struct.size:
+            end -= self.struct.size
+            self.file.seek(end)
+            timestamp, id = struct.unpack_from('<qq', self.file.read(self.struct.size))
+            if self.last_time is not None and timestamp != self.last_time:
+                break
+            self.last_time = timestamp
+            if self.kind != TRADE:
+                break
+            self.last_ids.add(id)
+
+    def append(self, timestamp, values, id=None):
+        """
+        @return: False if the record is older than the last one, or the same trade
+        """
+        if self.last_time is not None and timestamp <= self.last_time:
+            if timestamp < self.last_time or id is None or id in self.last_ids:
+                return False
+        else:
+            self.last_time = timestamp
+            self.last_ids.clear()
+        if id is not None:
+            self.last_ids.add(id)
+        self.file.write(self.struct.pack(timestamp, *values))
+        return True
+
+    def close(self):
+        self.file.close()
+
+
+class Recorder:
+    """
+    Appends the tickers, trades and order books a client receives to fixed-width binary logs,
+    one per instrument and kind in `directory`:
+
+        recorder = Recorder('market-data')
+        api = CryptoComApi(recorder=recorder)
+        ...
+        recorder.close()
+
+    Records older than the last one of their log are skipped, so repeated polls only add what
+    is new. Tickers take 64 bytes, trades 40 and books 8 + 32 x depth bytes.
+    """
+
+    def __init__(self, directory, book_depth=DEFAULT_BOOK_DEPTH, kinds=KINDS):
+        """
+        @param book_depth: levels per side kept of every book
+        @param kinds: kinds recorded, any of 'ticker', 'trade', 'book'
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.book_depth = book_depth
+        self.kinds = set(kinds)
+        self.logs = {}
+        self.written = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def _log(self, instrument_name, kind):
+        log = self.logs.get((instrument_name, kind))
+        if log is None:
+            path = os.path.join(self.directory, f'{instrument_name}.{kind}.bin')
+            log = self.logs[(instrument_name, kind)] = _Log(path, kind, self.book_depth)
+        return log
+
+    def _append(self, instrument_name, kind, timestamp, values, id=None):
+        if not instrument_name:
+            return
+        if self._log(instrument_name, kind).append(timestamp or current_timestamp(), values, id):
+            self.written += 1
+        else:
+            self.skipped += 1
+
+    def on_result(self, decoder, result, version, param=None):
+        """
+        Records the result of a CryptoComApi call, the payload kind is its decoder name
+        """
+        kind = RECORDED.get(decoder)
+        if kind is None or kind not in self.kinds or not result:
+            return
+        with self._lock:
+            if kind == TICKER:
+                for t in records.decode_tickers(result, version, param):
+                    self._append(t.instrument_name, TICKER, t.timestamp, [
+                        _number(v) for v in (t.bid, t.ask, t.last, t.high, t.low, t.volume, t.change)])
+            elif kind == TRADE:
+                # responses are newest first
+                trades = records.decode_trades(result, version, param)
+                for t, trade_id in sorted(((t, _trade_id(t.trade_id)) for t in trades),
+                                          key=lambda pair: (pair[0].timestamp or 0, pair[1])):
+                    side = 1 if t.side in ('BUY', 'buy') else -1
+                    # trades are told apart by the stored id, the same after the log is reopened
+                    self._append(t.instrument_name, TRADE, t.timestamp,
+                                 [trade_id, _number(t.price), _number(t.quantity), side], id=trade_id)
+            else:
+                book = records.decode_book(result, version, param)
+                self._append(book.instrument_name, BOOK, book.timestamp,
+                             _levels(book.bids, self.book_depth) + _levels(book.asks, self.book_depth))
+
+    def flush(self):
+        with self._lock:
+            for log in self.logs.values():
+                log.file.flush()
+
+    def close(self):
+        with self._lock:
+            for log in self.logs.values():
+                log.close()
+            self.logs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReplayLog:
+    """
+    Memory-mapped record file, records are found by timestamp in O(log n)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        name = os.path.basename(path)
+        self.instrument_name, self.kind = name.split('.')[:2]
+        with open(path, 'rb') as f:
+            magic, _, code, self.depth, size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or _CODE_KINDS.get(code) != self.kind:
+                raise ValueError(f"{path} is not a record log")
+            length = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if length else None
+        self.struct = {TICKER: TICKER_RECORD, TRADE: TRADE_RECORD}.get(self.kind) or book_record(self.depth)
+        self.count = (length - HEADER.size) // size
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views of it are still in use, it is unmapped when the last one is released
+                pass
+
+    def timestamp(self, i):
+        return struct.unpack_from('<q', self._mmap, HEADER.size + i * self.struct.size)[0]
+
+    def bisect(self, timestamp):
+        """
+        @return: index of the first record at or after the timestamp
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start=None, end=None):
+        """
+        @return: (first, stop) indexes of the records in [start, end)
+        """
+        first = 0 if start is None else self.bisect(start)
+        stop = self.count if end is None else self.bisect(end)
+        return first, max(first, stop)
+
+    def record(self, i):
+        """
+        @return: the i-th record as a cryptocom.records Ticker, Trade or Book
+        """
+        values = self.struct.unpack_from(self._mmap, HEADER.size + i * self.struct.size)
+        if self.kind == TICKER:
+            return records.Ticker(self.instrument_name, *values[1:], values[0])
+        if self.kind == TRADE:
+            timestamp, trade_id, price, quantity, side = values
+            return records.Trade(self.instrument_name, str(trade_id), 'BUY' if side > 0 else 'SELL', price,
+                                 quantity, timestamp)
+        depth = self.depth
+        levels = values[1:]
+
+        def side(flat):
+            return [records.BookLevel(flat[j], flat[j + 1], None) for j in range(0, 2 * depth, 2)
+                    if flat[j] == flat[j]]
+        return records.Book(self.instrument_name, side(levels[:2 * depth]), side(levels[2 * depth:]), values[0])
+
+    def records(self, start=None, end=None):
+        first, stop = self.range(start, end)
+        for i in range(first, stop):
+            yield self.record(i)
+
+    def latest(self, timestamp=None):
+        """
+        @return: the last record at or before the timestamp, None if there is none
+        """
+        i = self.count if timestamp is None else self.bisect(timestamp + 1)
+        return self.record(i - 1) if i else None
+
+    def view(self, start=None, end=None):
+        """
+        @return: numpy structured array of the records in [start, end), a view of the mapped file
+        """
+        if np is None:
+            raise ImportError("ReplayLog.view requires numpy: pip install cryptocom[numpy]")
+        first, stop = self.range(start, end)
+        if self._mmap is None or first == stop:
+            return np.empty(0, dtype=record_dtype(self.kind, self.depth))
+        return np.frombuffer(self._mmap, dtype=record_dtype(self.kind, self.depth), count=stop - first,
+                             offset=HEADER.size + first * self.struct.size)
+
+
+class Replay:
+    """
+    Recorded market data of a Recorder directory, memory-mapped:
+
+        with Replay('market-data') as replay:
+            trades = replay.log('BTC_USDT', 'trade').view(start, end)
+            for kind, record in replay.events(start, end):
+                ...
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.logs = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.bin') and name.count('.') == 2:
+                log = ReplayLog(os.path.join(directory, name))
+                self.logs[(log.instrument_name, log.kind)] = log
+
+    def close(self):
+        for log in self.logs.values():
+            log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def instruments(self):
+        return sorted({instrument for instrument, _ in self.logs})
+
+    def log(self, instrument_name, kind):
+        return self.logs.get((instrument_name, kind))
+
+    def events(self, start=None, end=None, kinds=KINDS, instruments=None):
+        """
+        Yields (kind, record) of all logs in timestamp order
+        """
+        streams = []
+        for (instrument, kind), log in self.logs.items():
+            if kind in kinds and (instruments is None or instrument in instruments):
+                streams.append(((record.timestamp, kind, record) for record in log.records(start, end)))
+        for _, kind, record in heapq.merge(*streams, key=lambda event: event[0]):
+            yield kind, record
+
+
+class ReplayApi:
+    """
+    Stands in for the public market methods of CryptoComApi with recorded data: every call
+    returns the V2 result of the data at the replay clock, set with `at(timestamp)`. Data
+    is returned as the V2 API does, so code written against the client runs unchanged.
+
+        api = ReplayApi(Replay('market-data'))
+        for ts in range(start, end, 1000):
+            api.at(ts)
+            strategy.on_tick(api.ticker('BTC_USDT'), api.order_book('BTC_USDT'))
+    """
+
+    def __init__(self, replay, time=None, trades=200):
+        self.replay = replay
+        self.time = time
+        self.trade_count = trades
+
+    def at(self, timestamp):
+        self.time = timestamp
+        return self
+
+    def symbols(self, **kwargs):
+        return {'instruments': [{'instrument_name': name} for name in self.replay.instruments]}
+
+    @staticmethod
+    def _ticker(t):
+        return {'i': t.instrument_name, 'b': t.bid, 'k': t.ask, 'a': t.last, 'h': t.high, 'l': t.low, 'v': t.volume,
+                'c': t.change, 't': t.timestamp}
+
+    def tickers(self, param=None, **kwargs):
+        if param:
+            return self.ticker(param.get('instrument_name'))
+        data = []
+        for instrument in self.replay.instruments:
+            log = self.replay.log(instrument, TICKER)
+            ticker = log and log.latest(self.time)
+            if ticker is not None:
+                data.append(self._ticker(ticker))
+        return {'data': data}
+
+    def ticker(self, symbol, **kwargs):
+        log = self.replay.log(symbol, TICKER)
+        ticker = log and log.latest(self.time)
+        return {'data': [self._ticker(ticker)] if ticker is not None else []}
+
+    def trades(self, symbol, **kwargs):
+        log = self.replay.log(symbol, TRADE)
+        data = []
+        if log is not None:
+            stop = log.count if self.time is None else log.bisect(self.time + 1)
+            for i in range(stop - 1, max(-1, stop - 1 - self.trade_count), -1):
+                t = log.record(i)
+                data.append({'i': symbol, 'd': t.trade_id, 's': t.side, 'p': t.price, 'q': t.quantity,
+                             't': t.timestamp})
+        return {'instrument_name': symbol, 'data': data}
+
+    def order_book(self, symbol, _type=None, **kwargs):
+        log = self.replay.log(symbol, BOOK)
+        book = log and log.latest(self.time)
+        if book is None:
+            return {'instrument_name': symbol, 'depth': 0, 'data': []}
+        return {'instrument_name': symbol, 'depth': log.depth, 'data': [{
+            'bids': [[level.price, level.quantity, 1] for level in book.bids],
+            'asks': [[level.price, level.quantity, 1] for level in book.asks],
+            't': book.timestamp}]}
@@ -0,0 +1,139 @@
+from collections import namedtuple
+
+from .paginate import page_records
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
+
+# compact records of market and order payloads, used by CryptoComApi(decode='records'):
+# numeric fields are parsed and V1 and V2 field names are mapped to the same record
+Ticker = namedtuple('Ticker', 'instrument_name bid ask last high low volume change timestamp')
+Trade = namedtuple('Trade', 'instrument_name trade_id side price quantity timestamp')
+BookLevel = namedtuple('BookLevel', 'price quantity count')
+Book = namedtuple('Book', 'instrument_name bids asks timestamp')
+Order = namedtuple('Order', 'order_id client_oid instrument_name side type status price quantity filled_quantity '
+                            'avg_price create_time update_time')
+
+# payload field of every record field, per API version
+TICKER_FIELDS = {
+    'v1': ('symbol', 'buy', 'sell', 'last', 'high', 'low', 'vol', 'rose', 'time'),
+    'v2': ('i', 'b', 'k', 'a', 'h', 'l', 'v', 'c', 't'),
+}
+TRADE_FIELDS = {
+    'v1': (None, 'id', 'type', 'price', 'amount', 'ctime'),
+    'v2': ('i', 'd', 's', 'p', 'q', 't'),
+}
+ORDER_FIELDS = {
+    'v1': ('id', None, None, 'side', 'type', 'status', 'price', 'volume', 'deal_volume', 'avg_price',
+           'created_at', None),
+    'v2': ('order_id', 'client_oid', 'instrument_name', 'side', 'type', 'status', 'price', 'quantity',
+           'cumulative_quantity', 'avg_price', 'create_time', 'update_time'),
+}
+# conversion of every record field, None keeps the value as is
+TICKER_TYPES = (None, float, float, float, float, float, float, float, int)
+TRADE_TYPES = (None, str, None, float, float, int)
+ORDER_TYPES = (str, None, None, None, None, None, float, float, float, float, int, int)
+
+
+def _record(cls, fields, types, data, defaults=None):
+    values = []
+    for field, convert in zip(fields, types):
+        value = data.get(field) if field is not None else None
+        if value is None and defaults:
+            value = defaults.get(field)
+        if value is not None and convert is not None:
+            value = convert(value)
+        values.append(value)
+    return cls(*values)
+
+
+def _symbol(param):
+    return param and (param.get('instrument_name') or param.get('symbol'))
+
+
+def decode_tickers(result, version, param=None):
+    """
+    tickers() -> list of Ticker
+    """
+    fields = TICKER_FIELDS[version.value]
+    if version.value == 'v1':
+        if 'ticker' not in result:
+            # single market
+            return [_record(Ticker, fields, TICKER_TYPES, result, {'symbol': _symbol(param)})]
+        rows = result['ticker']
+    else:
+        rows = result.get('data') or []
+        if isinstance(rows, dict):
+            rows = [rows]
+    return [_record(Ticker, fields, TICKER_TYPES, row) for row in rows]
+
+
+def decode_ticker(result, version, param=None):
+    """
+    ticker() -> Ticker, None if not found
+    """
+    tickers = decode_tickers(result, version, param)
+    return tickers[0] if tickers else None
+
+
+def decode_trades(result, version, param=None):
+    """
+    trades() -> list of Trade
+    """
+    fields = TRADE_FIELDS[version.value]
+    rows = result if isinstance(result, list) else result.get('data') or []
+    trades = [_record(Trade, fields, TRADE_TYPES, row) for row in rows]
+    if version.value == 'v1':
+        symbol = _symbol(param)
+        trades = [trade._replace(instrument_name=symbol) for trade in trades]
+    return trades
+
+
+def _levels(levels):
+    return [BookLevel(float(level[0]), float(level[1]), int(level[2]) if len(level) > 2 else None)
+            for level in levels or []]
+
+
+def decode_book(result, version, param=None):
+    """
+    order_book() -> Book, bids and asks as lists of BookLevel from the best level on
+    """
+    if version.value == 'v1':
+        book = result.get('tick') or {}
+        return Book(_symbol(param), _levels(book.get('bids')), _levels(book.get('asks')), book.get('time'))
+    data = result.get('data') or [{}]
+    book = data[0]
+    return Book(result.get('instrument_name') or _symbol(param), _levels(book.get('bids')),
+                _levels(book.get('asks')), book.get('t'))
+
+
+def decode_orders(result, version, param=None):
+    """
+    open_orders(), all_orders() -> list of Order
+    """
+    fields = ORDER_FIELDS[version.value]
+    return [_record(Order, fields, ORDER_TYPES, row) for row in page_records(result)]
+
+
+def decode_order(result, version, param=None):
+    """
+    show_order() -> Order
+    """
+    order_info = result.get('order_info')
+    if not order_info:
+        return None
+    return _record(Order, ORDER_FIELDS[version.value], ORDER_TYPES, order_info)
+
+
+DECODERS = {
+    'tickers': decode_tickers,
+    'ticker': decode_ticker,
+    'trades': decode_trades,
+    'book': decode_book,
+    'orders': decode_orders,
+    'order': decode_order,
+}
@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from time import monotonic, sleep
+
+from .result import ApiResult, skipped
+
+logger = logging.getLogger('cryptocom_api')
+
+# HTTP statuses and V2 response codes worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_STATUSES = {429}
+# SYS_ERROR, TOO_MANY_REQUESTS, INVALID_NONCE (the request is signed again), ERR_INTERNAL
+RETRY_CODES = {10001, 10006, 10007, 50001}
+RATE_LIMIT_CODES = {10006}
+
+# order creation is not idempotent, it is only retried when every order has a client_oid
+CREATE_ORDER_PATHS = {'order', 'private/create-order', 'private/create-order-list'}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def retry_safe(path, params):
+    """
+    @return: True if the private call can be sent again without the risk of a duplicate order
+    """
+    if path not in CREATE_ORDER_PATHS:
+        return True
+    if 'order_list' in params:
+        return all(order.get('client_oid') for order in params['order_list'])
+    return bool(params.get('client_oid'))
+
+
+def exception_result(e, elapsed=0.0):
+    return ApiResult(None, None, None, None, elapsed, {'exception': repr(e)}, None)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures, calls then fail fast for `reset_timeout`
+    seconds, after which one trial call is let through: its success closes the breaker,
+    its failure opens it again
+    """
+
+    def __init__(self, threshold=5, reset_timeout=10.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and monotonic() - self._opened >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True
+            # open, or half open with the trial call in flight
+            return False
+
+    def record(self, failed):
+        with self._lock:
+            if not failed:
+                self.state = CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit breaker opened after {self.failures} failures")
+                self.state = OPEN
+                self._opened = monotonic()
+
+    def release(self):
+        """
+        Ends a call that got no result, ex. cancelled: a trial call in flight opens the breaker again,
+        so another trial is let through after `reset_timeout`
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self._opened = monotonic()
+
+
+class Resilience:
+    """
+    Retries, deadlines, hedged requests and circuit breakers around the requests of a client,
+    shared by any number of clients like a RateLimiter:
+
+        api = CryptoComApi(key, secret, resilience=Resilience(retries=3, deadline=5, hedge_after=0.3))
+
+    Failed attempts with a retryable HTTP status or response code, or a transport exception, are
+    retried after a jittered exponential backoff, at least `rate_limit_delay` after a rate limit
+    error, as long as the next attempt can start before the deadline. Each attempt's timeout is
+    cut to the time left. Private calls are signed again for every attempt, order creation is
+    only retried with client_oid set.
+
+    With hedge_after, a public GET that got no response within that many seconds is sent a second
+    time and the first response wins.
+
+    A circuit breaker per endpoint group (see cryptocom.ratelimit) counts transport exceptions and
+    5xx responses: while it is open calls are skipped with the error {'circuit_open': group}.
+    """
+
+    def __init__(self, retries=2, backoff=0.1, max_backoff=5.0, rate_limit_delay=1.0, deadline=None,
+                 hedge_after=None, breaker_threshold=5, breaker_reset=10.0, hedge_workers=8):
+        """
+        @param retries: max attempts after the first one
+        @param backoff: base delay in seconds, doubled per attempt up to max_backoff, a random part of it is waited
+        @param deadline: (optional) seconds a call, all of its attempts included, may take
+        @param hedge_after: (optional) seconds after which a public GET is sent a second time
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limit_delay = rate_limit_delay
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.breakers = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=hedge_workers) if hedge_after is not None else None
+
+        self.calls = 0
+        self.retried = 0
+        self.hedged = 0
+        self.short_circuited = 0
+
+    def breaker(self, group):
+        with self._lock:
+            breaker = self.breakers.get(group)
+            if breaker is None:
+                breaker = self.breakers[group] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return breaker
+
+    @staticmethod
+    def retryable(result):
+        if result.http_status is None:
+            return 'exception' in result.error
+        if result.http_status in RETRY_STATUSES:
+            return True
+        return result.http_status == 200 and result.code is not None and int(result.code) in RETRY_CODES
+
+    @staticmethod
+    def failed(result):
+        """
+        @return: True if the result counts as a failure of the exchange for the circuit breaker
+        """
+        if result.http_status is None:
+            return 'exception' in result.error
+        return result.http_status >= 500
+
+    def delay(self, attempt, result):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if result.http_status in RATE_LIMIT_STATUSES or (
+                result.code is not None and int(result.code) in RATE_LIMIT_CODES):
+            delay = max(delay, self.rate_limit_delay)
+        return delay
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def _start(self, group):
+        """
+        @return: (breaker, deadline as monotonic time or None), None if the breaker is open
+        """
+        breaker = self.breaker(group)
+        with self._lock:
+            self.calls += 1
+        if not breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            return None
+        return breaker, monotonic() + self.deadline if self.deadline is not None else None
+
+    def _next_delay(self, attempt, result, retry, deadline):
+        """
+        @return: seconds to wait before the next attempt, None if the result is final
+        """
+        if result.ok or not retry or attempt >= self.retries or not self.retryable(result):
+            return None
+        delay = self.delay(attempt, result)
+        if deadline is not None and monotonic() + delay >= deadline:
+            return None
+        with self._lock:
+            self.retried += 1
+        logger.debug(f"Retrying after {result.error}, attempt {attempt + 2} in {delay * 1000:.0f}ms")
+        return delay
+
+    @staticmethod
+    def _timeout(deadline):
+        return None if deadline is None else max(0.001, deadline - monotonic())
+
+    @staticmethod
+    def _outcome(attempt, timeout):
+        # the exception is kept to be raised if it ends up the final outcome
+        try:
+            return attempt(timeout), None
+        except Exception as e:
+            return exception_result(e), e
+
+    def call(self, group, attempt, retry=True, hedge=False):
+        """
+        @param attempt: called with the timeout of the attempt (None for the client's default), returns an ApiResult
+        @param retry: False for calls that must not be sent twice
+        @param hedge: hedge the call, only for idempotent calls
+        """
+        start = self._start(group)
+        if start is None:
+            return skipped({'circuit_open': group})
+        breaker, deadline = start
+
+        for n in range(self.retries + 1):
+            if n and not breaker.allow():
+                # opened by the previous attempts, their last result is returned
+                break
+            timeout = self._timeout(deadline)
+            try:
+                if hedge and self._pool is not None:
+                    result, error = self._hedged(attempt, timeout)
+                else:
+                    result, error = self._outcome(attempt, timeout)
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record(self.failed(result))
+            delay = self._next_delay(n, result, retry, deadline)
+            if delay is None:
+                break
+            sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    def _hedged(self, attempt, timeout):
+        futures = [self._pool.submit(self._outcome, attempt, timeout)]
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done:
+            with self._lock:
+                self.hedged += 1
+            futures.append(self._pool.submit(self._outcome, attempt, timeout))
+        return self._first_response(futures)
+
+    @staticmethod
+    def _first_response(futures):
+        pending = set(futures)
+        outcome = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome = future.result()
+                if outcome[1] is None:
+                    return outcome
+        # every attempt raised
+        return outcome
+
+    async def call_async(self, group, attempt, retry=True, hedge=False):
+        """
+        Awaitable version of call(), `attempt` returns an awaitable
+        """
+        start = self._start(group)
+        if start is None:
+            return skipped({'circuit_open': group})
+        breaker, deadline = start
+
+        for n in range(self.retries + 1):
+            if n and not breaker.allow():
+                # opened by the previous attempts, their last result is returned
+                break
+            timeout = self._timeout(deadline)
+            try:
+                if hedge and self.hedge_after is not None:
+                    result, error = await self._hedged_async(attempt, timeout)
+                else:
+                    result, error = await self._outcome_async(attempt, timeout)
+            except BaseException:
+                # cancelled, the attempt has no result
+                breaker.release()
+                raise
+            breaker.record(self.failed(result))
+            delay = self._next_delay(n, result, retry, deadline)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    @staticmethod
+    async def _outcome_async(attempt, timeout):
+        try:
+            return await attempt(timeout), None
+        except Exception as e:
+            return exception_result(e), e
+
+    async def _hedged_async(self, attempt, timeout):
+        tasks = [asyncio.ensure_future(self._outcome_async(attempt, timeout))]
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+        if not done:
+            with self._lock:
+                self.hedged += 1
+            tasks.append(asyncio.ensure_future(self._outcome_async(attempt, timeout)))
+        pending = set(tasks)
+        outcome = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcome = task.result()
+                    if outcome[1] is None:
+                        return outcome
+            return outcome
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'retried': self.retried,
+            'hedged': self.hedged,
+            'short_circuited': self.short_circuited,
+            'breakers': {group: breaker.state for group, breaker in self.breakers.items()},
+        }
@@ -0,0 +1,36 @@
+from collections import namedtuple
+
+
+class ApiResult(namedtuple('ApiResult', 'result code message http_status elapsed error response')):
+    """
+    Immutable outcome of a single API call
+
+    result: the 'data' (V1) / 'result' (V2) part of the response, None if the call failed
+    code, message: API response code and message
+    http_status: HTTP status code, None if no request was sent
+    elapsed: seconds spent on the HTTP request
+    error: None on success, otherwise the dict CryptoComApi.error is set to in the attribute based mode
+    response: the whole decoded response body
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def skipped(error):
+    """
+    Result of a call that was not sent to the exchange
+    """
+    return ApiResult(None, None, None, None, 0.0, error, None)
+
+
+class ApiError(Exception):
+    """
+    Raised by helpers that can not return an error result, ex. paginators, the failed ApiResult is in `result`
+    """
+
+    def __init__(self, result):
+        super().__init__(f"API call failed: {result.error}")
+        self.result = result
@@ -0,0 +1,306 @@
+import asyncio
+import inspect
+import json
+import logging
+from collections import namedtuple
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from .api import current_timestamp
+
+logger = logging.getLogger('cryptocom_api')
+
+MARKET_STREAM_URL = "wss://stream.crypto.com/v2/market"
+USER_STREAM_URL = "wss://stream.crypto.com/v2/user"
+
+# what to do with a message that does not fit into a full queue
+BLOCK = 'block'              # wait for the consumer, the connection is not read meanwhile
+DROP_OLDEST = 'drop_oldest'  # discard the oldest queued message
+DROP_NEWEST = 'drop_newest'  # discard the incoming message
+
+StreamMessage = namedtuple('StreamMessage', 'channel subscription instrument_name data')
+
+_CLOSED = object()
+
+
+def ticker_channel(symbol):
+    return f"ticker.{symbol}"
+
+
+def book_channel(symbol, depth=10):
+    return f"book.{symbol}.{depth}"
+
+
+def trade_channel(symbol):
+    return f"trade.{symbol}"
+
+
+def user_order_channel(symbol=None):
+    return f"user.order.{symbol}" if symbol else "user.order"
+
+
+def user_trade_channel(symbol=None):
+    return f"user.trade.{symbol}" if symbol else "user.trade"
+
+
+def user_balance_channel():
+    return "user.balance"
+
+
+class MarketStream:
+    """
+    Subscriber of the V2 market data WebSocket, any number of channels share one connection.
+    Heartbeats are answered, and after a disconnect the stream reconnects and resubscribes.
+
+        async with MarketStream() as stream:
+            await stream.subscribe(ticker_channel('BTC_USDT'), book_channel('ETH_USDT'))
+            async for message in stream:
+                print(message.channel, message.instrument_name, message.data)
+
+    Messages are also passed to callbacks registered with add_callback().
+    """
+
+    def __init__(self, url=MARKET_STREAM_URL, queue_size=1000, overflow=DROP_OLDEST, connect_delay=1.0,
+                 heartbeat_timeout=60, reconnect_delay=1, max_reconnect_delay=30):
+        """
+        @param queue_size: max number of messages waiting for the async iterator
+        @param overflow: BLOCK, DROP_OLDEST or DROP_NEWEST, policy for messages that do not fit into the queue
+        @param connect_delay: seconds to wait after connecting before subscribing, as advised by the exchange \\
+                              to not get rate limited on the first requests
+        @param heartbeat_timeout: reconnect if nothing (not even a heartbeat) was received for this many seconds
+        @param reconnect_delay: first delay between reconnects, doubled up to max_reconnect_delay
+        """
+        if websockets is None:
+            raise ImportError("MarketStream requires websockets: pip install cryptocom[stream]")
+        if overflow not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        self.url = url
+        self.overflow = overflow
+        self.connect_delay = connect_delay
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.channels = set()
+        self.callbacks = []
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+        self.received = 0
+        self.dropped = 0
+        self.invalid = 0
+        self.reconnects = 0
+
+        self._id = 0
+        self._ws = None
+        self._task = None
+        self._running = False
+        self._closed = False
+        self.connected = asyncio.Event()
+
+    def add_callback(self, callback, channel=None):
+        """
+        @param callback: function or coroutine function called with every StreamMessage
+        @param channel: (optional) only call it for this channel, ex. 'ticker' or 'book'
+        """
+        self.callbacks.append((callback, channel))
+
+    async def subscribe(self, *channels):
+        new = [c for c in channels if c not in self.channels]
+        self.channels.update(new)
+        if new and self.connected.is_set():
+            await self._send('subscribe', {'channels': new})
+
+    async def unsubscribe(self, *channels):
+        old = [c for c in channels if c in self.channels]
+        self.channels.difference_update(old)
+        if old and self.connected.is_set():
+            await self._send('unsubscribe', {'channels': old})
+
+    def start(self):
+        if self._task is None:
+            self._running = True
+            self._closed = False
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def close(self):
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            # the task may be blocked on a full queue with the BLOCK policy
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._closed = True
+        # wakes up a consumer waiting on an empty queue, queued messages are kept
+        if not self.queue.full():
+            self.queue.put_nowait(_CLOSED)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed and self.queue.empty():
+            raise StopAsyncIteration
+        message = await self.queue.get()
+        if message is _CLOSED:
+            raise StopAsyncIteration
+        return message
+
+    async def run(self):
+        """
+        Keeps the connection open until close(), reconnecting and resubscribing after failures
+        """
+        self._running = True
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    self._ws = ws
+                    delay = self.reconnect_delay
+                    await self._on_connect()
+                    while self._running:
+                        raw = await asyncio.wait_for(ws.recv(), self.heartbeat_timeout)
+                        await self._receive(raw)
+            except asyncio.TimeoutError:
+                logger.warning(f"No message from {self.url} in {self.heartbeat_timeout}s, reconnecting")
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                if self._running:
+                    logger.warning(f"Stream {self.url} disconnected: {e!r}")
+            except Exception as e:
+                logger.exception(f"Stream {self.url} failed, reconnecting: {e!r}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+
+            if self._running:
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _on_connect(self):
+        if self.connect_delay:
+            await asyncio.sleep(self.connect_delay)
+        await self._authenticate()
+        if self.channels:
+            await self._send('subscribe', {'channels': sorted(self.channels)})
+        self.connected.set()
+
+    async def _authenticate(self):
+        # the market data channels are public
+        pass
+
+    async def _send(self, method, params=None, id=None):
+        if id is None:
+            self._id += 1
+            id = self._id
+        message = {'id': id, 'method': method, 'nonce': current_timestamp()}
+        if params is not None:
+            message['params'] = params
+        await self._ws.send(json.dumps(message))
+
+    async def _receive(self, raw):
+        # a malformed message is skipped, the connection stays open
+        try:
+            await self._handle(raw)
+        except (OSError, websockets.exceptions.WebSocketException):
+            raise
+        except Exception as e:
+            self.invalid += 1
+            logger.warning(f"Stream {self.url} message skipped: {e!r}, {raw[:200]!r}")
+
+    async def _handle(self, raw):
+        message = json.loads(raw)
+        method = message.get('method')
+
+        if method == 'public/heartbeat':
+            await self._send('public/respond-heartbeat', id=message.get('id'))
+            return
+
+        if message.get('code'):
+            logger.warning(f"Stream error response: {message}")
+            return
+
+        result = message.get('result')
+        if not result or 'data' not in result:
+            return
+
+        self.received += 1
+        parsed = StreamMessage(result.get('channel'), result.get('subscription'), result.get('instrument_name'),
+                               result['data'])
+        await self._deliver(parsed)
+
+    async def _deliver(self, message):
+        for callback, channel in self.callbacks:
+            if channel is not None and channel != message.channel:
+                continue
+            try:
+                r = callback(message)
+                if inspect.isawaitable(r):
+                    await r
+            except Exception as e:
+                logger.error(f"Stream callback {callback!r} failed: {e!r}")
+
+        if self.overflow == BLOCK:
+            await self.queue.put(message)
+        else:
+            self._put_nowait(message)
+
+    def _put_nowait(self, message):
+        if self.queue.full():
+            if self.overflow == DROP_NEWEST:
+                self.dropped += 1
+                return
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class UserStream(MarketStream):
+    """
+    Subscriber of the V2 user WebSocket, authenticated with the key of a CryptoComApi client on
+    every (re)connect before the channels are subscribed:
+
+        async with UserStream(api) as stream:
+            await stream.subscribe(user_order_channel(), user_trade_channel(), user_balance_channel())
+            async for message in stream:
+                ...
+    """
+
+    def __init__(self, api, url=USER_STREAM_URL, **kwargs):
+        """
+        @param api: CryptoComApi of ApiVersion.V2 with a key and secret, it signs the public/auth request
+        @param kwargs: see MarketStream
+        """
+        super().__init__(url, **kwargs)
+        self.api = api
+
+    async def _authenticate(self):
+        request = self.api.stream_auth_request()
+        await self._ws.send(json.dumps(request))
+        while True:
+            raw = await asyncio.wait_for(self._ws.recv(), self.heartbeat_timeout)
+            message = json.loads(raw)
+            if message.get('method') != 'public/auth':
+                # heartbeats sent before the response
+                await self._receive(raw)
+                continue
+            if message.get('code'):
+                # reconnected with a delay by run()
+                raise ConnectionError(f"Authentication failed: {message.get('code')} {message.get('message')}")
+            return
@@ -0,0 +1,264 @@
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# prices of the conversion rates: the mid price, the bid when selling and the ask when buying (what a
+# conversion would get at the top of the book), or the last trade price
+MID = 'mid'
+TOP = 'top'
+LAST = 'last'
+
+# hops of the longest conversion path searched, ex. 3: XYZ -> CRO -> BTC -> USDT
+MAX_HOPS = 4
+
+BIDS = 'bids'
+ASKS = 'asks'
+
+# values: {currency: value in the target currency}, unpriced: currencies held without a conversion path
+Valuation = namedtuple('Valuation', 'target total values unpriced')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("cryptocom.valuation requires numpy: pip install cryptocom[numpy]")
+
+
+def _ticker_rows(tickers):
+    """
+    @return: [(instrument_name, bid, ask, last, volume)] of a V2 or V1 tickers() result or a list of records.Ticker
+    """
+    if isinstance(tickers, dict):
+        if 'ticker' in tickers:
+            return [(row.get('symbol'), row.get('buy'), row.get('sell'), row.get('last'), row.get('vol'))
+                    for row in tickers['ticker']]
+        rows = tickers.get('data') or []
+        if isinstance(rows, dict):
+            rows = [rows]
+        return [(row.get('i'), row.get('b'), row.get('k'), row.get('a'), row.get('v')) for row in rows]
+    return [(t.instrument_name, t.bid, t.ask, t.last, t.volume) for t in tickers]
+
+
+def _symbol_pairs(symbols):
+    """
+    @return: {market name: (base, quote)} of a V1 symbols() result, V1 market names have no separator, ex. 'crobtc'
+    """
+    return {s['symbol'].lower(): (s['base_coin'].upper(), s['count_coin'].upper()) for s in symbols or []}
+
+
+def balances(balance):
+    """
+    @return: {currency: total amount} of a V2 or V1 balance() result
+    """
+    if 'accounts' in balance:
+        return {a['currency']: float(a.get('balance') or 0) for a in balance['accounts']}
+    return {c['coin'].upper(): float(c.get('normal') or 0) + float(c.get('locked') or 0)
+            for c in balance.get('coin_list') or []}
+
+
+class RateTable:
+    """
+    Conversion graph of all currencies of one tickers() result: every instrument BASE_QUOTE
+    is an edge both ways. The rates of all currencies to a target are resolved together, one
+    hop of the whole graph per numpy step, the most traded instrument wins where several
+    paths of the same length exist:
+
+        table = RateTable(api.tickers())
+        table.rate('CRO', 'USDT')
+        table.value(balances(api.balance()), 'USDT').total
+
+    The V1 market names do not separate the currencies, so V1 tickers need the V1 symbols():
+
+        table = RateTable(api.tickers(), symbols=api.symbols())
+    """
+
+    def __init__(self, tickers, price=MID, symbols=None):
+        """
+        @param tickers: V2 or V1 tickers() result, or the list of records.Ticker of decode='records'
+        @param price: MID, TOP or LAST
+        @param symbols: V1 symbols() result, required with V1 tickers
+        """
+        _require_numpy()
+        if price not in (MID, TOP, LAST):
+            raise ValueError(f"Unknown price: {price}")
+        if isinstance(tickers, dict) and 'ticker' in tickers and not symbols:
+            raise ValueError("V1 tickers require the V1 symbols() result to split the market names")
+        self.price = price
+
+        symbol_pairs = _symbol_pairs(symbols)
+        rows, pairs = [], []
+        for row in _ticker_rows(tickers):
+            name = row[0]
+            if not name:
+                continue
+            pair = symbol_pairs.get(name.lower()) if symbol_pairs else None
+            if pair is None and '_' in name:
+                pair = name.split('_', 1)
+            if pair is not None:
+                rows.append(row)
+                pairs.append(pair)
+        # None prices become nan
+        bid, ask, last, volume = np.array([row[1:] for row in rows], dtype='f8').reshape(-1, 4).T
+        self.index = {}
+        ends = np.array([self.index.setdefault(currency, len(self.index))
+                         for currency in [base for base, _ in pairs] + [quote for _, quote in pairs]], dtype='i8')
+        self.currencies = list(self.index)
+
+        if price == MID:
+            sell = buy = (bid + ask) / 2
+        elif price == TOP:
+            sell, buy = bid, ask
+        else:
+            sell = buy = last
+        base, quote = ends[:len(rows)], ends[len(rows):]
+        # edge src -> dst: 1 src is worth `rate` dst, base -> quote sells the base, quote -> base buys it
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.concatenate((sell, 1 / buy))
+        volume = np.nan_to_num(np.tile(volume, 2))
+        usable = np.isfinite(rate) & (rate > 0)
+        self._src = np.concatenate((base, quote))[usable]
+        self._dst = np.concatenate((quote, base))[usable]
+        self._rate = rate[usable]
+        # edges sorted by source, then volume, for picking the most traded edge per source
+        order = np.lexsort((volume[usable], self._src))
+        self._src, self._dst, self._rate = self._src[order], self._dst[order], self._rate[order]
+        self._cache = {}
+
+    def rates(self, target, max_hops=MAX_HOPS):
+        """
+        @return: float array of the value of 1 unit of every currency of self.currencies in the target currency, \
+                 nan for currencies without a path of at most max_hops
+        """
+        key = (target, max_hops)
+        if key in self._cache:
+            return self._cache[key]
+        rates = np.full(len(self.currencies), np.nan)
+        if target in self.index:
+            rates[self.index[target]] = 1.0
+        for _ in range(max_hops):
+            # edges from an unresolved currency to a resolved one
+            reach = np.isnan(rates[self._src]) & ~np.isnan(rates[self._dst])
+            if not reach.any():
+                break
+            src = self._src[reach]
+            values = self._rate[reach] * rates[self._dst[reach]]
+            # the last edge of each source is its most traded one
+            last = np.append(src[1:] != src[:-1], True)
+            rates[src[last]] = values[last]
+        self._cache[key] = rates
+        return rates
+
+    def rate(self, currency, target, max_hops=MAX_HOPS):
+        """
+        @return: value of 1 currency in target, None without a conversion path
+        """
+        if currency == target:
+            return 1.0
+        i = self.index.get(currency)
+        if i is None:
+            return None
+        rate = self.rates(target, max_hops)[i]
+        return None if np.isnan(rate) else float(rate)
+
+    def value(self, amounts, target='USDT', max_hops=MAX_HOPS):
+        """
+        @param amounts: {currency: amount}, ex. balances(api.balance())
+        @return: Valuation of the amounts in the target currency
+        """
+        rates = self.rates(target, max_hops)
+        currencies = [c for c in amounts if c in self.index or c == target]
+        unpriced = [c for c in amounts if c not in self.index and c != target]
+        # the target is worth 1 even if no instrument trades it
+        lookup = np.append(rates, 1.0)
+        index = np.array([self.index.get(c, len(rates)) for c in currencies], dtype='i8')
+        values = np.array([amounts[c] for c in currencies], dtype='f8') * lookup[index]
+        priced = ~np.isnan(values)
+        unpriced += [c for c, ok in zip(currencies, priced) if not ok]
+        return Valuation(target, float(values[priced].sum()),
+                         {c: float(v) for c, v, ok in zip(currencies, values, priced) if ok}, unpriced)
+
+
+def valuation(tickers, balance, target='USDT', price=MID, symbols=None):
+    """
+    @param tickers: tickers() result
+    @param balance: balance() result
+    @param symbols: V1 symbols() result, required with V1 tickers
+    @return: Valuation of all balances in the target currency
+    """
+    return RateTable(tickers, price, symbols).value(balances(balance), target)
+
+
+def _book_levels(book, side):
+    if isinstance(book, dict):
+        # V1 books are in 'tick', V2 books in 'data'
+        return (book['tick'] if 'tick' in book else (book.get('data') or [{}])[0]).get(side) or []
+    levels = getattr(book, side)
+    if np is not None and isinstance(levels, np.ndarray):
+        # cryptocom.columnar book
+        return levels
+    return [(level.price, level.quantity) for level in levels]
+
+
+def stack_books(books, side=ASKS, depth=None):
+    """
+    Stacks one side of many order books into two (books, depth) arrays, price and quantity from the
+    best level on, levels missing from shallower books are padded with nan price and 0 quantity
+
+    @param books: order_book() results (V2 or V1), records.Book or columnar.ColumnarBook, can be mixed
+    @param side: ASKS to estimate buys, BIDS to estimate sells
+    @param depth: (optional) levels kept per book, by default the deepest book's
+    """
+    _require_numpy()
+    sides = [_book_levels(book, side) for book in books]
+    depth = depth or max((len(levels) for levels in sides), default=0)
+    prices = np.full((len(sides), depth), np.nan)
+    quantities = np.zeros((len(sides), depth))
+
+    # the levels of all list books are converted by one numpy call and scattered into their rows
+    rows, counts, pairs = [], [], []
+    for i, levels in enumerate(sides):
+        n = min(depth, len(levels))
+        if isinstance(levels, np.ndarray):
+            prices[i, :n] = levels['price'][:n]
+            quantities[i, :n] = levels['quantity'][:n]
+        elif n:
+            rows.append(i)
+            counts.append(n)
+            pairs += [(level[0], level[1]) for level in levels[:n]]
+    if pairs:
+        values = np.array(pairs, dtype='f8')
+        counts = np.array(counts)
+        row = np.repeat(rows, counts)
+        column = np.arange(len(pairs)) - np.repeat(np.cumsum(counts) - counts, counts)
+        prices[row, column] = values[:, 0]
+        quantities[row, column] = values[:, 1]
+    return prices, quantities
+
+
+def vwap_for_size(prices, quantities, size):
+    """
+    Average price of market orders of `size` walking the stacked books, all books at once
+
+    @param size: quantity per book, a number or an array of one per book
+    @return: (vwap, filled) arrays, vwap of the filled part, filled < size where the book is too thin
+    """
+    size = np.broadcast_to(np.asarray(size, dtype='f8'), (prices.shape[0],))
+    before = np.cumsum(quantities, axis=1) - quantities
+    taken = np.clip(size[:, None] - before, 0, quantities)
+    filled = taken.sum(axis=1)
+    cost = np.where(taken > 0, taken * prices, 0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(filled > 0, cost / filled, np.nan), filled
+
+
+def slippage(prices, quantities, size):
+    """
+    @return: (slippage, filled) arrays, slippage is the relative cost of the vwap against the best price, \
+             positive for both sides: (vwap - best) / best for asks, (best - vwap) / best for bids
+    """
+    vwap, filled = vwap_for_size(prices, quantities, size)
+    best = prices[:, 0] if prices.shape[1] else np.full(prices.shape[0], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(vwap - best) / best, filled
@@ -27,6 +27,12 @@ setup(
     packages=["cryptocom"],
     include_package_data=True,
     install_requires=["requests", ],
+    extras_require={
+        "async": ["aiohttp"],
+        "stream": ["websockets"],
+        "fast": ["orjson"],
+        "numpy": ["numpy"],
+    },
     entry_points={
     },
 )
@@ -1,12 +1,20 @@
-import unittest
-from cryptocom.api import CryptoComApi
-
-
-class ApiV1TestCase(unittest.TestCase):
-    def setUp(self) -> None:
-        self.api = CryptoComApi(version=CryptoComApi.ApiVersion.V1)
-
-    def testTicker(self):
-        crobtc = self.api.ticker("crobtc")
-        print(crobtc)
-        self.fail()
+import unittest
+from cryptocom.api import CryptoComApi
+from cryptocom.mockserver import MockExchange
+from cryptocom.ratelimit import RateLimiter
+
+
+class ApiV1TestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.exchange = MockExchange().start()
+        self.api = CryptoComApi(version=CryptoComApi.ApiVersion.V1, api_root=self.exchange.root('v1'),
+                                rate_limiter=RateLimiter({}))
+
+    def tearDown(self) -> None:
+        self.api.close()
+        self.exchange.close()
+
+    def testTicker(self):
+        crobtc = self.api.ticker("crobtc")
+        self.assertEqual(crobtc['symbol'], 'crobtc')
+        self.assertGreater(float(crobtc['last']), 0)
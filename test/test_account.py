@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import unittest
+
+try:
+    import aiohttp
+    from cryptocom.aio import AsyncCryptoComApi
+except ImportError:
+    aiohttp = None
+
+try:
+    import websockets
+    from cryptocom.stream import UserStream, user_balance_channel, user_order_channel, user_trade_channel
+except ImportError:
+    websockets = None
+
+from cryptocom.account import BALANCE, FILL, ORDER, AccountState
+from cryptocom.api import CryptoComApi
+from cryptocom.mockserver import MockExchange
+from cryptocom.ratelimit import RateLimiter
+from cryptocom.stream import StreamMessage
+
+
+def order(order_id, status='ACTIVE', update_time=1000, instrument_name='BTC_USDT', client_oid=None):
+    return {'order_id': order_id, 'client_oid': client_oid or f'c{order_id}', 'instrument_name': instrument_name,
+            'side': 'BUY', 'status': status, 'price': 100, 'quantity': 1, 'update_time': update_time}
+
+
+class AccountStateTestCase(unittest.TestCase):
+    def testOrderUpdates(self):
+        state = AccountState()
+        updates = []
+        state.add_callback(updates.append, ORDER)
+        state.on_order(order('1'))
+        state.on_order(order('2', instrument_name='ETH_USDT'))
+        self.assertEqual(state.order_by_client_oid('c1')['order_id'], '1')
+        self.assertEqual([o['order_id'] for o in state.open_orders('BTC_USDT')], ['1'])
+        self.assertEqual(len(state.open_orders()), 2)
+
+        self.assertTrue(state.on_order(order('1', 'FILLED', 2000)))
+        # late updates do not reopen the order
+        self.assertFalse(state.on_order(order('1', 'ACTIVE', 1500)))
+        self.assertFalse(state.on_order(order('1', 'ACTIVE', 2000)))
+        self.assertEqual(state.order(1)['status'], 'FILLED')
+        self.assertEqual(state.open_orders('BTC_USDT'), [])
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(state.stats()['stale'], 2)
+
+    def testClosedOrdersForgotten(self):
+        state = AccountState(max_closed=2)
+        for i in range(4):
+            state.on_order(order(str(i), 'CANCELED'))
+        self.assertIsNone(state.order('0'))
+        self.assertIsNone(state.order_by_client_oid('c1'))
+        self.assertEqual(state.order('3')['status'], 'CANCELED')
+
+    def testFillsAndBalances(self):
+        state = AccountState()
+        fills, balances = [], []
+        state.add_callback(fills.append, FILL)
+        state.add_callback(balances.append, BALANCE)
+        state.on_order(order('1'))
+        trade = {'trade_id': 't1', 'order_id': '1', 'instrument_name': 'BTC_USDT', 'side': 'BUY',
+                 'traded_price': '100', 'traded_quantity': 0.5, 'fee': 0.01, 'fee_currency': 'BTC', 'create_time': 5}
+        state.on_stream_message(StreamMessage('user.trade', 'user.trade', 'BTC_USDT', [trade, trade]))
+        state.on_stream_message(StreamMessage('user.balance', 'user.balance', None, [
+            {'currency': 'USDT', 'balance': 100, 'available': 50, 'order': 50, 'stake': 0}]))
+        self.assertEqual(len(fills), 1)
+        self.assertEqual((fills[0].client_oid, fills[0].price, fills[0].quantity), ('c1', 100.0, 0.5))
+        self.assertEqual(state.balance('USDT')['available'], 50)
+        self.assertEqual(len(balances), 1)
+
+    def testSnapshotKeepsNewerUpdates(self):
+        state = AccountState()
+        state.on_order(order('1'))
+        state.on_order(order('2', update_time=3000))
+        missing = state.apply_snapshot([order('3')], [], as_of=2000)
+        # order 2 was updated after the snapshot was requested
+        self.assertEqual(missing, ['1'])
+        self.assertEqual(state.stats()['corrections'], 1)
+
+    def testSnapshotCallbacksRunWithoutLock(self):
+        state = AccountState()
+        state.on_order(order('1', update_time=500))
+        locked = []
+
+        def callback(value):
+            # an update applied by another thread from here would wait on the lock
+            locked.append(state._lock._is_owned())
+        state.add_callback(callback, ORDER)
+        state.add_callback(callback, BALANCE)
+        state.apply_snapshot([order('1', 'FILLED', 1500)], [{'currency': 'USDT', 'balance': 1}], as_of=2000)
+        self.assertEqual(locked, [False, False])
+        self.assertEqual(state.order('1')['status'], 'FILLED')
+
+
+class AccountSyncTestCase(unittest.TestCase):
+    def testSync(self):
+        with MockExchange() as exchange:
+            api = CryptoComApi(exchange.key, exchange.secret, api_root=exchange.root(),
+                               rate_limiter=RateLimiter({}), decode='records')
+            first = api.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, client_oid='first')
+            api.create_order('ETH_USDT', 'SELL', 'LIMIT', 2, 200, client_oid='second')
+            state = AccountState(api)
+            state.sync()
+            self.assertEqual(state.order_by_client_oid('second')['instrument_name'], 'ETH_USDT')
+            self.assertEqual(len(state.open_orders()), 2)
+            self.assertEqual(state.balance('USDT')['available'], 9000.0)
+
+            # cancelled without the stream noticing
+            api.cancel_order('BTC_USDT', first['order_id'])
+            state.sync()
+            self.assertEqual(state.order(first['order_id'])['status'], 'CANCELED')
+            self.assertEqual(len(state.open_orders()), 1)
+        with self.assertRaises(ValueError):
+            AccountState(CryptoComApi(version=CryptoComApi.ApiVersion.V1))
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class AccountAsyncSyncTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.exchange = MockExchange().start()
+        # built outside of the event loop
+        self.api = AsyncCryptoComApi(self.exchange.key, self.exchange.secret, api_root=self.exchange.root(),
+                                     rate_limiter=RateLimiter({}))
+        self.state = AccountState(self.api)
+
+    async def asyncTearDown(self):
+        await self.api.close()
+        self.exchange.close()
+
+    async def testSyncAsync(self):
+        order = await self.api.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, client_oid='async')
+        await self.state.sync_async()
+        self.assertEqual(self.state.order(order['order_id'])['client_oid'], 'async')
+        self.assertEqual(self.state.balance('USDT')['available'], 9000.0)
+
+
+class UserStandIn:
+    """
+    Local stand-in of the V2 user WebSocket: checks the public/auth signature, then answers
+    subscriptions with an order update, a fill and a balance
+    """
+
+    def __init__(self, key, secret):
+        self.key = key
+        self.secret = secret
+        self.authenticated = 0
+
+    async def handler(self, ws):
+        await ws.send(json.dumps({'id': 1, 'method': 'public/heartbeat', 'code': 0}))
+        async for raw in ws:
+            message = json.loads(raw)
+            if message['method'] == 'public/auth':
+                payload = f"public/auth{message['id']}{message['api_key']}{message['nonce']}"
+                sig = hmac.new(self.secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+                ok = message['api_key'] == self.key and sig == message['sig']
+                await ws.send(json.dumps({'id': message['id'], 'method': 'public/auth', 'code': 0 if ok else 10002}))
+                if not ok:
+                    await ws.close()
+                    return
+                self.authenticated += 1
+            elif message['method'] == 'subscribe':
+                for channel, data in [
+                        ('user.order', order('9', 'FILLED', 5000)),
+                        ('user.trade', {'trade_id': 't9', 'order_id': '9', 'traded_price': 100,
+                                        'traded_quantity': 1}),
+                        ('user.balance', {'currency': 'BTC', 'balance': 1, 'available': 1})]:
+                    await ws.send(json.dumps({'method': 'subscribe', 'result': {
+                        'channel': channel, 'subscription': channel, 'data': [data]}}))
+
+
+@unittest.skipIf(websockets is None, "websockets is not installed")
+class UserStreamTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.stand_in = UserStandIn('key', 'secret')
+        self.server = await websockets.serve(self.stand_in.handler, '127.0.0.1', 0)
+        self.url = f'ws://127.0.0.1:{list(self.server.sockets)[0].getsockname()[1]}'
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def testStreamUpdatesState(self):
+        state = AccountState()
+        state.on_order(order('9'))
+        fills = []
+        state.add_callback(fills.append, FILL)
+        stream = UserStream(CryptoComApi('key', 'secret'), self.url, connect_delay=0)
+        stream.add_callback(state.on_stream_message)
+        async with stream:
+            await stream.subscribe(user_order_channel(), user_trade_channel(), user_balance_channel())
+            await asyncio.wait_for(stream.connected.wait(), 5)
+            while state.balance('BTC') is None:
+                await asyncio.sleep(0.01)
+        self.assertEqual(self.stand_in.authenticated, 1)
+        self.assertEqual(state.order('9')['status'], 'FILLED')
+        self.assertEqual(state.open_orders(), [])
+        self.assertEqual(fills[0].client_oid, 'c9')
+
+    async def testAuthenticationFailure(self):
+        stream = UserStream(CryptoComApi('key', 'wrong'), self.url, connect_delay=0, reconnect_delay=0.01)
+        async with stream:
+            while stream.reconnects < 2:
+                await asyncio.sleep(0.01)
+            self.assertFalse(stream.connected.is_set())
+        self.assertEqual(self.stand_in.authenticated, 0)
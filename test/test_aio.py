@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+
+from cryptocom.api import CryptoComApi
+from cryptocom.metrics import Metrics
+from cryptocom.resilience import Resilience
+
+try:
+    from aiohttp import web
+    from cryptocom.aio import AsyncCryptoComApi
+except ImportError:
+    web = None
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncApiTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+
+        async def ticker(request):
+            self.requests.append(dict(request.query))
+            name = request.query.get('instrument_name', 'BTC_USDT')
+            return web.json_response({'code': 0, 'result': {'data': [{'i': name, 'a': 1.5}]}})
+
+        async def summary(request):
+            body = await request.json()
+            self.requests.append(body)
+            return web.json_response({'code': 0, 'result': {'accounts': []}})
+
+        self.failures = 0
+
+        async def trades(request):
+            if self.failures:
+                self.failures -= 1
+                return web.json_response({}, status=503)
+            return web.json_response({'code': 0, 'result': {'data': []}})
+
+        app = web.Application()
+        app.router.add_get('/v2/public/get-ticker', ticker)
+        app.router.add_get('/v2/public/get-trades', trades)
+        app.router.add_post('/v2/private/get-account-summary', summary)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self.root = f'http://127.0.0.1:{port}/v2/'
+        self.api = AsyncCryptoComApi('key', 'secret', api_root=self.root)
+
+    async def asyncTearDown(self):
+        await self.api.close()
+        await self.runner.cleanup()
+
+    async def testConcurrentTickers(self):
+        names = [f'C{i}_USDT' for i in range(5)]
+        results = await asyncio.gather(*(self.api.ticker(name) for name in names))
+        self.assertEqual([r['data'][0]['i'] for r in results], names)
+
+    async def testSignedPostMatchesSyncSignature(self):
+        self.assertEqual(await self.api.balance(), {'accounts': []})
+        body = self.requests[-1]
+        sync = CryptoComApi('key', 'secret')
+        self.assertEqual(body['sig'], sync._sign(body['params'], method=body['method'], id=body['id'],
+                                                 nonce=body['nonce']))
+
+    async def testPublicOnlyPrivateCall(self):
+        api = AsyncCryptoComApi(api_root=self.root)
+        self.assertEqual(await api.balance(), {})
+        self.assertEqual(await api.klines('BTC_USDT', '1min'), {})
+        await api.close()
+
+    async def testMetrics(self):
+        metrics = Metrics()
+        api = AsyncCryptoComApi(api_root=self.root, metrics=metrics)
+        await api.tickers()
+        await api.close()
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['requests']['public/get-ticker']['get'], {'ok': 1})
+        self.assertGreater(snapshot['bytes_received']['public/get-ticker'], 0)
+
+    async def testResilienceRetries(self):
+        resilience = Resilience(retries=2, backoff=0)
+        api = AsyncCryptoComApi(api_root=self.root, resilience=resilience)
+        self.failures = 2
+        self.assertEqual(await api.trades('BTC_USDT'), {'data': []})
+        self.assertEqual(resilience.stats()['retried'], 2)
+        await api.close()
+
+    async def testResultsCopyBeforeFirstRequestSharesSession(self):
+        api = AsyncCryptoComApi(api_root=self.root)
+        results = api.with_results()
+        self.assertIsNone(api.session)
+        self.assertTrue((await results.ticker('BTC_USDT')).ok)
+        self.assertIs(api.session, results.session)
+        await api.close()
+        self.assertIsNone(results.session)
+
+    async def testFailedBatchKeepsOtherResults(self):
+        async def timeout():
+            raise asyncio.TimeoutError()
+
+        results = await self.api.with_results()._run_batches(
+            [(timeout, 2), (lambda: self.api.with_results().ticker('BTC_USDT'), 1)], 2)
+        self.assertEqual(len(results), 3)
+        self.assertEqual([r.ok for r in results], [False, False, True])
+        self.assertIn('TimeoutError', results[0].error['exception'])
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncApiOutsideLoopTestCase(unittest.TestCase):
+    def testWithResultsOutsideLoop(self):
+        api = AsyncCryptoComApi()
+        self.assertIsNone(api.with_results().session)
+
+    def testSyncContextManagerRejected(self):
+        with self.assertRaises(TypeError):
+            with AsyncCryptoComApi():
+                pass
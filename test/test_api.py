@@ -0,0 +1,139 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from cryptocom.api import CryptoComApi
+
+
+class SessionTestCase(unittest.TestCase):
+    def testOwnSessionClosed(self):
+        api = CryptoComApi()
+        self.assertIsInstance(api.session, requests.Session)
+        with mock.patch.object(api.session, 'close') as close:
+            with api:
+                pass
+        close.assert_called_once_with()
+
+    def testInjectedSessionNotClosed(self):
+        session = mock.Mock(spec=requests.Session)
+        with CryptoComApi(session=session) as api:
+            self.assertIs(api.session, session)
+        session.close.assert_not_called()
+
+    def testRequestsShareSession(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.return_value.status_code = 200
+        session.request.return_value.text = '{"code": 0, "result": {"data": []}}'
+        api = CryptoComApi(session=session, timeout=5, api_root='http://localhost/v2/')
+
+        self.assertEqual(api.tickers(), {'data': []})
+        session.request.assert_called_once_with('get', 'http://localhost/v2/public/get-ticker',
+                                                timeout=5, params=None)
+
+
+class ResultsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.response = self.session.request.return_value
+        self.response.status_code = 200
+        self.response.text = '{"code": 0, "message": "", "result": {"data": [1]}}'
+
+    def testResultObject(self):
+        api = CryptoComApi(session=self.session, return_results=True)
+        result = api.tickers()
+        self.assertTrue(result.ok)
+        self.assertEqual((result.result, result.code, result.http_status), ({'data': [1]}, 0, 200))
+        self.assertIsNone(api.response)
+
+        self.response.text = '{"code": 10003, "message": "IP_ILLEGAL"}'
+        result = api.tickers()
+        self.assertFalse(result.ok)
+        self.assertEqual((result.result, result.code, result.message), (None, 10003, 'IP_ILLEGAL'))
+        self.assertIsNone(api.error)
+
+        self.response.status_code = 500
+        self.response.text = 'oops'
+        self.assertEqual(api.tickers().error, {'http_code': 500})
+
+    def testAttributeApiUnchanged(self):
+        api = CryptoComApi(session=self.session)
+        self.assertEqual(api.tickers(), {'data': [1]})
+        self.assertEqual((api.get_code(), api.get_result(), api.error), (0, {'data': [1]}, None))
+
+        self.response.text = '{"code": 10003, "message": "IP_ILLEGAL"}'
+        self.assertEqual(api.tickers(), {})
+        self.assertEqual((api.get_code(), api.get_message()), (10003, 'IP_ILLEGAL'))
+        self.assertEqual(api.error, api.response)
+
+    def testWithResultsSharesClient(self):
+        api = CryptoComApi(session=self.session)
+        results = api.with_results()
+        self.assertIs(results.session, api.session)
+        self.assertIs(results.rate_limiter, api.rate_limiter)
+        self.assertTrue(results.tickers().ok)
+        self.assertIsNone(api.response)
+
+    def testPublicOnlyPrivateCall(self):
+        api = CryptoComApi(session=self.session, return_results=True)
+        result = api.balance()
+        self.assertEqual(result.error, {'public_only': 'private/get-account-summary'})
+        self.session.request.assert_not_called()
+
+
+class BatchOrdersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.bodies = []
+
+        def request(method, url, **kwargs):
+            body = kwargs.get('json') or kwargs.get('data')
+            self.bodies.append(body)
+            response = mock.Mock(status_code=200)
+            if url.endswith('create-order-list'):
+                items = [{'index': i, 'code': 0, 'order_id': str(100 + i)} if o['price'] > 0 else
+                         {'index': i, 'code': 20007, 'message': 'INVALID_REQUEST'}
+                         for i, o in enumerate(body['params']['order_list'])]
+                response.text = json.dumps({'code': 0, 'result': {'result_list': items}})
+            else:
+                response.text = json.dumps({'code': 0, 'data': {'order_id': body['price']}})
+            return response
+
+        self.session.request.side_effect = request
+        self.orders = [{'symbol': 'BTC_USDT', 'side': 'BUY', '_type': 'LIMIT', 'quantity': 1, 'price': p}
+                       for p in [-1] + list(range(1, 25))]
+
+    def testCreateOrderListV2(self):
+        api = CryptoComApi('key', 'secret', session=self.session)
+        results = api.create_orders(self.orders)
+        self.assertEqual(len(self.bodies), 3)
+        self.assertEqual([len(b['params']['order_list']) for b in self.bodies], [10, 10, 5])
+        self.assertEqual([r.ok for r in results[:2]], [False, True])
+        self.assertEqual(results[0].error['message'], 'INVALID_REQUEST')
+        # order ids of the stand-in are 100 + index in the list call
+        self.assertEqual([r.result['order_id'] for r in results[1:12]], [str(101 + i) for i in range(9)] + ['100', '101'])
+
+        body = self.bodies[0]
+        self.assertEqual(body['sig'], api._sign(body['params'], body['method'], body['id'], body['nonce']))
+
+    def testFailedListCallKeepsOtherResults(self):
+        request = self.session.request.side_effect
+
+        def timeout_third(method, url, **kwargs):
+            if len(self.bodies) == 2:
+                self.bodies.append(kwargs.get('json'))
+                raise requests.exceptions.ReadTimeout('timed out')
+            return request(method, url, **kwargs)
+        self.session.request.side_effect = timeout_third
+
+        api = CryptoComApi('key', 'secret', session=self.session)
+        results = api.create_orders(self.orders, max_workers=1)
+        self.assertEqual(len(results), 25)
+        self.assertEqual(sum(r.ok for r in results[:20]), 19)
+        self.assertTrue(all('ReadTimeout' in r.error['exception'] for r in results[20:]))
+
+    def testConcurrentFallbackV1(self):
+        api = CryptoComApi('key', 'secret', version=CryptoComApi.ApiVersion.V1, session=self.session)
+        results = api.create_orders(self.orders[:4])
+        self.assertEqual([r.result['order_id'] for r in results], [-1, 1, 2, 3])
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from cryptocom.api import CryptoComApi
+from cryptocom.backfill import DEFAULT_WINDOW, Backfill, HOUR
+from cryptocom.result import ApiResult
+
+
+class FakeHistoryApi:
+    version = CryptoComApi.ApiVersion.V2
+
+    def __init__(self, trades, fail_after=None):
+        self.trades = trades
+        self.calls = []
+        self.fail_after = fail_after
+
+    def with_results(self):
+        return self
+
+    def all_executed_orders(self, symbol=None, page_size=None, page_number=None, start=None, end=None, **kwargs):
+        self.calls.append((start, end, page_number))
+        if self.fail_after is not None and len(self.calls) > self.fail_after:
+            return ApiResult(None, 10006, 'TOO_MANY_REQUESTS', 200, 0.0, {'code': 10006}, None)
+        # end_ts is inclusive, newest first like the exchange
+        window = [t for t in reversed(self.trades) if start <= t['create_time'] <= end]
+        page = page_number or 0
+        return ApiResult({'trade_list': window[page * page_size:(page + 1) * page_size]}, 0, '', 200, 0.0, None,
+                         None)
+
+
+class BackfillTestCase(unittest.TestCase):
+    def setUp(self):
+        # 3 hours of trades, one every minute, and a burst of 30 trades in one second
+        self.trades = [{'trade_id': str(i), 'create_time': i * 60 * 1000} for i in range(180)]
+        self.trades += [{'trade_id': f'b{i}', 'create_time': HOUR + 500} for i in range(30)]
+        self.trades.sort(key=lambda t: t['create_time'])
+
+    def testSplitsFullShards(self):
+        api = FakeHistoryApi(self.trades)
+        received = []
+        backfill = Backfill(api, start=0, end=3 * HOUR, shard=HOUR, min_shard=1000, page_size=20, workers=3,
+                            sink=received.extend)
+        self.assertEqual(backfill.run(), len(self.trades))
+        self.assertEqual(sorted(t['trade_id'] for t in received), sorted(t['trade_id'] for t in self.trades))
+        self.assertGreater(backfill.splits, 0)
+        # the burst does not fit into a page even in the smallest shard, it was paged through
+        self.assertTrue(any(page for _, _, page in api.calls))
+
+    def testDefaultWindow(self):
+        backfill = Backfill(FakeHistoryApi(self.trades), end=DEFAULT_WINDOW + 3 * HOUR)
+        self.assertEqual(backfill.start, 3 * HOUR)
+        self.assertEqual(Backfill(FakeHistoryApi(self.trades), start=0, end=HOUR).start, 0)
+
+    def testResumeFromCheckpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'trades.checkpoint')
+            received = []
+            backfill = Backfill(FakeHistoryApi(self.trades, fail_after=2), start=0, end=3 * HOUR, shard=HOUR,
+                                page_size=100, workers=1, sink=received.extend, checkpoint=checkpoint)
+            self.assertRaises(Exception, backfill.run)
+            self.assertEqual(backfill.shards, 2)
+
+            api = FakeHistoryApi(self.trades)
+            backfill = Backfill(api, start=0, end=3 * HOUR, shard=HOUR, page_size=100, workers=1,
+                                sink=received.extend, checkpoint=checkpoint)
+            backfill.run()
+            self.assertEqual(len(api.calls), 1)
+            self.assertEqual(sorted(t['trade_id'] for t in received), sorted(t['trade_id'] for t in self.trades))
+
+    def testDuplicatesAtEdgesDropped(self):
+        api = FakeHistoryApi(self.trades)
+        # ranges overlapping by the inclusive end_ts
+        api.all_executed_orders_orig = api.all_executed_orders
+        api.all_executed_orders = lambda *args: api.all_executed_orders_orig(*args[:4], args[4] + 1)
+        received = []
+        backfill = Backfill(api, start=0, end=3 * HOUR, shard=HOUR, page_size=100, sink=received.extend)
+        backfill.run()
+        self.assertEqual(len(received), len(self.trades))
+        self.assertEqual(backfill.duplicates, 2)
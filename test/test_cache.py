@@ -0,0 +1,73 @@
+import unittest
+from time import sleep
+from unittest import mock
+
+import requests
+
+from cryptocom.api import CryptoComApi
+from cryptocom.cache import ResponseCache, FRESH, STALE
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def testTtlAndStale(self):
+        cache = ResponseCache({'public/get-ticker': 10}, stale_ttl=5)
+        key = cache.key('public/get-ticker', {'instrument_name': 'BTC_USDT'})
+        with mock.patch('cryptocom.cache.monotonic', return_value=100):
+            cache.put(key, 'r')
+        with mock.patch('cryptocom.cache.monotonic', return_value=105):
+            self.assertEqual(cache.get(key), ('r', FRESH))
+        with mock.patch('cryptocom.cache.monotonic', return_value=112):
+            self.assertEqual(cache.get(key), ('r', STALE))
+        with mock.patch('cryptocom.cache.monotonic', return_value=116):
+            self.assertEqual(cache.get(key), (None, None))
+        self.assertEqual(cache.stats(), {'entries': 0, 'hits': 1, 'stale_hits': 1, 'misses': 1, 'evictions': 0,
+                                         'refreshes': 0})
+
+    def testLruEviction(self):
+        cache = ResponseCache(max_entries=2)
+        for name in ('A', 'B'):
+            cache.put(cache.key('public/get-ticker', {'instrument_name': name}), name)
+        cache.get(cache.key('public/get-ticker', {'instrument_name': 'A'}))
+        cache.put(cache.key('public/get-ticker', {'instrument_name': 'C'}), 'C')
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.get(cache.key('public/get-ticker', {'instrument_name': 'B'})), (None, None))
+        self.assertEqual(cache.get(cache.key('public/get-ticker', {'instrument_name': 'A'}))[0], 'A')
+
+
+class CachedApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.session.request.return_value.status_code = 200
+        self.session.request.return_value.text = '{"code": 0, "result": {"data": []}}'
+        self.api = CryptoComApi('key', 'secret', session=self.session, cache=True)
+
+    def testPublicCallsCached(self):
+        self.assertEqual(self.api.ticker('BTC_USDT'), {'data': []})
+        self.assertEqual(self.api.ticker('BTC_USDT'), {'data': []})
+        self.api.ticker('ETH_USDT')
+        self.assertEqual(self.session.request.call_count, 2)
+        self.assertEqual(self.api.cache.hits, 1)
+
+    def testStaleRefreshedInBackground(self):
+        self.api.cache.ttls['public/get-ticker'] = 0.001
+        self.api.cache.stale_ttl = 60
+        self.api.tickers()
+        sleep(0.01)
+        with mock.patch('cryptocom.api.threading.Thread') as thread:
+            self.api.tickers()
+            self.api.tickers()
+        # one refresh per key at a time
+        thread.assert_called_once()
+        self.assertEqual(self.api.cache.stale_hits, 2)
+
+    def testPrivateCallsNotCached(self):
+        self.api.balance()
+        self.api.balance()
+        self.assertEqual(self.session.request.call_count, 2)
+        self.assertEqual(len(self.api.cache), 0)
+
+    def testErrorsNotCached(self):
+        self.session.request.return_value.text = '{"code": 10003, "message": "IP_ILLEGAL"}'
+        self.api.tickers()
+        self.api.tickers()
+        self.assertEqual(self.session.request.call_count, 2)
@@ -0,0 +1,94 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+try:
+    import numpy as np
+    from cryptocom.columnar import KLINE_DTYPE
+except ImportError:
+    np = None
+
+from cryptocom.api import CryptoComApi
+from cryptocom.candles import CandleBuilder, CandleSeries, MINUTE, period_ms
+from cryptocom.records import Trade
+from cryptocom.stream import StreamMessage
+
+
+def trade(id, t, p, q=1.0, i='BTC_USDT'):
+    return {'i': i, 'd': id, 's': 'BUY', 'p': p, 'q': q, 't': t}
+
+
+class CandleSeriesTestCase(unittest.TestCase):
+    def testOhlcv(self):
+        series = CandleSeries(MINUTE, 10)
+        for t, p in ((0, 10), (1000, 12), (2000, 9), (3000, 11), (MINUTE + 5, 20)):
+            series.add(t, p, 1.0)
+        self.assertEqual(series.candles(), [(0, 10, 12, 9, 11, 4), (MINUTE, 20, 20, 20, 20, 1)])
+        self.assertEqual(series.candles(include_open=False), [(0, 10, 12, 9, 11, 4)])
+
+    def testRingBuffer(self):
+        series = CandleSeries(MINUTE, 3)
+        for i in range(6):
+            series.add(i * MINUTE, i, 1.0)
+        self.assertEqual([c[0] for c in series.candles()], [2 * MINUTE, 3 * MINUTE, 4 * MINUTE, 5 * MINUTE])
+        self.assertEqual(len(series), 4)
+
+    def testPeriods(self):
+        self.assertEqual(period_ms('5m'), 5 * MINUTE)
+        self.assertEqual(period_ms(60), 60 * MINUTE)
+        with self.assertRaises(ValueError):
+            period_ms('5 minutes')
+
+
+class CandleBuilderTestCase(unittest.TestCase):
+    def testOverlappingPolls(self):
+        builder = CandleBuilder()
+        # trades() responses are newest first, the second one overlaps the first
+        self.assertEqual(builder.on_trades({'instrument_name': 'BTC_USDT', 'data': [
+            trade(3, 2000, 12), trade(2, 1000, 11), trade(1, 1000, 10)]}), 3)
+        self.assertEqual(builder.on_trades({'instrument_name': 'BTC_USDT', 'data': [
+            trade(5, MINUTE, 13), trade(4, 2000, 9), trade(3, 2000, 12), trade(2, 1000, 11)]}), 2)
+        self.assertEqual(builder.duplicates, 2)
+        self.assertEqual(builder.candles('BTC_USDT'), [(0, 10, 12, 9, 9, 4), (MINUTE, 13, 13, 13, 13, 1)])
+
+    def testAggregatedPeriod(self):
+        builder = CandleBuilder(periods=('1m',))
+        for i in range(10):
+            builder.add_trade('ETH_USDT', i, i * MINUTE, 100 + i, 1)
+        self.assertEqual(builder.candles('ETH_USDT', '5m'), [(0, 100, 104, 100, 104, 5),
+                                                              (5 * MINUTE, 105, 109, 105, 109, 5)])
+        with self.assertRaises(ValueError):
+            CandleBuilder(periods=('5m',)).candles('ETH_USDT', '1m')
+
+    def testRecordsAndStream(self):
+        builder = CandleBuilder()
+        builder.on_trades([Trade('BTC_USDT', '1', 'BUY', 10.0, 1.0, 1000)])
+        builder.on_stream_message(StreamMessage('trade', 'trade.BTC_USDT', 'BTC_USDT', [
+            trade(1, 1000, 10), trade(2, 1500, 11, 2)]))
+        self.assertEqual(builder.candles('BTC_USDT'), [(0, 10, 11, 10, 11, 3)])
+
+    def testV2Klines(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.return_value.status_code = 200
+        session.request.return_value.text = json.dumps({'code': 0, 'result': {
+            'instrument_name': 'BTC_USDT', 'data': [trade(2, 1000, 11), trade(1, 500, 10)]}})
+
+        self.assertEqual(CryptoComApi(session=session).klines('BTC_USDT', '1m'), {})
+        api = CryptoComApi(session=session, candles=True)
+        klines = api.klines('BTC_USDT', '1m')
+        self.assertEqual(klines['data'], [{'t': 0, 'o': 10, 'h': 11, 'l': 10, 'c': 11, 'v': 2}])
+        self.assertEqual(api.with_results().klines('BTC_USDT', '1m').result, klines)
+        self.assertEqual(api.candles.duplicates, 2)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def testV2KlinesColumnar(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.return_value.status_code = 200
+        session.request.return_value.text = json.dumps({'code': 0, 'result': {
+            'instrument_name': 'BTC_USDT', 'data': [trade(2, 61000, 11), trade(1, 500, 10)]}})
+
+        klines = CryptoComApi(session=session, candles=True, decode='columnar').klines('BTC_USDT', '1m')
+        self.assertEqual(klines.dtype, np.dtype(KLINE_DTYPE))
+        self.assertEqual(klines.tolist(), [(0, 10, 10, 10, 10, 1), (MINUTE, 11, 11, 11, 11, 1)])
@@ -0,0 +1,66 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from cryptocom.api import CryptoComApi
+
+V1, V2 = CryptoComApi.ApiVersion.V1, CryptoComApi.ApiVersion.V2
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ColumnarTestCase(unittest.TestCase):
+    def setUp(self):
+        from cryptocom import columnar
+        self.columnar = columnar
+        self.trades = columnar.decode_trades({'data': [
+            {'i': 'BTC_USDT', 'd': 1, 's': 'BUY', 'p': 100, 'q': 1, 't': 1000},
+            {'i': 'BTC_USDT', 'd': 2, 's': 'SELL', 'p': 102, 'q': 3, 't': 1500},
+            {'i': 'BTC_USDT', 'd': 4, 's': 'BUY', 'p': 99, 'q': 1, 't': 2500},
+            {'i': 'BTC_USDT', 'd': 3, 's': 'BUY', 'p': 101, 'q': 2, 't': 1200},
+        ]}, V2)
+
+    def testTrades(self):
+        self.assertEqual(self.trades['side'].tolist(), [1, -1, 1, 1])
+        self.assertEqual(self.trades['price'].tolist(), [100, 102, 99, 101])
+        v1 = self.columnar.decode_trades([{'id': 1, 'type': 'sell', 'price': '1.5', 'amount': '2', 'ctime': 7}], V1)
+        self.assertEqual(v1.tolist(), [(7, 1.5, 2.0, -1)])
+        self.assertEqual(len(self.columnar.decode_trades({'data': []}, V2)), 0)
+
+    def testVwap(self):
+        self.assertAlmostEqual(self.columnar.vwap(self.trades), (100 + 306 + 99 + 202) / 7)
+        self.assertTrue(np.isnan(self.columnar.vwap(self.trades[:0])))
+
+    def testResampleTrades(self):
+        bars = self.columnar.resample(self.trades, 1000)
+        self.assertEqual(bars.tolist(), [(1000, 100, 102, 100, 102, 6), (2000, 99, 99, 99, 99, 1)])
+
+    def testResampleKlines(self):
+        klines = self.columnar.decode_klines([[60, 1, 3, 1, 2, 10], [120, 2, 2, 0.5, 1, 5], [180, 1, 4, 1, 4, 1]], V1)
+        self.assertEqual(klines['timestamp'].tolist(), [60000, 120000, 180000])
+        bars = self.columnar.resample(klines, 120000)
+        self.assertEqual(bars.tolist(), [(0, 1, 3, 1, 2, 10), (120000, 2, 4, 0.5, 4, 6)])
+
+    def testBookDepth(self):
+        book = self.columnar.decode_book({'instrument_name': 'BTC_USDT', 'data': [
+            {'bids': [[100, 1, 1], [99, 2, 1]], 'asks': [[101, 0.5, 1], [102, 1.5, 2]], 't': 5}]}, V2)
+        self.assertEqual(book.asks['price'].tolist(), [101, 102])
+        depth = self.columnar.cumulative_depth(book.bids)
+        self.assertEqual(depth.tolist(), [(100, 1, 100), (99, 3, 298)])
+
+    def testApiMode(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.return_value.status_code = 200
+        session.request.return_value.text = json.dumps({'code': 0, 'result': {'instrument_name': 'BTC_USDT', 'data': [
+            {'i': 'BTC_USDT', 'd': 1, 's': 'BUY', 'p': 100, 'q': 1, 't': 1000}]}})
+        api = CryptoComApi(session=session, decode='columnar')
+        trades = api.trades('BTC_USDT')
+        self.assertEqual(trades.dtype, np.dtype(self.columnar.TRADE_DTYPE))
+        # payloads without a columnar form are returned as is
+        self.assertEqual(api.tickers()['instrument_name'], 'BTC_USDT')
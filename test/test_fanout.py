@@ -0,0 +1,64 @@
+import unittest
+
+from cryptocom.api import CryptoComApi
+from cryptocom.fanout import Fanout, instrument_names
+from cryptocom.mockserver import MockExchange
+from cryptocom.ratelimit import PUBLIC, RateLimiter
+
+
+class FanoutTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.exchange = MockExchange(latency=0.01).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.exchange.close()
+
+    def api(self, limits=None, **kwargs):
+        return CryptoComApi(api_root=self.exchange.root(), rate_limiter=RateLimiter(limits or {}), **kwargs)
+
+    def testSnapshot(self):
+        with self.api() as api, Fanout(api, workers=8) as fanout:
+            completed = []
+            snapshot = fanout.snapshot(callback=completed.append)
+        self.assertEqual(sorted(snapshot.items), sorted(self.exchange.instruments))
+        self.assertEqual(len(completed), 2 * len(self.exchange.instruments))
+        self.assertEqual(snapshot.errors, 0)
+        item = snapshot.items['BTC_USDT']['order_book']
+        self.assertTrue(item.result['data'][0]['bids'])
+        self.assertLessEqual(item.latency, item.completed)
+        # calls overlap: the whole snapshot takes less than the sum of its calls
+        self.assertLess(snapshot.elapsed, sum(i.latency for i in completed))
+
+    def testErrorsPerItem(self):
+        with self.api() as api, Fanout(api, ('ticker',), instruments=['BTC_USDT', 'ETH_USDT'], workers=1) as fanout:
+            self.exchange.fail_next(1, status=500)
+            items = list(fanout.iter())
+        self.assertEqual(len(items), 2)
+        self.assertEqual(sum(item.error is not None for item in items), 1)
+        # the caller's client is unchanged
+        self.assertIsNone(api.error)
+
+    def testRateBudget(self):
+        with self.api({PUBLIC: (50, 1)}) as api, Fanout(api, ('ticker',), instruments=['BTC_USDT'] * 6) as fanout:
+            self.assertAlmostEqual(fanout.min_interval(), 0.1)
+            snapshot = fanout.snapshot()
+        self.assertGreaterEqual(snapshot.elapsed, 0.09)
+
+    def testSchedule(self):
+        snapshots, overruns = [], []
+        with self.api() as api, Fanout(api, ('ticker',), instruments=['BTC_USDT']) as fanout:
+            self.assertEqual(fanout.run(0.1, snapshots.append, rounds=3), 0)
+            self.assertEqual(len(snapshots), 3)
+            # a cadence the calls cannot keep up with
+            self.assertEqual(fanout.run(0.001, snapshots.append, rounds=2, on_overrun=overruns.append), 2)
+            self.assertEqual(len(overruns), 2)
+            self.assertEqual(fanout.stats()['rounds'], 5)
+
+    def testInstrumentNames(self):
+        with self.api() as api, Fanout(api) as fanout:
+            self.assertEqual(fanout.instruments, list(self.exchange.instruments))
+        self.assertEqual(instrument_names([{'symbol': 'btcusdt'}]), ['btcusdt'])
+        with self.assertRaises(ValueError):
+            Fanout(CryptoComApi(), ('unknown',))
@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from cryptocom.api import CryptoComApi
+from cryptocom.metrics import Histogram, Metrics
+from cryptocom.ratelimit import RateLimiter
+
+
+class HistogramTestCase(unittest.TestCase):
+    def testBucketsAndQuantiles(self):
+        histogram = Histogram((0.1, 0.2, 0.4))
+        for value in (0.05, 0.15, 0.15, 0.3, 1.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 1), (0.2, 3), (0.4, 4), (float('inf'), 5)])
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.175)
+        self.assertEqual(histogram.quantile(1.0), 0.4)
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.response = self.session.request.return_value
+        self.ok()
+        self.metrics = Metrics()
+
+    def ok(self):
+        self.response.status_code = 200
+        self.response.text = '{"code": 0, "result": {"data": []}}'
+        self.response.content = self.response.text.encode()
+
+    def testOutcomes(self):
+        api = CryptoComApi('key', 'secret', session=self.session, metrics=self.metrics)
+        api.tickers()
+        api.tickers()
+        self.response.text = '{"code": 10003, "message": "IP_ILLEGAL"}'
+        api.balance()
+        self.response.status_code = 502
+        api.tickers()
+        self.session.request.side_effect = requests.ConnectionError('refused')
+        with self.assertRaises(requests.ConnectionError):
+            api.tickers()
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['requests']['public/get-ticker']['get'], {'ok': 2, 'http_502': 1, 'exception': 1})
+        self.assertEqual(snapshot['requests']['private/get-account-summary']['post'], {'api_10003': 1})
+        self.assertEqual(snapshot['latency']['public/get-ticker']['get']['count'], 3)
+        self.assertEqual(snapshot['bytes_received']['public/get-ticker'], 3 * len(self.response.content))
+        self.assertEqual(snapshot['signing']['count'], 1)
+        self.assertEqual(snapshot['rate_limit_wait']['public']['count'], 4)
+
+    def testRateLimitedAndHooks(self):
+        calls = []
+        self.metrics.add_hook(before=lambda path, method, params: calls.append(('before', path)),
+                              after=lambda path, method, result, elapsed: calls.append(('after', result.ok)))
+        api = CryptoComApi(session=self.session, metrics=self.metrics, block_on_rate_limit=False,
+                           rate_limiter=RateLimiter({'public': (1, 1)}))
+        api.tickers()
+        api.tickers()
+        self.assertEqual(calls, [('before', 'public/get-ticker'), ('after', True),
+                                 ('before', 'public/get-ticker'), ('after', False)])
+        self.assertEqual(self.metrics.snapshot()['requests']['public/get-ticker']['get'],
+                         {'ok': 1, 'skipped_rate_limited': 1})
+
+    def testPrometheus(self):
+        api = CryptoComApi(session=self.session, metrics=self.metrics)
+        api.tickers()
+        text = self.metrics.prometheus()
+        self.assertIn('cryptocom_requests_total{path="public/get-ticker",method="get",outcome="ok"} 1\n', text)
+        self.assertIn('cryptocom_request_duration_seconds_bucket{path="public/get-ticker",method="get",le="+Inf"} 1',
+                      text)
+        self.assertIn('# TYPE cryptocom_sign_duration_seconds histogram', text)
+        self.assertIn('cryptocom_sign_duration_seconds_count 0', text)
@@ -0,0 +1,71 @@
+import unittest
+
+from cryptocom.api import CryptoComApi
+from cryptocom.mockserver import MockExchange, v2_params_str
+from cryptocom.ratelimit import RateLimiter
+from cryptocom.resilience import Resilience
+
+
+class MockExchangeTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.exchange = MockExchange(history=30).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.exchange.close()
+
+    def api(self, version='v2', secret=None, **kwargs):
+        return CryptoComApi(self.exchange.key, secret or self.exchange.secret, version=version,
+                            api_root=self.exchange.root(version), rate_limiter=RateLimiter({}), **kwargs)
+
+    def testV2OrderLifecycle(self):
+        with self.api() as api:
+            self.assertEqual(len(api.tickers()['data']), len(self.exchange.instruments))
+            order = api.create_order('ETH_USDT', 'BUY', 'LIMIT', 1, 100, client_oid='lifecycle')
+            self.assertEqual(api.show_order('ETH_USDT', order['order_id'])['order_info']['status'], 'ACTIVE')
+            self.assertIn(order['order_id'], [o['order_id'] for o in api.open_orders('ETH_USDT')['order_list']])
+            api.cancel_order('ETH_USDT', order['order_id'])
+            self.assertIsNone(api.error)
+            self.assertEqual(api.show_order('ETH_USDT', order['order_id'])['order_info']['status'], 'CANCELED')
+
+    def testV1Calls(self):
+        with self.api('v1') as api:
+            self.assertEqual(api.ticker('btcusdt')['symbol'], 'btcusdt')
+            self.assertTrue(api.order_book('btcusdt')['tick']['bids'])
+            order = api.create_limit_order('btcusdt', 'BUY', 1, 100)
+            self.assertIsNone(api.error)
+            self.assertEqual(api.show_order('btcusdt', order['order_id'])['order_info']['id'], order['order_id'])
+
+    def testHistoryPagination(self):
+        with self.api() as api:
+            orders = list(api.iter_all_orders(page_size=7))
+        self.assertEqual(len(orders), 30)
+        self.assertEqual(len({o['order_id'] for o in orders}), 30)
+
+    def testBadSignatureRejected(self):
+        with self.api(secret='wrong') as api:
+            self.assertEqual(api.balance(), {})
+            self.assertEqual((api.error['http_code'], api.error['code']), (401, 40101))
+
+    def testV2ParamsPayload(self):
+        params = {'order_list': [{'side': 'BUY', 'price': 1.5}, 'x'], 'filter': {'b': 1, 'a': [2]}, 'page': None}
+        self.assertEqual(v2_params_str(params), "filter{'b': 1, 'a': [2]}order_listprice1.5sideBUYxpagenull")
+
+    def testNestedParamsSigned(self):
+        with self.api() as api:
+            api._post('private/get-account-summary', {'currency': 'BTC', 'filter': {'b': 1, 'a': [2, {'c': 3}]}})
+            self.assertIsNone(api.error)
+
+    def testInjectedFailuresRetried(self):
+        self.exchange.fail_next(2, status=503)
+        with self.api(resilience=Resilience(backoff=0)) as api:
+            self.assertTrue(api.with_results().trades('BTC_USDT').ok)
+
+    def testServerRateLimit(self):
+        with MockExchange(history=0, rate_limits={'public': (1, 2)}) as exchange:
+            api = CryptoComApi(api_root=exchange.root(), rate_limiter=RateLimiter({}), return_results=True)
+            results = [api.tickers() for _ in range(3)]
+            api.close()
+        self.assertEqual([r.http_status for r in results], [200, 200, 429])
+        self.assertEqual(results[2].error['code'], 10006)
@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+from cryptocom.orderbook import OrderBook, OrderBooks, parse_book
+
+SNAPSHOT = {'instrument_name': 'BTC_USDT', 'depth': 150, 'data': [{
+    'bids': [['9668.44', '0.5', 1], ['9668.00', '1.0', 2], ['9667.50', '2.0', 1]],
+    'asks': [['9669.00', '0.3', 1], ['9670.10', '1.5', 3]],
+    't': 1591704180270}]}
+
+
+class OrderBookTestCase(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook('BTC_USDT')
+        bids, asks, timestamp = parse_book(SNAPSHOT)
+        self.book.apply_snapshot(bids, asks, sequence=10, timestamp=timestamp)
+
+    def testTopOfBook(self):
+        self.assertEqual(self.book.best_bid(), (9668.44, 0.5))
+        self.assertEqual(self.book.best_ask(), (9669.0, 0.3))
+        self.assertAlmostEqual(self.book.spread(), 0.56)
+        self.assertEqual(self.book.bids.levels(2), [(9668.44, 0.5), (9668.0, 1.0)])
+        self.assertEqual(self.book.asks.size_at('9670.10'), 1.5)
+
+    def testDelta(self):
+        self.assertTrue(self.book.apply_delta(bids=[(9668.44, 0), (9668.5, 0.1)], asks=[(9669.0, 0.7)],
+                                              sequence=11, prev_sequence=10))
+        self.assertEqual(self.book.best_bid(), (9668.5, 0.1))
+        self.assertEqual(self.book.best_ask(), (9669.0, 0.7))
+        self.assertEqual(len(self.book.bids), 3)
+        # replayed delta is ignored
+        self.assertFalse(self.book.apply_delta(bids=[(9600, 1)], sequence=11, prev_sequence=10))
+        self.assertFalse(self.book.needs_resync)
+
+    def testSequenceGapNeedsResync(self):
+        self.assertFalse(self.book.apply_delta(bids=[(9668.5, 0.1)], sequence=13, prev_sequence=12))
+        self.assertTrue(self.book.needs_resync)
+        self.assertEqual(self.book.best_bid(), (9668.44, 0.5))
+
+    def testCrossedBookNeedsResync(self):
+        bids, asks = self.book.bids.levels(), self.book.asks.levels()
+        self.assertFalse(self.book.apply_delta(bids=[(9668.44, 0), (9700, 1)], asks=[(9669.0, 0.9)], sequence=11,
+                                               timestamp=1))
+        self.assertTrue(self.book.needs_resync)
+        # the rejected delta is rolled back
+        self.assertEqual((self.book.bids.levels(), self.book.asks.levels()), (bids, asks))
+        self.assertFalse(self.book.crossed())
+        self.assertEqual((self.book.sequence, self.book.timestamp), (10, 1591704180270))
+
+    def testMaxDepth(self):
+        book = OrderBook('BTC_USDT', max_depth=1)
+        book.apply_snapshot(*parse_book(SNAPSHOT)[:2])
+        self.assertEqual(book.bids.levels(), [(9668.44, 0.5)])
+        self.assertEqual(book.asks.levels(), [(9669.0, 0.3)])
+
+
+class OrderBooksTestCase(unittest.TestCase):
+    def testResyncFromApi(self):
+        api = mock.Mock()
+        api.order_book.return_value = SNAPSHOT
+        books = OrderBooks(api)
+        books.sync('BTC_USDT')
+        self.assertTrue(books.on_delta('BTC_USDT', asks=[(9669.0, 0)], sequence=1))
+        self.assertFalse(books.on_delta('BTC_USDT', asks=[(9669.0, 0)], sequence=5, prev_sequence=4))
+        self.assertEqual(books.resyncs, 1)
+        self.assertEqual(api.order_book.call_count, 2)
+        self.assertEqual(books['BTC_USDT'].best_ask(), (9669.0, 0.3))
+        self.assertFalse(books['BTC_USDT'].needs_resync)
+
+    def testV1Snapshot(self):
+        books = OrderBooks()
+        book = books.on_snapshot('btcusdt', {'tick': {'asks': [[9669.0, 0.3]], 'bids': [[9668.0, 1.0]], 'time': 1}})
+        self.assertEqual(book.mid(), 9668.5)
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from cryptocom.api import CryptoComApi
+from cryptocom.paginate import paginate, apaginate
+from cryptocom.result import ApiResult, ApiError
+
+
+def page_result(records):
+    return ApiResult({'trade_list': records}, 0, '', 200, 0.0, None, None)
+
+
+class PaginateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pages = [[1, 2], [3, 4], [5]]
+        self.fetched = []
+
+    def fetch(self, page):
+        self.fetched.append(page)
+        return page_result(self.pages[page])
+
+    def testAllPages(self):
+        for prefetch in (False, True):
+            self.fetched = []
+            self.assertEqual(list(paginate(self.fetch, 0, 2, prefetch)), [1, 2, 3, 4, 5])
+            self.assertEqual(self.fetched, [0, 1, 2])
+
+    def testPrefetchRunsAheadOnePage(self):
+        records = paginate(self.fetch, 0, 2, prefetch=True)
+        self.assertEqual(next(records), 1)
+        records.close()
+        self.assertEqual(self.fetched, [0, 1])
+
+    def testErrorRaised(self):
+        def fetch(page):
+            if page == 1:
+                return ApiResult(None, 10003, 'IP_ILLEGAL', 200, 0.0, {'code': 10003}, None)
+            return self.fetch(page)
+
+        records = paginate(fetch, 0, 2)
+        self.assertEqual([next(records), next(records)], [1, 2])
+        self.assertRaises(ApiError, next, records)
+
+    def testAsync(self):
+        async def fetch(page):
+            return self.fetch(page)
+
+        async def collect():
+            return [record async for record in apaginate(fetch, 0, 2, prefetch=True)]
+
+        self.assertEqual(asyncio.run(collect()), [1, 2, 3, 4, 5])
+
+
+class ApiPaginationTestCase(unittest.TestCase):
+    def testIterAllExecutedOrders(self):
+        session = mock.Mock(spec=requests.Session)
+        trades = [{'trade_id': str(i)} for i in range(5)]
+
+        def request(method, url, **kwargs):
+            page = kwargs['json']['params'].get('page', 0)
+            response = mock.Mock(status_code=200)
+            response.text = json.dumps({'code': 0, 'result': {'trade_list': trades[page * 2:page * 2 + 2]}})
+            return response
+
+        session.request.side_effect = request
+        api = CryptoComApi('key', 'secret', session=session)
+        records = list(api.iter_all_executed_orders('BTC_USDT', page_size=2, prefetch=True))
+        self.assertEqual(records, trades)
+        self.assertEqual(session.request.call_count, 3)
+        self.assertIsNone(api.response)
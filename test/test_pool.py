@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+from cryptocom.mockserver import MockExchange
+from cryptocom.pool import ROUND_ROBIN, ClientPool
+from cryptocom.ratelimit import ORDER, RateLimiter
+
+try:
+    from cryptocom.aio import AsyncCryptoComApi, aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class ClientPoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.exchange = MockExchange().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.exchange.close()
+
+    def pool(self, accounts=('main', 'sub'), **kwargs):
+        credentials = {account: (self.exchange.key, self.exchange.secret) for account in accounts}
+        return ClientPool(credentials, api_root=self.exchange.root(), **kwargs)
+
+    def testSeparateKeys(self):
+        with self.pool() as pool:
+            main, sub = pool.client('main'), pool.client('sub')
+            self.assertIsNot(main.rate_limiter, sub.rate_limiter)
+            self.assertIsNot(main.session, sub.session)
+        with self.assertRaises(ValueError):
+            ClientPool([('key', 'secret')], rate_limiter=RateLimiter())
+
+    def testOrdersStayOnTheirAccount(self):
+        with self.pool(policy=ROUND_ROBIN) as pool:
+            order = pool.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, account='sub')
+            self.assertEqual(pool.owner(order['order_id']), 'sub')
+            for _ in range(3):
+                pool.show_order('BTC_USDT', order['order_id'])
+            pool.cancel_order('BTC_USDT', order_id=order['order_id'])
+            stats = pool.stats()
+        self.assertEqual((stats['main']['calls'], stats['sub']['calls']), (0, 5))
+        self.assertEqual(stats['sub']['in_flight'], 0)
+
+    def testCancelOrdersGroupedByAccount(self):
+        with self.pool(policy=ROUND_ROBIN, return_results=True) as pool:
+            orders = [{'symbol': 'BTC_USDT', 'order_id': pool.create_order(
+                'BTC_USDT', 'BUY', 'LIMIT', 1, 100, account=account).result['order_id']}
+                for account in ('main', 'sub', 'main')]
+            results = pool.cancel_orders(orders)
+            stats = pool.stats()
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result.ok for result in results))
+        # one create per order, one cancel-order-list per account
+        self.assertEqual((stats['main']['calls'], stats['sub']['calls']), (3, 2))
+
+    def testCancelAllOrdersOnEveryAccount(self):
+        with self.pool(return_results=True) as pool:
+            results = pool.cancel_all_orders('BTC_USDT')
+            self.assertEqual(list(results), ['main', 'sub'])
+            self.assertTrue(all(result.ok for result in results.values()))
+            self.assertTrue(pool.cancel_all_orders('BTC_USDT', account='sub').ok)
+            self.assertEqual([s['calls'] for s in pool.stats().values()], [1, 2])
+
+    def testLeastLoaded(self):
+        with self.pool(accounts=('a', 'b', 'c'), return_results=True) as pool:
+            for _ in range(3):
+                self.assertTrue(pool.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, account='a').ok)
+            self.assertTrue(pool.balance().ok)
+            picked = [pool.pick(ORDER).account for _ in range(2)]
+            stats = pool.stats()
+        # 'a' spent part of its order budget
+        self.assertNotIn('a', picked)
+        self.assertLess(stats['a']['headroom'][ORDER], stats['b']['headroom'][ORDER])
+        self.assertEqual(sum(s['calls'] for s in stats.values()), 4)
+
+    def testRoundRobin(self):
+        with self.pool(accounts=('a', 'b'), policy=ROUND_ROBIN) as pool:
+            for _ in range(4):
+                pool.balance()
+            self.assertEqual([s['calls'] for s in pool.stats().values()], [2, 2])
+            with self.assertRaises(AttributeError):
+                pool.with_results()
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def testAsyncClients(self):
+        async def run():
+            pool = self.pool(client_class=AsyncCryptoComApi)
+            order = await pool.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, account='main')
+            detail = await pool.show_order('BTC_USDT', order['order_id'])
+            cancelled = await pool.cancel_all_orders('BTC_USDT')
+            self.assertEqual(list(cancelled), pool.accounts)
+            for account in pool.accounts:
+                await pool.client(account).close()
+            return detail, pool.stats()
+
+        detail, stats = asyncio.run(run())
+        self.assertEqual(detail['order_info']['status'], 'ACTIVE')
+        self.assertEqual(stats['main']['calls'], 3)
+        self.assertEqual(stats['main']['in_flight'], 0)
@@ -0,0 +1,77 @@
+import threading
+import unittest
+from unittest import mock
+
+from cryptocom.api import CryptoComApi
+from cryptocom.ratelimit import TokenBucket, RateLimiter, endpoint_group, PUBLIC, PRIVATE, ORDER
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def testBurstThenWait(self):
+        bucket = TokenBucket(rate=10, capacity=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+    def testTryAcquire(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def testSharedBetweenThreads(self):
+        bucket = TokenBucket(rate=1, capacity=100)
+        delays = []
+
+        def worker():
+            for _ in range(25):
+                delays.append(bucket.reserve())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 100 calls fit into the burst, the other 100 wait 1s, 2s, ... 100s
+        self.assertEqual(sum(1 for d in delays if d == 0), 100)
+        self.assertAlmostEqual(max(delays), 100, delta=0.5)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def testEndpointGroups(self):
+        self.assertEqual(endpoint_group('public/get-ticker', 'get'), PUBLIC)
+        self.assertEqual(endpoint_group('private/get-account-summary', 'post'), PRIVATE)
+        self.assertEqual(endpoint_group('private/create-order', 'post'), ORDER)
+        self.assertEqual(endpoint_group('order', 'post'), ORDER)
+
+    def testGroupsHaveSeparateBudgets(self):
+        limiter = RateLimiter({PUBLIC: (1, 1), ORDER: (1, 1)})
+        self.assertTrue(limiter.try_acquire(PUBLIC))
+        self.assertFalse(limiter.try_acquire(PUBLIC))
+        self.assertTrue(limiter.try_acquire(ORDER))
+        # no limit configured
+        self.assertTrue(all(limiter.try_acquire(PRIVATE) for _ in range(100)))
+
+    def testHeadroom(self):
+        limiter = RateLimiter({PUBLIC: (1, 4), ORDER: (1, 1)})
+        limiter.reserve(PUBLIC)
+        limiter.reserve(ORDER, 2)
+        headroom = limiter.headroom()
+        self.assertAlmostEqual(headroom[PUBLIC], 0.75, delta=0.01)
+        self.assertLess(headroom[ORDER], 0)
+
+    def testAcquireReportsWait(self):
+        limiter = RateLimiter({PUBLIC: (100, 1)})
+        self.assertEqual(limiter.acquire(PUBLIC), 0.0)
+        self.assertGreater(limiter.acquire(PUBLIC), 0.0)
+
+    def testNonBlockingClientSkipsCall(self):
+        session = mock.Mock()
+        api = CryptoComApi(session=session, rate_limiter=RateLimiter({PUBLIC: (1, 1)}), block_on_rate_limit=False)
+        session.request.return_value.status_code = 200
+        session.request.return_value.text = '{"code": 0, "result": {"data": []}}'
+
+        self.assertEqual(api.tickers(), {'data': []})
+        self.assertEqual(api.tickers(), {})
+        self.assertEqual(api.error, {'rate_limited': PUBLIC})
+        self.assertEqual(session.request.call_count, 1)
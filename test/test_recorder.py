@@ -0,0 +1,124 @@
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from cryptocom.api import CryptoComApi
+from cryptocom.mockserver import MockExchange
+from cryptocom.ratelimit import RateLimiter
+from cryptocom.recorder import Recorder, Replay, ReplayApi
+
+V2 = CryptoComApi.ApiVersion.V2
+
+
+def trades(*rows):
+    return {'data': [{'i': 'BTC_USDT', 'd': d, 's': s, 'p': p, 'q': q, 't': t} for d, s, p, q, t in rows]}
+
+
+def book(t, bids, asks):
+    return {'instrument_name': 'BTC_USDT', 'depth': 10, 'data': [{'bids': bids, 'asks': asks, 't': t}]}
+
+
+class RecorderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, **kwargs):
+        with Recorder(self.directory, **kwargs) as recorder:
+            recorder.on_result('trades', trades((3, 'BUY', 101, 2, 1200), (2, 'SELL', 102, 3, 1000),
+                                                (1, 'BUY', 100, 1, 1000)), V2)
+            # overlapping poll, only trade 4 is new
+            recorder.on_result('trades', trades((4, 'SELL', 99, 1, 2500), (3, 'BUY', 101, 2, 1200)), V2)
+            recorder.on_result('tickers', {'data': [
+                {'i': 'BTC_USDT', 'b': 99, 'k': 101, 'a': 100, 'h': 110, 'l': 90, 'v': 5, 'c': 0.1, 't': 1000},
+                {'i': 'ETH_USDT', 'b': 9, 'k': 11, 'a': 10, 'h': 12, 'l': 8, 'v': 50, 'c': None, 't': 1000}]}, V2)
+            recorder.on_result('ticker', {'data': [
+                {'i': 'BTC_USDT', 'b': 98, 'k': 100, 'a': 99, 'h': 110, 'l': 90, 'v': 6, 'c': 0.1, 't': 2000}]}, V2)
+            recorder.on_result('book', book(1000, [[100, 1, 1], [99, 2, 1]], [[101, 3, 1]]), V2)
+            recorder.on_result('book', book(3000, [[98, 1, 1]], [[102, 1, 1]]), V2)
+            recorder.on_result('orders', {'order_list': []}, V2)
+            return recorder.written, recorder.skipped
+
+    def testAppendOnlyNewRecords(self):
+        self.assertEqual(self.record(), (9, 1))
+        # reopened logs continue after their last record
+        self.assertEqual(self.record(), (0, 10))
+
+    def testStringTradeIdsAfterReopen(self):
+        rows = (('b-2', 'SELL', 102, 3, 1000), ('a-1', 'BUY', 100, 1, 1000))
+        for written in (2, 0):
+            with Recorder(self.directory) as recorder:
+                recorder.on_result('trades', trades(*rows), V2)
+                self.assertEqual(recorder.written, written)
+        with Replay(self.directory) as replay:
+            ids = [t.trade_id for t in replay.log('BTC_USDT', 'trade').records()]
+        self.assertEqual(len(set(ids)), 2)
+        self.assertNotIn('0', ids)
+
+    def testReplayRecords(self):
+        self.record()
+        with Replay(self.directory) as replay:
+            self.assertEqual(replay.instruments, ['BTC_USDT', 'ETH_USDT'])
+            log = replay.log('BTC_USDT', 'trade')
+            self.assertEqual([t.trade_id for t in log.records()], ['1', '2', '3', '4'])
+            self.assertEqual([t.trade_id for t in log.records(1000, 2500)], ['1', '2', '3'])
+            self.assertEqual(log.bisect(1100), 2)
+            self.assertEqual(log.latest(2000).price, 101)
+            self.assertIsNone(log.latest(999))
+
+            bids = replay.log('BTC_USDT', 'book').record(0).bids
+            self.assertEqual([(level.price, level.quantity) for level in bids], [(100, 1), (99, 2)])
+            self.assertEqual(replay.log('ETH_USDT', 'ticker').record(0).volume, 50)
+
+            kinds = [(kind, record.timestamp) for kind, record in replay.events(instruments={'BTC_USDT'})]
+            self.assertEqual([t for _, t in kinds], sorted(t for _, t in kinds))
+            self.assertEqual(len(kinds), 8)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def testViews(self):
+        self.record(book_depth=2)
+        with Replay(self.directory) as replay:
+            view = replay.log('BTC_USDT', 'trade').view(1000, 2000)
+            self.assertEqual(view['price'].tolist(), [100, 102, 101])
+            self.assertEqual(view['side'].tolist(), [1, -1, 1])
+            self.assertFalse(view.flags.owndata)
+            books = replay.log('BTC_USDT', 'book').view()
+            self.assertEqual(books['bids'].shape, (2, 2, 2))
+            self.assertTrue(np.isnan(books['asks'][0, 1, 0]))
+            self.assertEqual(len(replay.log('BTC_USDT', 'ticker').view(5000)), 0)
+
+    def testReplayApi(self):
+        self.record()
+        with Replay(self.directory) as replay:
+            api = ReplayApi(replay).at(1500)
+            self.assertEqual(api.ticker('BTC_USDT')['data'][0]['a'], 100)
+            self.assertEqual(len(api.tickers()['data']), 2)
+            self.assertEqual([t['d'] for t in api.trades('BTC_USDT')['data']], ['3', '2', '1'])
+            self.assertEqual(api.order_book('BTC_USDT')['data'][0]['asks'], [[101, 3, 1]])
+            api.at(5000)
+            self.assertEqual(api.ticker('BTC_USDT')['data'][0]['a'], 99)
+            self.assertEqual(api.order_book('BTC_USDT')['data'][0]['bids'], [[98, 1, 1]])
+            self.assertEqual(api.ticker('XRP_USDT'), {'data': []})
+
+    def testClientRecording(self):
+        with MockExchange() as exchange, Recorder(self.directory) as recorder:
+            with CryptoComApi(api_root=exchange.root(), rate_limiter=RateLimiter({}), recorder=recorder,
+                              decode='records') as api:
+                api.tickers()
+                api.trades('BTC_USDT')
+                api.order_book('BTC_USDT')
+                self.assertTrue(api.trades('BTC_USDT'))
+            recorder.flush()
+            with Replay(self.directory) as replay:
+                ids = [t.trade_id for t in replay.log('BTC_USDT', 'trade').records()]
+                self.assertGreaterEqual(len(ids), exchange.trade_count)
+                self.assertEqual(len(set(ids)), len(ids))
+                self.assertEqual(len(replay.instruments), len(exchange.instruments))
+                self.assertEqual(len(replay.log('BTC_USDT', 'book').record(0).bids), 10)
@@ -0,0 +1,87 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from cryptocom import records
+from cryptocom.api import CryptoComApi
+
+V1, V2 = CryptoComApi.ApiVersion.V1, CryptoComApi.ApiVersion.V2
+
+
+class DecodeTestCase(unittest.TestCase):
+    def testTickersV1V2(self):
+        v1 = {'date': 1, 'ticker': [{'symbol': 'btcusdt', 'buy': '100.1', 'sell': '100.2', 'last': '100.15',
+                                     'high': '101', 'low': '99', 'vol': '12.5', 'rose': '0.01', 'time': 1000}]}
+        v2 = {'data': [{'i': 'BTC_USDT', 'b': 100.1, 'k': 100.2, 'a': 100.15, 'h': 101, 'l': 99, 'v': 12.5,
+                        'c': 0.01, 't': 1000}]}
+        expected = records.Ticker('btcusdt', 100.1, 100.2, 100.15, 101.0, 99.0, 12.5, 0.01, 1000)
+        self.assertEqual(records.decode_tickers(v1, V1), [expected])
+        self.assertEqual(records.decode_tickers(v2, V2), [expected._replace(instrument_name='BTC_USDT')])
+
+    def testSingleTickerV1(self):
+        ticker = records.decode_ticker({'buy': '1', 'sell': '2', 'time': 5}, V1, {'symbol': 'ethusdt'})
+        self.assertEqual((ticker.instrument_name, ticker.bid, ticker.ask, ticker.last), ('ethusdt', 1.0, 2.0, None))
+
+    def testTrades(self):
+        v1 = [{'id': 7, 'type': 'buy', 'price': '10.5', 'amount': '2', 'ctime': 1000}]
+        v2 = {'instrument_name': 'ETH_USDT', 'data': [{'i': 'ETH_USDT', 'd': 7, 's': 'BUY', 'p': 10.5, 'q': 2,
+                                                       't': 1000}]}
+        self.assertEqual(records.decode_trades(v1, V1, {'symbol': 'ethusdt'}),
+                         [records.Trade('ethusdt', '7', 'buy', 10.5, 2.0, 1000)])
+        self.assertEqual(records.decode_trades(v2, V2), [records.Trade('ETH_USDT', '7', 'BUY', 10.5, 2.0, 1000)])
+
+    def testBook(self):
+        v2 = {'instrument_name': 'BTC_USDT', 'depth': 2,
+              'data': [{'bids': [[100, 1.5, 2]], 'asks': [[101, 0.5, 1], [102, 3, 4]], 't': 1000}]}
+        book = records.decode_book(v2, V2)
+        self.assertEqual(book.bids, [records.BookLevel(100.0, 1.5, 2)])
+        self.assertEqual(book.asks[1], records.BookLevel(102.0, 3.0, 4))
+        self.assertEqual((book.instrument_name, book.timestamp), ('BTC_USDT', 1000))
+
+        v1 = {'tick': {'bids': [['100', '1.5']], 'asks': [], 'time': 1000}}
+        book = records.decode_book(v1, V1, {'symbol': 'btcusdt', 'type': 'step0'})
+        self.assertEqual(book, records.Book('btcusdt', [records.BookLevel(100.0, 1.5, None)], [], 1000))
+
+    def testOrders(self):
+        v2 = {'count': 1, 'order_list': [{'order_id': '1', 'client_oid': 'a', 'instrument_name': 'BTC_USDT',
+                                          'side': 'BUY', 'type': 'LIMIT', 'status': 'ACTIVE', 'price': 100,
+                                          'quantity': 2, 'cumulative_quantity': 0.5, 'avg_price': 99.5,
+                                          'create_time': 1000, 'update_time': 1001}]}
+        order = records.decode_orders(v2, V2)[0]
+        self.assertEqual((order.order_id, order.filled_quantity, order.update_time), ('1', 0.5, 1001))
+
+        v1 = {'count': 1, 'resultList': [{'id': 5, 'side': 'SELL', 'type': 1, 'status': 1, 'price': '10',
+                                          'volume': '1', 'deal_volume': '0', 'avg_price': '0', 'created_at': 1000}]}
+        order = records.decode_orders(v1, V1)[0]
+        self.assertEqual((order.order_id, order.side, order.price, order.update_time), ('5', 'SELL', 10.0, None))
+        self.assertEqual(records.decode_order({'order_info': v2['order_list'][0]}, V2).client_oid, 'a')
+
+
+class DecodeModeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.response = self.session.request.return_value
+        self.response.status_code = 200
+        self.response.text = json.dumps({'code': 0, 'result': {'data': [{'i': 'BTC_USDT', 'b': 1, 'k': 2, 't': 5}]}})
+
+    def testRecords(self):
+        api = CryptoComApi(session=self.session, decode='records')
+        self.assertEqual(api.tickers()[0].ask, 2.0)
+        self.assertEqual(api.ticker('BTC_USDT').instrument_name, 'BTC_USDT')
+        self.assertEqual(api.with_results().tickers().result[0].bid, 1.0)
+
+    def testRawByDefault(self):
+        api = CryptoComApi(session=self.session)
+        self.assertEqual(api.tickers()['data'][0]['b'], 1)
+
+    def testErrorNotDecoded(self):
+        self.response.text = '{"code": 10003, "message": "IP_ILLEGAL"}'
+        api = CryptoComApi(session=self.session, decode='records')
+        self.assertEqual(api.tickers(), {})
+        self.assertEqual(api.get_code(), 10003)
+
+    def testUnknownMode(self):
+        with self.assertRaises(ValueError):
+            CryptoComApi(decode='arrow')
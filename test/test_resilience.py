@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from cryptocom.api import CryptoComApi
+from cryptocom.ratelimit import RateLimiter
+from cryptocom.resilience import CircuitBreaker, Resilience, OPEN, HALF_OPEN, CLOSED
+from cryptocom.result import ApiResult
+
+OK = (200, {'code': 0, 'result': {'data': []}})
+
+
+class ResilienceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.replies = []
+        self.bodies = []
+        self.lock = threading.Lock()
+
+        def request(method, url, **kwargs):
+            with self.lock:
+                self.bodies.append(kwargs.get('json'))
+                reply = self.replies.pop(0) if self.replies else OK
+            if isinstance(reply, Exception):
+                raise reply
+            if callable(reply):
+                reply = reply()
+            status, body = reply
+            return mock.Mock(status_code=status, text=json.dumps(body))
+
+        self.session.request.side_effect = request
+
+    def api(self, resilience, key=None):
+        return CryptoComApi(key, key and 'secret', session=self.session, resilience=resilience,
+                            rate_limiter=RateLimiter({}), return_results=True)
+
+    def testRetryTransientErrors(self):
+        resilience = Resilience(retries=3, backoff=0)
+        self.replies = [(503, {}), requests.ConnectionError('reset'), (200, {'code': 10001, 'message': 'SYS_ERROR'})]
+        result = self.api(resilience).tickers()
+        self.assertTrue(result.ok)
+        self.assertEqual(len(self.bodies), 4)
+        self.assertEqual(resilience.stats()['retried'], 3)
+
+    def testNoRetryOnClientErrors(self):
+        self.replies = [(200, {'code': 10003, 'message': 'IP_ILLEGAL'})]
+        self.assertEqual(self.api(Resilience(backoff=0)).tickers().code, 10003)
+        self.assertEqual(len(self.bodies), 1)
+
+    def testExceptionRaisedWhenRetriesExhausted(self):
+        self.replies = [requests.ConnectionError('reset')] * 3
+        with self.assertRaises(requests.ConnectionError):
+            self.api(Resilience(retries=2, backoff=0)).tickers()
+        self.assertEqual(len(self.bodies), 3)
+
+    def testRateLimitDelay(self):
+        self.replies = [(429, {}), (200, {'code': 10006, 'message': 'TOO_MANY_REQUESTS'})]
+        with mock.patch('cryptocom.resilience.sleep') as sleep:
+            self.assertTrue(self.api(Resilience(backoff=0.01, rate_limit_delay=0.5)).tickers().ok)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 0.5])
+
+    def testDeadlineStopsRetries(self):
+        self.replies = [(503, {})] * 5
+        with mock.patch('cryptocom.resilience.random.uniform', return_value=1.0):
+            self.api(Resilience(retries=5, backoff=1, deadline=0.5)).tickers()
+        self.assertEqual(len(self.bodies), 1)
+        _, kwargs = self.session.request.call_args
+        self.assertLessEqual(kwargs['timeout'], 0.5)
+
+    def testCreateOrderRetriedOnlyWithClientOid(self):
+        api = self.api(Resilience(backoff=0), key='key')
+        self.replies = [(503, {})]
+        self.assertFalse(api.create_limit_order('BTC_USDT', 'BUY', 1, 100).ok)
+        self.assertEqual(len(self.bodies), 1)
+
+        self.bodies = []
+        self.replies = [(503, {})]
+        self.assertTrue(api.create_order('BTC_USDT', 'BUY', 'LIMIT', 1, 100, client_oid='my-1').ok)
+        self.assertEqual(len(self.bodies), 2)
+        # every attempt is signed again
+        for body in self.bodies:
+            self.assertEqual(body['sig'], api._sign(body['params'], body['method'], body['id'], body['nonce']))
+
+        self.bodies = []
+        self.replies = [(503, {})]
+        self.assertTrue(api.balance().ok)
+        self.assertEqual(len(self.bodies), 2)
+
+    def testBreakerOpenedDuringRetries(self):
+        self.replies = [(503, {})] * 5
+        result = self.api(Resilience(retries=5, backoff=0, breaker_threshold=3)).tickers()
+        self.assertEqual(result.http_status, 503)
+        self.assertEqual(len(self.bodies), 3)
+
+    def testCircuitBreaker(self):
+        resilience = Resilience(retries=0, breaker_threshold=2, breaker_reset=0.05)
+        api = self.api(resilience)
+        self.replies = [(502, {}), (502, {})]
+        api.tickers()
+        api.tickers()
+        self.assertEqual(api.tickers().error, {'circuit_open': 'public'})
+        self.assertEqual(len(self.bodies), 2)
+        # other endpoint groups are not affected
+        self.assertEqual(api.with_results().balance().error, {'public_only': 'private/get-account-summary'})
+
+        time.sleep(0.06)
+        self.assertTrue(api.tickers().ok)
+        self.assertEqual(resilience.breakers['public'].state, CLOSED)
+
+    def testBreakerHalfOpen(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record(True)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record(True)
+        self.assertEqual(breaker.state, OPEN)
+
+    def testCancelledTrialReleasesBreaker(self):
+        resilience = Resilience(retries=0, breaker_threshold=1, breaker_reset=0.01)
+        resilience.breaker('public').record(True)
+        time.sleep(0.02)
+
+        async def never(timeout):
+            await asyncio.sleep(10)
+
+        async def ok(timeout):
+            return ApiResult({}, 0, '', 200, 0.0, None, None)
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(resilience.call_async('public', never), 0.01)
+            self.assertEqual(resilience.breakers['public'].state, OPEN)
+            await asyncio.sleep(0.02)
+            return await resilience.call_async('public', ok)
+
+        self.assertTrue(asyncio.run(run()).ok)
+        self.assertEqual(resilience.breakers['public'].state, CLOSED)
+
+    def testHedgedGet(self):
+        def slow():
+            time.sleep(0.3)
+            return 200, {'code': 0, 'result': {'data': ['slow']}}
+
+        resilience = Resilience(hedge_after=0.05)
+        self.replies = [slow, (200, {'code': 0, 'result': {'data': ['fast']}})]
+        start = time.perf_counter()
+        result = self.api(resilience).tickers()
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(result.result, {'data': ['fast']})
+        self.assertEqual(resilience.stats()['hedged'], 1)
+        resilience.close()
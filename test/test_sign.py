@@ -0,0 +1,63 @@
+import hashlib
+import hmac
+import unittest
+
+from cryptocom.api import CryptoComApi
+
+KEY, SECRET = 'api-key', 'api-secret'
+
+
+def reference_sign_v1(params):
+    # CryptoComApi._sign as of 0.3.4
+    to_sign = ""
+    for key in sorted(params.keys()):
+        to_sign += key + str(params[key])
+    to_sign += SECRET
+    return hashlib.sha256(to_sign.encode()).hexdigest()
+
+
+def reference_params_to_str(obj, level):
+    # from the exchange's V2 documentation
+    if level >= 3:
+        return str(obj)
+    return_str = ""
+    for key in sorted(obj):
+        return_str += key
+        if obj[key] is None:
+            return_str += 'null'
+        elif isinstance(obj[key], list):
+            for sub_obj in obj[key]:
+                return_str += reference_params_to_str(sub_obj, level + 1)
+        else:
+            return_str += str(obj[key])
+    return return_str
+
+
+def reference_sign_v2(params, method, id, nonce):
+    payload = method + str(id) + KEY + reference_params_to_str(params, 0) + str(nonce)
+    return hmac.new(SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+class SignTestCase(unittest.TestCase):
+    def testV1(self):
+        api = CryptoComApi(KEY, SECRET, version=CryptoComApi.ApiVersion.V1)
+        params = {'symbol': 'crobtc', 'side': 'BUY', 'type': 1, 'volume': 10.5, 'price': 0.0001,
+                  'api_key': KEY, 'time': 1591704180270}
+        self.assertEqual(api._sign(params), reference_sign_v1(params))
+
+    def testV2Flat(self):
+        api = CryptoComApi(KEY, SECRET)
+        params = {'instrument_name': 'BTC_USDT', 'side': 'BUY', 'type': 'LIMIT', 'price': 9000.5, 'quantity': 0.01}
+        for _ in range(2):
+            self.assertEqual(api._sign(params, 'private/create-order', 1, 1591704180270),
+                             reference_sign_v2(params, 'private/create-order', 1, 1591704180270))
+        self.assertEqual(api._sign({}, 'private/get-account-summary', 1, 1),
+                         reference_sign_v2({}, 'private/get-account-summary', 1, 1))
+
+    def testV2Nested(self):
+        api = CryptoComApi(KEY, SECRET)
+        params = {'contingency_type': 'LIST', 'order_list': [
+            {'instrument_name': 'BTC_USDT', 'side': 'BUY', 'type': 'LIMIT', 'price': 9000 + i, 'quantity': 0.01,
+             'client_oid': None} for i in range(3)]}
+        self.assertEqual(api._sign(params, 'private/create-order-list', 1, 42),
+                         reference_sign_v2(params, 'private/create-order-list', 1, 42))
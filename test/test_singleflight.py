@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptocom.singleflight import SingleFlight
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def testThreadsShareOneCall(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {'data': [1]}
+
+        with ThreadPoolExecutor(8) as pool:
+            futures = [pool.submit(flight.do, ('public/get-book', ()), fetch) for _ in range(8)]
+            while flight.coalesced < 7:
+                threading.Event().wait(0.001)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flight.stats(), {'calls': 1, 'coalesced': 7, 'in_flight': 0})
+
+    def testErrorSharedAndNotKept(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError('boom')
+
+        self.assertRaises(ValueError, flight.do, 'key', fail)
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+
+    def testCoroutinesShareOneCall(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'data': [1]}
+
+        async def main():
+            return await asyncio.gather(*(flight.do_async('key', fetch) for _ in range(10)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'data': [1]}] * 10)
+        self.assertEqual(flight.coalesced, 9)
+
+    def testCancelledLeaderRetriedByWaiter(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do_async('key', fetch))
+            await asyncio.sleep(0)
+            waiters = [asyncio.ensure_future(flight.do_async('key', fetch)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await asyncio.gather(*waiters)
+
+        # one waiter runs the call again, the others share its result
+        self.assertEqual(asyncio.run(main()), [2, 2, 2])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flight.stats()['in_flight'], 0)
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import unittest
+
+try:
+    import websockets
+    from cryptocom.stream import MarketStream, ticker_channel, trade_channel, DROP_NEWEST
+except ImportError:
+    websockets = None
+
+
+class MarketStandIn:
+    """
+    Local stand-in of the V2 market WebSocket: answers subscriptions with one message per channel,
+    sends a heartbeat first and drops the first connection right after the first subscription
+    """
+
+    def __init__(self, garbage=()):
+        self.garbage = garbage
+        self.subscriptions = []
+        self.heartbeat_responses = []
+        self.connections = 0
+
+    async def handler(self, ws):
+        self.connections += 1
+        connection = self.connections
+        await ws.send(json.dumps({'id': 99, 'method': 'public/heartbeat', 'code': 0}))
+        async for raw in ws:
+            message = json.loads(raw)
+            if message['method'] == 'public/respond-heartbeat':
+                self.heartbeat_responses.append(message['id'])
+            elif message['method'] == 'subscribe':
+                channels = message['params']['channels']
+                self.subscriptions.append(channels)
+                await ws.send(json.dumps({'id': message['id'], 'method': 'subscribe', 'code': 0}))
+                if connection == 1:
+                    await ws.close()
+                    return
+                for frame in self.garbage:
+                    await ws.send(frame)
+                for channel in channels:
+                    name = channel.split('.')[1]
+                    await ws.send(json.dumps({'method': 'subscribe', 'result': {
+                        'instrument_name': name, 'subscription': channel, 'channel': channel.split('.')[0],
+                        'data': [{'i': name}]}}))
+
+
+@unittest.skipIf(websockets is None, "websockets is not installed")
+class MarketStreamTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.stand_in = MarketStandIn()
+        self.server = await websockets.serve(self.stand_in.handler, '127.0.0.1', 0)
+        port = list(self.server.sockets)[0].getsockname()[1]
+        self.url = f'ws://127.0.0.1:{port}'
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def testResubscribeAfterReconnect(self):
+        received = []
+        stream = MarketStream(self.url, connect_delay=0, reconnect_delay=0.01)
+        stream.add_callback(received.append, channel='ticker')
+        await stream.subscribe(ticker_channel('BTC_USDT'), trade_channel('ETH_USDT'))
+
+        async with stream:
+            messages = [await asyncio.wait_for(stream.__anext__(), 5) for _ in range(2)]
+
+        self.assertEqual(sorted(m.subscription for m in messages), ['ticker.BTC_USDT', 'trade.ETH_USDT'])
+        self.assertEqual([m.instrument_name for m in received], ['BTC_USDT'])
+        self.assertEqual(stream.reconnects, 1)
+        self.assertEqual(self.stand_in.subscriptions, [['ticker.BTC_USDT', 'trade.ETH_USDT']] * 2)
+        self.assertIn(99, self.stand_in.heartbeat_responses)
+
+    async def testMalformedMessagesSkipped(self):
+        self.stand_in.garbage = ['not json', '[1]', '{"result": {"data": [], "channel": ']
+        stream = MarketStream(self.url, connect_delay=0, reconnect_delay=0.01)
+        await stream.subscribe(ticker_channel('BTC_USDT'))
+
+        async with stream:
+            message = await asyncio.wait_for(stream.__anext__(), 5)
+
+        self.assertEqual(message.subscription, 'ticker.BTC_USDT')
+        self.assertEqual(stream.invalid, 3)
+        # only the reconnect of the stand-in's first connection
+        self.assertEqual(stream.reconnects, 1)
+
+    async def testDropNewestWhenQueueFull(self):
+        stream = MarketStream(self.url, queue_size=1, overflow=DROP_NEWEST, connect_delay=0, reconnect_delay=0.01)
+        await stream.subscribe(ticker_channel('BTC_USDT'), ticker_channel('ETH_USDT'), ticker_channel('CRO_USDT'))
+        stream.start()
+        while stream.received < 3:
+            await asyncio.sleep(0.01)
+        await stream.close()
+
+        self.assertEqual(stream.dropped, 2)
+        messages = [message async for message in stream]
+        self.assertEqual(len(messages), 1)
@@ -0,0 +1,104 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from cryptocom import records
+from cryptocom.api import CryptoComApi
+
+V2 = CryptoComApi.ApiVersion.V2
+
+TICKERS = {'data': [
+    {'i': 'BTC_USDT', 'b': 9990, 'k': 10010, 'a': 10000, 'v': 100},
+    {'i': 'ETH_BTC', 'b': 0.0199, 'k': 0.0201, 'a': 0.02, 'v': 50},
+    {'i': 'CRO_ETH', 'b': 0.0005, 'k': 0.0005, 'a': 0.0005, 'v': 10},
+    # thinly traded direct market
+    {'i': 'ETH_USDT', 'b': 199, 'k': 201, 'a': 210, 'v': 1},
+    {'i': 'ETH_USDC', 'b': 199, 'k': 201, 'a': 200, 'v': 5},
+    {'i': 'XYZ_ABC', 'b': 1, 'k': 1, 'a': 1, 'v': 1},
+    {'i': 'DEAD_USDT', 'b': None, 'k': None, 'a': None, 'v': 0},
+]}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class RateTableTestCase(unittest.TestCase):
+    def setUp(self):
+        from cryptocom import valuation
+        self.valuation = valuation
+
+    def testCrossRates(self):
+        table = self.valuation.RateTable(TICKERS)
+        self.assertEqual(table.rate('BTC', 'USDT'), 10000)
+        self.assertEqual(table.rate('USDT', 'BTC'), 1 / 10000)
+        self.assertEqual(table.rate('ETH', 'USDT'), 200)
+        # CRO -> ETH -> USDT
+        self.assertAlmostEqual(table.rate('CRO', 'USDT'), 0.1)
+        self.assertAlmostEqual(table.rate('CRO', 'USDC'), 0.1)
+        self.assertIsNone(table.rate('XYZ', 'USDT'))
+        self.assertIsNone(table.rate('DEAD', 'USDT'))
+        self.assertIsNone(table.rate('CRO', 'USDT', max_hops=1))
+
+    def testShortestThenMostTradedPath(self):
+        tickers = {'data': TICKERS['data'] + [{'i': 'CRO_BTC', 'b': 0.00002, 'k': 0.00002, 'a': 0.00002, 'v': 100}]}
+        table = self.valuation.RateTable(tickers, price=self.valuation.LAST)
+        # the direct ETH_USDT market beats the more traded ETH -> BTC -> USDT path
+        self.assertEqual(table.rate('ETH', 'USDT'), 210)
+        # two paths of two hops, CRO_BTC is more traded than CRO_ETH
+        self.assertAlmostEqual(table.rate('CRO', 'USDT'), 0.2)
+
+    def testTopOfBook(self):
+        table = self.valuation.RateTable(TICKERS, price=self.valuation.TOP)
+        self.assertEqual(table.rate('BTC', 'USDT'), 9990)
+        self.assertEqual(table.rate('USDT', 'BTC'), 1 / 10010)
+
+    def testValuation(self):
+        balance = {'accounts': [{'currency': 'USDT', 'balance': 50}, {'currency': 'BTC', 'balance': 0.5},
+                                {'currency': 'CRO', 'balance': 1000}, {'currency': 'XYZ', 'balance': 3},
+                                {'currency': 'NEW', 'balance': 1}]}
+        result = self.valuation.valuation(TICKERS, balance)
+        self.assertAlmostEqual(result.total, 50 + 5000 + 100)
+        self.assertAlmostEqual(result.values['CRO'], 100)
+        self.assertEqual(sorted(result.unpriced), ['NEW', 'XYZ'])
+        v1 = self.valuation.balances({'coin_list': [{'coin': 'btc', 'normal': 1, 'locked': '0.5'}]})
+        self.assertEqual(v1, {'BTC': 1.5})
+
+    def testV1Tickers(self):
+        tickers = {'date': 1, 'ticker': [
+            {'symbol': 'btcusdt', 'buy': '9990', 'sell': '10010', 'last': '10000', 'vol': '100'},
+            {'symbol': 'crobtc', 'buy': '0.00001', 'sell': '0.00001', 'last': '0.00001', 'vol': '10'}]}
+        symbols = [{'symbol': 'btcusdt', 'base_coin': 'BTC', 'count_coin': 'USDT'},
+                   {'symbol': 'crobtc', 'base_coin': 'CRO', 'count_coin': 'BTC'}]
+        table = self.valuation.RateTable(tickers, symbols=symbols)
+        self.assertEqual(table.rate('BTC', 'USDT'), 10000)
+        self.assertAlmostEqual(table.rate('CRO', 'USDT'), 0.1)
+        result = self.valuation.valuation(tickers, {'coin_list': [{'coin': 'cro', 'normal': '10', 'locked': 0}]},
+                                          symbols=symbols)
+        self.assertAlmostEqual(result.total, 1)
+        with self.assertRaises(ValueError):
+            self.valuation.RateTable(tickers)
+
+    def testRecordTickers(self):
+        table = self.valuation.RateTable(records.decode_tickers(TICKERS, V2))
+        self.assertEqual(table.rate('BTC', 'USDT'), 10000)
+
+    def testSlippage(self):
+        from cryptocom import columnar
+        books = [
+            {'instrument_name': 'BTC_USDT', 'data': [{'asks': [[100, 1, 1], [101, 1, 1], [103, 5, 1]], 'bids': []}]},
+            records.Book('ETH_USDT', [], [records.BookLevel(10, 10, 1)], 0),
+            columnar.decode_book({'data': [{'asks': [[1, 0.5, 1]], 'bids': [[0.9, 1, 1]]}]}, V2),
+        ]
+        prices, quantities = self.valuation.stack_books(books, self.valuation.ASKS)
+        self.assertEqual(prices.shape, (3, 3))
+        vwap, filled = self.valuation.vwap_for_size(prices, quantities, 2)
+        np.testing.assert_allclose(vwap, [100.5, 10, 1])
+        np.testing.assert_allclose(filled, [2, 2, 0.5])
+        slippage, _ = self.valuation.slippage(prices, quantities, [3, 1, 0.1])
+        np.testing.assert_allclose(slippage, [(304 / 3 - 100) / 100, 0, 0])
+
+        bids, bid_quantities = self.valuation.stack_books(books, self.valuation.BIDS, depth=1)
+        slippage, filled = self.valuation.slippage(bids, bid_quantities, 1)
+        self.assertTrue(np.isnan(slippage[0]))
+        self.assertEqual(filled.tolist(), [0, 0, 1])